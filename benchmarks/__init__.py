@@ -0,0 +1,3 @@
+# Scripts de mesure de performance (hors application).
+# À lancer depuis la racine du projet, par exemple :
+#   python -m benchmarks.commit_latency
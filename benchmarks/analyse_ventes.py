@@ -0,0 +1,120 @@
+# benchmarks/analyse_ventes.py
+"""
+Analyses des ventes (module reports) sur un grand volume de lignes.
+
+Génère des lignes de vente synthétiques (1 000 000 par défaut, 5 000
+produits, un an d'historique) directement en tableaux NumPy puis mesure
+chaque analyse : CA par produit, marges, classement ABC, moyenne mobile
+et carte horaire. Avec --base, les mêmes lignes sont aussi écrites dans
+une base temporaire pour mesurer la lecture (reports.charger_ventes).
+
+Usage :
+    python -m benchmarks.analyse_ventes [--lignes 1000000] [--produits 5000] [--base]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import reports  # noqa: E402
+from database import Database  # noqa: E402
+
+
+def generer(nb_lignes, nb_produits, graine=42):
+    """Lignes synthétiques : produits tirés selon une loi de Zipf (quelques best-sellers)."""
+    np = reports.np
+    rnd = np.random.default_rng(graine)
+    produit_id = np.minimum(rnd.zipf(1.3, nb_lignes), nb_produits).astype(np.int64)
+    quantite = rnd.integers(1, 4, nb_lignes).astype(np.float64)
+    prix_vente = rnd.uniform(200, 8000, nb_produits + 1).round(0)
+    montant = quantite * prix_vente[produit_id]
+    jour = np.datetime64("2025-01-01") + rnd.integers(0, 365, nb_lignes)
+    heure = rnd.integers(9, 21, nb_lignes)
+    jour_semaine = ((jour.astype(np.int64) + 3) % 7)   # 1970-01-01 était un jeudi
+    cout_unitaire = (prix_vente * rnd.uniform(0.5, 0.9, nb_produits + 1)).round(0)
+    cout_unitaire[0] = 0.0
+    return reports.DonneesVentes(produit_id, quantite, montant, jour, heure,
+                                 jour_semaine, cout_unitaire=cout_unitaire)
+
+
+def ecrire_base(db, donnees, lignes_par_vente=3):
+    """Écrit les lignes dans ventes / details_ventes (une vente pour 3 lignes)."""
+    np = reports.np
+    nb = len(donnees)
+    jours = donnees.jour.astype(str)
+    heures = donnees.heure.astype(np.int64)
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO produits
+            (id, nom, categorie, description, prix_achat, prix_vente, quantite, seuil_alerte, actif)
+            VALUES (?, ?, 'Bench', '', ?, 0, 0, 0, 1)
+        """, [(i, f"Produit {i}", float(c)) for i, c in enumerate(donnees.cout_unitaire) if i])
+        ventes = range(0, nb, lignes_par_vente)
+        cur.executemany("""
+            INSERT INTO ventes
+            (id, date_heure, caisse_id, mode_paiement, montant_total, montant_paye, monnaie_rendue)
+            VALUES (?, ?, 1, 'ESPECES', 0, 0, 0)
+        """, ((i // lignes_par_vente + 1, f"{jours[i]} {heures[i]:02d}:00:00") for i in ventes))
+        cur.executemany("""
+            INSERT INTO details_ventes
+            (vente_id, produit_id, libelle, quantite, prix_unitaire, sous_total)
+            VALUES (?, ?, NULL, ?, 0, ?)
+        """, ((i // lignes_par_vente + 1, int(donnees.produit_id[i]),
+               float(donnees.quantite[i]), float(donnees.montant[i])) for i in range(nb)))
+
+
+def chronometrer(nom, fonction, resultats):
+    t0 = time.perf_counter()
+    valeur = fonction()
+    duree = (time.perf_counter() - t0) * 1000
+    resultats.append({"analyse": nom, "ms": duree})
+    print(f"{nom:32} {duree:9.1f}")
+    return valeur
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--produits", type=int, default=5_000)
+    parser.add_argument("--base", action="store_true",
+                        help="mesurer aussi la lecture depuis SQLite (plus long à préparer)")
+    args = parser.parse_args(argv)
+
+    if reports.np is None:
+        print("NumPy n'est pas installé : pip install numpy")
+        return None
+
+    donnees = generer(args.lignes, args.produits)
+    print(f"{len(donnees)} lignes de vente, {args.produits} produits")
+    print(f"{'analyse':32} {'ms':>9}")
+
+    resultats = []
+    t0 = time.perf_counter()
+    marges = chronometrer("marges_par_produit",
+                          lambda: reports.marges_par_produit(donnees), resultats)
+    chronometrer("classement_abc",
+                 lambda: reports.classement_abc(marges["chiffre_affaires"]), resultats)
+    chronometrer("moyenne_mobile (7 j)",
+                 lambda: reports.moyenne_mobile(donnees, 7), resultats)
+    chronometrer("carte_horaire",
+                 lambda: reports.carte_horaire(donnees), resultats)
+    total = (time.perf_counter() - t0) * 1000
+    print(f"{'total des analyses':32} {total:9.1f}")
+
+    if args.base:
+        with tempfile.TemporaryDirectory() as dossier:
+            db = Database(Path(dossier) / "bench.db")
+            ecrire_base(db, donnees)
+            relues = chronometrer("charger_ventes (SQLite)",
+                                  lambda: reports.charger_ventes(db), resultats)
+            db.close()
+        assert len(relues) == len(donnees)
+
+    return {"lignes": len(donnees), "total_ms": total, "analyses": resultats}
+
+
+if __name__ == "__main__":
+    main()
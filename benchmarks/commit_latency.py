@@ -0,0 +1,135 @@
+# benchmarks/commit_latency.py
+"""
+Latence des commits selon le profil de connexion SQLite.
+
+Pour chaque profil de PROFILS_CONNEXION, une base neuve est créée dans un
+dossier temporaire puis on mesure :
+  - un mouvement de caisse isolé (un INSERT + commit),
+  - un passage en caisse complet (encaisser_vente : vente, lignes, stock,
+    mouvement de caisse, créance) pendant qu'une seconde connexion lit
+    l'historique des ventes.
+
+Usage :
+    python -m benchmarks.commit_latency [--iterations 300]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Database, PROFILS_CONNEXION  # noqa: E402
+
+
+def _percentile(valeurs, p):
+    valeurs = sorted(valeurs)
+    k = min(len(valeurs) - 1, max(0, round(p / 100 * (len(valeurs) - 1))))
+    return valeurs[k]
+
+
+def _resume(durees):
+    """Durées en secondes -> dict de statistiques en millisecondes."""
+    ms = [d * 1000 for d in durees]
+    return {
+        "moyenne": statistics.mean(ms),
+        "mediane": statistics.median(ms),
+        "p95": _percentile(ms, 95),
+        "max": max(ms),
+    }
+
+
+def _preparer_produits(db, nb=50):
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO produits
+            (code_barres, reference, nom, categorie, description,
+             prix_achat, prix_vente, quantite, seuil_alerte, actif)
+            VALUES (?, ?, ?, 'Bench', '', 100, 150, 1000000, 0, 1)
+        """, [(f"BENCH{i:05d}", f"REF{i:05d}", f"Produit {i}") for i in range(nb)])
+        return [r[0] for r in cur.execute("SELECT id FROM produits")]
+
+
+def mesurer_profil(profil, iterations):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = Path(dossier) / "bench.db"
+        db = Database(chemin, profil=profil)
+        produits = _preparer_produits(db)
+        caisse_id = db.get_caisses()[0]["id"]
+
+        # 1) mouvement de caisse isolé
+        durees_mvt = []
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            db.ajouter_mouvement_caisse(caisse_id, "ENTREE", 100.0, f"Bench {i}")
+            durees_mvt.append(time.perf_counter() - t0)
+
+        # 2) passage en caisse complet, avec un lecteur concurrent
+        arret = threading.Event()
+        pret = threading.Event()
+        lectures = [0]
+
+        def lecteur():
+            lect = Database(chemin, profil=profil)
+            pret.set()
+            while not arret.is_set():
+                lect.get_ventes()
+                lectures[0] += 1
+            lect.close()
+
+        thread = threading.Thread(target=lecteur, daemon=True)
+        thread.start()
+        pret.wait()
+
+        durees_vente = []
+        for i in range(iterations):
+            items = [
+                {"produit_id": produits[(i + j) % len(produits)], "quantite": 1,
+                 "prix_unitaire": 150.0, "sous_total": 150.0}
+                for j in range(3)
+            ]
+            montant_paye = 450.0 if i % 4 else 300.0   # une vente sur 4 à crédit
+            t0 = time.perf_counter()
+            db.encaisser_vente(caisse_id, items, "ESPECES", montant_paye, 0.0, "Client bench")
+            durees_vente.append(time.perf_counter() - t0)
+
+        arret.set()
+        thread.join()
+        pragmas = db.get_pragmas()
+        db.close()
+
+    return {
+        "profil": profil,
+        "pragmas": pragmas,
+        "mouvement": _resume(durees_mvt),
+        "vente": _resume(durees_vente),
+        "lectures": lectures[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--profil", action="append", choices=sorted(PROFILS_CONNEXION),
+                        help="profil à mesurer (par défaut : tous)")
+    args = parser.parse_args(argv)
+
+    resultats = [mesurer_profil(p, args.iterations) for p in (args.profil or PROFILS_CONNEXION)]
+
+    print(f"Latence des commits ({args.iterations} itérations, en ms)")
+    print(f"{'profil':10} {'opération':10} {'moyenne':>8} {'médiane':>8} {'p95':>8} {'max':>8}")
+    for r in resultats:
+        for op in ("mouvement", "vente"):
+            s = r[op]
+            print(f"{r['profil']:10} {op:10} {s['moyenne']:8.2f} {s['mediane']:8.2f} "
+                  f"{s['p95']:8.2f} {s['max']:8.2f}")
+        print(f"{'':10} lectures concurrentes pendant les ventes : {r['lectures']}")
+        print(f"{'':10} {r['pragmas']}")
+    return resultats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# benchmarks/donnees.py
+"""
+Historique synthétique d'un magasin, pour mesurer la base sous un volume réaliste.
+
+Remplit une base (neuve de préférence) avec, sur plusieurs années :
+  - des clients et un catalogue de produits,
+  - des tickets de réparation (dépôt, puis retrait et paiement pour la plupart),
+  - des ventes au comptoir avec leurs lignes,
+  - les mouvements de caisse correspondants (et quelques dépenses),
+  - des créances (ventes à crédit, réparations non soldées),
+  - des achats de téléphones d'occasion.
+Les tables tenues par trigger (soldes_caisses, ventes_jour, produits_fts)
+se remplissent au passage. Le tirage est reproductible (graine).
+
+Usage :
+    python -m benchmarks.donnees data/bench.db [--volume moyen] [--annees 3]
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Database, FORMAT_DATE, FORMAT_DATE_HEURE  # noqa: E402
+
+# Volumes prédéfinis : par jour pour les tickets et les ventes, par mois
+# pour les achats d'occasion.
+VOLUMES = {
+    "petit": {"annees": 1, "clients": 500, "produits": 1_000,
+              "tickets_jour": 5, "ventes_jour": 30, "occasions_mois": 10},
+    "moyen": {"annees": 3, "clients": 3_000, "produits": 5_000,
+              "tickets_jour": 15, "ventes_jour": 80, "occasions_mois": 30},
+    "grand": {"annees": 5, "clients": 10_000, "produits": 20_000,
+              "tickets_jour": 30, "ventes_jour": 200, "occasions_mois": 60},
+}
+VOLUME_DEFAUT = "moyen"
+
+NOMS = ["Benali", "Boudiaf", "Haddad", "Khelifi", "Mansouri", "Saidi", "Brahimi",
+        "Zerrouki", "Amrani", "Belkacem", "Cherif", "Djebbar", "Ferhat", "Hamidi"]
+PRENOMS = ["Amine", "Yacine", "Sara", "Nadia", "Karim", "Lina", "Mehdi", "Imane",
+           "Walid", "Samira", "Rayan", "Meriem", "Sofiane", "Nour"]
+MARQUES = ["iPhone", "Samsung Galaxy", "Xiaomi Redmi", "Huawei", "Oppo",
+           "Nokia", "Realme", "Tecno", "Infinix", "Condor"]
+TYPES = ["Écran", "Batterie", "Coque", "Chargeur", "Câble", "Vitre trempée",
+         "Connecteur de charge", "Haut-parleur", "Caméra arrière", "Nappe"]
+CATEGORIES = ["Pièces", "Accessoires", "Téléphones", "Réparation", "Énergie"]
+PANNES = ["Écran cassé", "Ne charge plus", "Batterie faible", "Tombé dans l'eau",
+          "Haut-parleur muet", "Bloqué au logo", "Micro HS"]
+MODES_PAIEMENT = ["ESPECES", "ESPECES", "ESPECES", "CARTE", "CHEQUE"]
+
+
+def _prochain_id(cur, table):
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cur.fetchone()[0]
+
+
+def _instant(rnd, jour):
+    return jour + timedelta(hours=rnd.randint(9, 19), minutes=rnd.randint(0, 59),
+                            seconds=rnd.randint(0, 59))
+
+
+def generer_magasin(db, annees=3, clients=3_000, produits=5_000, tickets_jour=15,
+                    ventes_jour=80, occasions_mois=30, graine=42, fin=None):
+    """
+    Écrit l'historique dans db en une seule transaction.
+    fin : dernier jour de l'historique (datetime, aujourd'hui par défaut).
+    Retourne le nombre de lignes écrites par table.
+    """
+    rnd = random.Random(graine)
+    fin = (fin or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    debut = fin - timedelta(days=int(annees * 365) - 1)
+    jours = [debut + timedelta(days=k) for k in range((fin - debut).days + 1)]
+
+    caisses = [row["id"] for row in db.get_caisses()]
+    caisse_comptoir = caisses[0]
+    lignes = {}
+
+    with db.transaction() as cur:
+        # ---------- CLIENTS ----------
+        personnes = [(rnd.choice(NOMS), rnd.choice(PRENOMS), f"0{rnd.choice('567')}{rnd.randrange(10**8):08d}")
+                     for _ in range(clients)]
+        cur.executemany("""
+            INSERT INTO clients (nom, prenom, telephone, email, adresse)
+            VALUES (?, ?, ?, '', '')
+        """, personnes)
+        lignes["clients"] = len(personnes)
+
+        # ---------- PRODUITS ----------
+        premier_produit = _prochain_id(cur, "produits")
+        catalogue = []
+        for i in range(produits):
+            prix_achat = round(rnd.uniform(100, 5000), 0)
+            catalogue.append((
+                premier_produit + i,
+                f"37600{premier_produit + i:08d}",
+                f"REF-{premier_produit + i:05d}",
+                f"{rnd.choice(TYPES)} {rnd.choice(MARQUES)} {rnd.randint(1, 60)}",
+                rnd.choice(CATEGORIES),
+                prix_achat,
+                round(prix_achat * rnd.uniform(1.2, 1.8), 0),
+                rnd.randint(0, 200),
+                rnd.randint(0, 5),
+                1 if rnd.random() > 0.05 else 0,
+            ))
+        cur.executemany("""
+            INSERT INTO produits
+            (id, code_barres, reference, nom, categorie, description,
+             prix_achat, prix_vente, quantite, seuil_alerte, actif)
+            VALUES (?, ?, ?, ?, ?, '', ?, ?, ?, ?, ?)
+        """, catalogue)
+        lignes["produits"] = len(catalogue)
+        # quelques best-sellers : tirage pondéré
+        cumul = list(itertools.accumulate(1.0 / (k + 1) for k in range(len(catalogue))))
+
+        mouvements = []
+        creances = []
+
+        # ---------- VENTES AU COMPTOIR ----------
+        vente_id = _prochain_id(cur, "ventes")
+        ventes, details = [], []
+        for jour in jours:
+            for _ in range(max(0, int(rnd.gauss(ventes_jour, ventes_jour / 4)))):
+                instant = _instant(rnd, jour).strftime(FORMAT_DATE_HEURE)
+                total = 0.0
+                for p in rnd.choices(catalogue, cum_weights=cumul, k=rnd.randint(1, 4)):
+                    quantite = rnd.randint(1, 3)
+                    details.append((vente_id, p[0], None, quantite, p[6], quantite * p[6]))
+                    total += quantite * p[6]
+                mode = rnd.choice(MODES_PAIEMENT)
+                paye = total if rnd.random() > 0.03 else round(total / 2, 0)
+                client = None
+                if paye < total:
+                    nom, prenom, _tel = rnd.choice(personnes)
+                    client = f"{nom} {prenom}"
+                    creances.append((None, client, "Vente comptoir", f"Vente comptoir N°{vente_id}",
+                                     total, paye, total - paye, instant[:10]))
+                ventes.append((vente_id, instant, caisse_comptoir, client, mode, total, paye, 0.0))
+                mouvements.append((caisse_comptoir, instant, "ENTREE", paye, f"Vente comptoir N°{vente_id}"))
+                vente_id += 1
+        cur.executemany("""
+            INSERT INTO ventes
+            (id, date_heure, caisse_id, client_nom, mode_paiement,
+             montant_total, montant_paye, monnaie_rendue)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, ventes)
+        cur.executemany("""
+            INSERT INTO details_ventes
+            (vente_id, produit_id, libelle, quantite, prix_unitaire, sous_total)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, details)
+        lignes["ventes"] = len(ventes)
+        lignes["details_ventes"] = len(details)
+
+        # ---------- TICKETS DE RÉPARATION ----------
+        ticket_id = _prochain_id(cur, "tickets_reparation")
+        tickets = []
+        for jour in jours:
+            for _ in range(max(0, int(rnd.gauss(tickets_jour, tickets_jour / 4)))):
+                nom, prenom, tel = rnd.choice(personnes)
+                depot = jour.strftime(FORMAT_DATE)
+                statut, retrait, travaux, total, paye = "En cours", None, None, None, None
+                attente = rnd.randint(0, 15)
+                if jour + timedelta(days=attente) <= fin and rnd.random() > 0.05:
+                    statut = "Livré" if rnd.random() > 0.04 else "Annulé"
+                    retrait = (jour + timedelta(days=attente)).strftime(FORMAT_DATE)
+                    travaux = "Remplacement pièce"
+                    total = float(rnd.randrange(1000, 15000, 500))
+                    paye = total if rnd.random() > 0.1 else float(rnd.randrange(0, int(total), 500))
+                    if paye:
+                        mouvements.append((caisse_comptoir, f"{retrait} {rnd.randint(9, 19):02d}:00:00",
+                                           "ENTREE", paye, f"Réparation téléphone N°{ticket_id}"))
+                    if paye < total:
+                        creances.append((ticket_id, f"{nom} {prenom}", rnd.choice(MARQUES),
+                                         f"Réparation téléphone (ticket N°{ticket_id})",
+                                         total, paye, total - paye, retrait))
+                tickets.append((
+                    ticket_id, f"{nom} {prenom}", tel, rnd.choice(MARQUES), f"{rnd.randint(4, 15)}",
+                    f"SN{rnd.randrange(10**10):010d}", rnd.randint(0, 1), rnd.randint(0, 1),
+                    rnd.choice(PANNES), depot, travaux, retrait, total, paye,
+                    None if total is None else total - paye, statut,
+                ))
+                ticket_id += 1
+        cur.executemany("""
+            INSERT INTO tickets_reparation
+            (id, client_nom, client_tel, pc_marque, pc_modele, pc_num_serie,
+             avec_chargeur, avec_batterie, diagnostic_initial, date_depot,
+             travaux_effectues, date_retrait, montant_total, montant_paye,
+             montant_restant, statut)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, tickets)
+        lignes["tickets_reparation"] = len(tickets)
+
+        # ---------- ACHATS D'OCCASION ----------
+        occasions = []
+        for jour in jours:
+            if rnd.random() < occasions_mois / 30:
+                nom, prenom, tel = rnd.choice(personnes)
+                prix = float(rnd.randrange(5000, 60000, 1000))
+                instant = _instant(rnd, jour).strftime(FORMAT_DATE_HEURE)
+                occasions.append((
+                    f"{rnd.choice(MARQUES)} {rnd.randint(4, 15)}", rnd.choice(MARQUES),
+                    f"35{rnd.randrange(10**13):013d}", jour.strftime(FORMAT_DATE), nom, prenom,
+                    "CNI", f"{rnd.randrange(10**9):09d}", "Alger", "2020-01-01", tel, "",
+                ))
+                mouvements.append((caisses[-1], instant, "SORTIE", prix, "Achat téléphone d'occasion"))
+        cur.executemany("""
+            INSERT INTO occasion_achats
+            (tel_nom, tel_marque, tel_imei, date_achat, vendeur_nom, vendeur_prenom,
+             vendeur_piece_type, vendeur_piece_num, vendeur_piece_lieu, vendeur_piece_date,
+             vendeur_tel, vendeur_adresse)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, occasions)
+        lignes["occasion_achats"] = len(occasions)
+
+        # ---------- DÉPENSES ET MOUVEMENTS DE CAISSE ----------
+        for jour in jours:
+            if rnd.random() < 0.3:
+                mouvements.append((rnd.choice(caisses), _instant(rnd, jour).strftime(FORMAT_DATE_HEURE),
+                                   "SORTIE", float(rnd.randrange(500, 20000, 500)), "Dépense diverse"))
+        mouvements.sort(key=lambda m: m[1])
+        cur.executemany("""
+            INSERT INTO mouvements_caisse (caisse_id, date_mouvement, type, montant, description)
+            VALUES (?, ?, ?, ?, ?)
+        """, mouvements)
+        lignes["mouvements_caisse"] = len(mouvements)
+
+        cur.executemany("""
+            INSERT INTO creances_dettes
+            (ticket_id, client_nom, pc_marque, description,
+             montant_total, montant_paye, montant_restant, date_retrait)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, creances)
+        lignes["creances_dettes"] = len(creances)
+
+    # statistiques à jour pour le planificateur après un chargement massif
+    with db.transaction() as cur:
+        cur.execute("ANALYZE")
+    return lignes
+
+
+def base_de_travail(chemin, volume=VOLUME_DEFAUT):
+    """
+    Ouvre la base chemin et y génère le volume donné si elle ne contient
+    encore aucune vente (une base déjà remplie est réutilisée telle quelle).
+    Retourne (db, durée de la génération en s ou None).
+    """
+    db = Database(chemin)
+    with db.lecture() as cur:
+        existante = cur.execute("SELECT COUNT(*) FROM ventes").fetchone()[0]
+    if existante:
+        print(f"Base existante réutilisée : {chemin}")
+        return db, None
+
+    t0 = time.perf_counter()
+    lignes = generer_magasin(db, **VOLUMES[volume])
+    duree = time.perf_counter() - t0
+    print(f"Historique généré en {duree:.1f} s : "
+          + ", ".join(f"{n} {t}" for t, n in lignes.items()))
+    return db, duree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base", help="fichier SQLite à remplir (créé s'il n'existe pas)")
+    parser.add_argument("--volume", choices=sorted(VOLUMES), default=VOLUME_DEFAUT)
+    for nom in VOLUMES[VOLUME_DEFAUT]:
+        parser.add_argument(f"--{nom.replace('_', '-')}", type=float if nom == "annees" else int,
+                            help="remplace la valeur du volume choisi")
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    volume = dict(VOLUMES[args.volume])
+    for nom in volume:
+        if getattr(args, nom) is not None:
+            volume[nom] = getattr(args, nom)
+
+    db = Database(args.base)
+    t0 = time.perf_counter()
+    lignes = generer_magasin(db, graine=args.graine, **volume)
+    duree = time.perf_counter() - t0
+    db.close()
+
+    for table, nb in lignes.items():
+        print(f"{table:20} {nb:10}")
+    print(f"Généré en {duree:.1f} s dans {args.base}")
+    return lignes
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+# benchmarks/pages_ui.py
+"""
+Chargement des listes des pages Dépôt, Occasion et Historique, temps découpé.
+
+Les pages sont créées contre une base générée (benchmarks.donnees) et leurs
+méthodes de chargement (depot_charger_tickets, charger_achats,
+charger_historique...) sont chronométrées en séparant :
+  - requete    : SQL et lecture des lignes,
+  - widget     : appels au Treeview (insert, delete, item, move...) et,
+                 avec un affichage, le rendu (update_idletasks),
+  - conversion : tout le reste (formatage des lignes, dictionnaires,
+                 comparaison avant mise à jour).
+Chaque chargement est mesuré liste vide (premier affichage) et liste
+pleine (rechargement des mêmes données).
+
+Deux modes :
+  - avec un affichage (DISPLAY, ou xvfb-run sur un serveur) : les pages
+    sont construites pour de bon dans une fenêtre customtkinter,
+  - --factice : sans affichage, les méthodes de chargement tournent sur
+    des pages non construites dont le Treeview est remplacé par
+    ArbreFactice (liste en mémoire) ; le temps widget ne mesure alors que
+    les appels, pas Tk.
+Les requêtes passent par un exécuteur synchrone (pas de thread) pour que
+le découpage soit exact.
+
+Usage :
+    xvfb-run python -m benchmarks.pages_ui [--volume moyen] [--repetitions 5]
+    python -m benchmarks.pages_ui --factice [--base data/bench.db] [--json rapport.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.donnees import VOLUMES, VOLUME_DEFAUT, base_de_travail  # noqa: E402
+
+# Méthodes du Treeview comptées comme temps "widget"
+METHODES_ARBRE = ("insert", "delete", "item", "move", "index", "get_children",
+                  "selection", "selection_set", "yview", "tag_has", "tag_configure",
+                  "configure")
+
+
+class Chrono:
+    """Temps cumulé par section ; une section ouverte dans une autre ne compte pas deux fois."""
+
+    def __init__(self):
+        self.temps = defaultdict(float)
+        self._ouverte = False
+
+    def remettre_a_zero(self):
+        self.temps.clear()
+
+    @contextmanager
+    def section(self, nom):
+        if self._ouverte:
+            yield
+            return
+        self._ouverte = True
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.temps[nom] += time.perf_counter() - t0
+            self._ouverte = False
+
+    def envelopper(self, nom, fonction):
+        def mesuree(*args, **kwargs):
+            with self.section(nom):
+                return fonction(*args, **kwargs)
+        return mesuree
+
+
+class CurseurMesure:
+    """Curseur SQLite dont execute / fetch* comptent comme temps de requête."""
+
+    def __init__(self, curseur, chrono):
+        self._curseur = curseur
+        for nom in ("execute", "executemany", "fetchone", "fetchmany", "fetchall"):
+            setattr(self, nom, chrono.envelopper("requete", getattr(curseur, nom)))
+
+    def __getattr__(self, nom):
+        return getattr(self._curseur, nom)
+
+    def __iter__(self):
+        return iter(self._curseur)
+
+
+class BaseMesuree:
+    """
+    Database vue par les pages : ses méthodes publiques et les curseurs de
+    lecture() / transaction() (requêtes écrites directement par certaines
+    pages) comptent comme temps de requête.
+    """
+
+    def __init__(self, db, chrono):
+        self._db = db
+        self._chrono = chrono
+
+    @contextmanager
+    def lecture(self):
+        with self._db.lecture() as cur:
+            yield CurseurMesure(cur, self._chrono)
+
+    @contextmanager
+    def transaction(self, *tables):
+        with self._db.transaction(*tables) as cur:
+            yield CurseurMesure(cur, self._chrono)
+
+    def __getattr__(self, nom):
+        valeur = getattr(self._db, nom)
+        if callable(valeur) and not nom.startswith("_"):
+            return self._chrono.envelopper("requete", valeur)
+        return valeur
+
+
+class ExecuteurSynchrone:
+    """
+    Même interface qu'ExecuteurDB, mais fonction(db) s'exécute tout de suite
+    sur le thread appelant. Une erreur de lecture interrompt la mesure.
+    """
+
+    def __init__(self, db, chrono):
+        self.db = db
+        self.chrono = chrono
+
+    def soumettre(self, fonction, on_succes, on_erreur=None, cle=None):
+        with self.chrono.section("requete"):
+            resultat = fonction(self.db)
+        on_succes(resultat)
+
+    def annuler(self, cle):
+        pass
+
+    def fermer(self):
+        pass
+
+
+class AppBanc:
+    """Ce que les pages utilisent de l'Application ; le reste ne fait rien."""
+
+    def __init__(self, root, db, chrono):
+        self.root = root
+        self.db = BaseMesuree(db, chrono)
+        self.executeur_db = ExecuteurSynchrone(db, chrono)
+
+    def page_a_relire(self, nom):
+        pass
+
+    def __getattr__(self, nom):
+        # show_accueil, demander_admin... : boutons jamais cliqués ici
+        return lambda *args, **kwargs: None
+
+
+class Valeur:
+    """Remplace tk.StringVar sur les pages factices."""
+
+    def __init__(self, valeur=""):
+        self._valeur = valeur
+
+    def get(self):
+        return self._valeur
+
+    def set(self, valeur):
+        self._valeur = valeur
+
+
+class ArbreFactice:
+    """Treeview à plat en mémoire : le sous-ensemble d'API utilisé par les pages."""
+
+    def __init__(self, colonnes=7):
+        self._colonnes = tuple(f"c{k}" for k in range(colonnes))
+        self._ordre = []
+        self._lignes = {}
+        self._selection = ()
+        self._numero = 0
+
+    def __getitem__(self, option):
+        return self._colonnes if option == "columns" else ""
+
+    def insert(self, parent, index, iid=None, values=(), tags=(), **kw):
+        if iid is None:
+            self._numero += 1
+            iid = f"I{self._numero:03X}"
+        self._lignes[iid] = {"values": tuple(values), "tags": tuple(tags)}
+        if index == "end":
+            self._ordre.append(iid)
+        else:
+            self._ordre.insert(index, iid)
+        return iid
+
+    def delete(self, *items):
+        retirer = set(items)
+        if retirer:
+            self._ordre = [iid for iid in self._ordre if iid not in retirer]
+            for iid in retirer:
+                self._lignes.pop(iid, None)
+
+    def move(self, item, parent, index):
+        self._ordre.remove(item)
+        self._ordre.insert(index, item)
+
+    def index(self, item):
+        return self._ordre.index(item)
+
+    def get_children(self, item=None):
+        return tuple(self._ordre)
+
+    def exists(self, item):
+        return item in self._lignes
+
+    def definir_chargement_suite(self, fonction):
+        # comme TreeviewVirtuel : la page suivante n'est lue qu'au défilement,
+        # seule la première page est donc mesurée
+        self._charger_suite = fonction
+
+    def item(self, item, option=None, **kw):
+        ligne = self._lignes[item]
+        if kw:
+            ligne.update((k, tuple(v)) for k, v in kw.items() if k in ligne)
+            return None
+        return ligne if option is None else ligne[option]
+
+    def tag_has(self, tagname, item=None):
+        return tuple(iid for iid in self._ordre if tagname in self._lignes[iid]["tags"])
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, *items):
+        self._selection = tuple(items[0] if len(items) == 1 and isinstance(items[0], tuple) else items)
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+    def tag_configure(self, *args, **kwargs):
+        pass
+
+    def configure(self, *args, **kwargs):
+        pass
+
+
+# Pages mesurées : attribut du Treeview et état minimal d'une page factice
+PAGES = {
+    "depot": {
+        "arbre": "depot_tickets_tree",
+        "factice": lambda: {"tickets_rows": {}, "depot_filtre_var": Valeur("En cours"),
+                            "depot_tickets_tree": ArbreFactice(6)},
+    },
+    "occasion": {
+        "arbre": "tree",
+        "factice": lambda: {"rows_by_id": {}, "tree": ArbreFactice(7)},
+    },
+    "historique": {
+        "arbre": "tree",
+        "factice": lambda: {"all_items": [], "current_ticket_id": None,
+                            "histo_type_var": Valeur("Réparations"), "tree": ArbreFactice(7)},
+    },
+}
+
+
+def _depot(filtre):
+    def charger(page):
+        page.depot_filtre_var.set(filtre)
+        page.depot_charger_tickets()
+    return charger
+
+
+# nom -> (page, chargement)
+SCENARIOS = {
+    "depot (en cours)": ("depot", _depot("En cours")),
+    "depot (tous)": ("depot", _depot("Tous")),
+    "occasion": ("occasion", lambda page: page.charger_achats()),
+    "historique (réparations)": ("historique", lambda page: page.charger_historique()),
+    "historique (occasions)": ("historique", lambda page: page.charger_historique_occasions()),
+    "historique (ventes)": ("historique", lambda page: page.charger_historique_ventes()),
+}
+
+
+def _classe_page(nom):
+    if nom == "depot":
+        from ui.pages.depot import DepotPage
+        return DepotPage
+    if nom == "occasion":
+        from ui.pages.occasion import OccasionPage
+        return OccasionPage
+    from ui.pages.historique import HistoriquePage
+    return HistoriquePage
+
+
+def _page_factice(nom, app):
+    """Page non construite (pas de Tk) : seuls les attributs lus au chargement."""
+    classe = _classe_page(nom)
+    page = classe.__new__(classe)
+    page.app = app
+    page.db = app.db
+    for attribut, valeur in PAGES[nom]["factice"]().items():
+        setattr(page, attribut, valeur)
+    return page
+
+
+def _page_reelle(nom, app, root, construction):
+    """Page construite dans la fenêtre ; mesure sa construction (chargement initial compris)."""
+    t0 = time.perf_counter()
+    page = _classe_page(nom)(root, app)
+    page.pack(fill="both", expand=True)
+    root.update()
+    construction[nom] = (time.perf_counter() - t0) * 1000
+    page.pack_forget()
+    return page
+
+
+def _instrumenter_arbre(arbre, chrono):
+    """Compte les appels au Treeview comme temps widget (sur l'instance seulement)."""
+    for nom in METHODES_ARBRE:
+        if hasattr(arbre, nom):
+            setattr(arbre, nom, chrono.envelopper("widget", getattr(arbre, nom)))
+
+
+def _vider(arbre):
+    arbre.delete(*arbre.get_children())
+
+
+def _mesurer(page, arbre, charger, chrono, repetitions, root, vider):
+    """Médianes (ms) par section sur repetitions chargements."""
+    sections = defaultdict(list)
+    for _ in range(repetitions):
+        if vider:
+            _vider(arbre)
+        chrono.remettre_a_zero()
+        t0 = time.perf_counter()
+        charger(page)
+        if root is not None:
+            with chrono.section("widget"):
+                root.update_idletasks()
+        total = time.perf_counter() - t0
+        requete, widget = chrono.temps["requete"], chrono.temps["widget"]
+        sections["total"].append(total)
+        sections["requete"].append(requete)
+        sections["widget"].append(widget)
+        sections["conversion"].append(total - requete - widget)
+    mesure = {nom: statistics.median(v) * 1000 for nom, v in sections.items()}
+    mesure["lignes"] = len(arbre.get_children())
+    return mesure
+
+
+def executer(db, repetitions=5, factice=False):
+    """Mesure tous les SCENARIOS sur une base déjà remplie."""
+    chrono = Chrono()
+    root = None
+    construction = {}
+    if not factice:
+        import customtkinter as ctk
+        root = ctk.CTk()
+        root.geometry("1280x800")
+    app = AppBanc(root, db, chrono)
+
+    try:
+        pages = {}
+        resultats = {}
+        for scenario, (nom, charger) in SCENARIOS.items():
+            if nom not in pages:
+                page = (_page_factice(nom, app) if factice
+                        else _page_reelle(nom, app, root, construction))
+                arbre = getattr(page, PAGES[nom]["arbre"])
+                _instrumenter_arbre(arbre, chrono)
+                pages[nom] = page
+            page = pages[nom]
+            arbre = getattr(page, PAGES[nom]["arbre"])
+            if root is not None:
+                # seule la page mesurée est affichée
+                for autre in pages.values():
+                    autre.pack_forget()
+                page.pack(fill="both", expand=True)
+                root.update()
+            resultats[scenario] = {
+                "vide": _mesurer(page, arbre, charger, chrono, repetitions, root, vider=True),
+                "pleine": _mesurer(page, arbre, charger, chrono, repetitions, root, vider=False),
+            }
+    finally:
+        if root is not None:
+            root.destroy()
+
+    return {"mode": "factice" if factice else "affichage",
+            "construction_ms": construction, "scenarios": resultats}
+
+
+def _afficher(resultats):
+    print(f"\n  {'':34} {'liste':7} {'lignes':>7} {'total':>9} {'requête':>9}"
+          f" {'conversion':>11} {'widget':>9}   (ms, médianes)")
+    for scenario, etats in resultats["scenarios"].items():
+        for etat, m in etats.items():
+            print(f"  {scenario:34} {etat:7} {m['lignes']:7} {m['total']:9.2f} {m['requete']:9.2f}"
+                  f" {m['conversion']:11.2f} {m['widget']:9.2f}")
+    for nom, ms in resultats["construction_ms"].items():
+        print(f"  construction de la page {nom} : {ms:.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--volume", choices=sorted(VOLUMES), default=VOLUME_DEFAUT)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--base", help="base de travail conservée (réutilisée si déjà remplie)")
+    parser.add_argument("--factice", action="store_true",
+                        help="sans affichage : Treeview remplacé par une liste en mémoire")
+    parser.add_argument("--json", help="fichier où écrire le rapport")
+    args = parser.parse_args(argv)
+
+    if not args.factice and sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        parser.error("aucun affichage (DISPLAY) : lancer sous xvfb-run ou avec --factice")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = Path(args.base) if args.base else Path(dossier) / "bench.db"
+        db, generation = base_de_travail(chemin, args.volume)
+        try:
+            resultats = executer(db, args.repetitions, factice=args.factice)
+        finally:
+            db.close()
+
+    rapport = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "volume": {"nom": args.volume, **VOLUMES[args.volume]},
+        "generation_s": generation,
+        **resultats,
+    }
+    _afficher(rapport)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+        print(f"\nRapport écrit dans {args.json}")
+    return rapport
+
+
+if __name__ == "__main__":
+    main()
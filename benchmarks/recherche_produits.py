@@ -0,0 +1,127 @@
+# benchmarks/recherche_produits.py
+"""
+Recherche de produits : ancien LIKE '%terme%' contre l'index plein texte FTS5.
+
+Crée un catalogue synthétique (100 000 produits par défaut) dans un dossier
+temporaire puis mesure, pour une série de saisies typiques (nom, marque,
+référence, code-barres, avec ou sans accents), le temps de :
+  - l'ancienne requête LIKE sur nom / reference / code_barres / categorie,
+  - Database.rechercher_produits (FTS5, classement bm25).
+
+Usage :
+    python -m benchmarks.recherche_produits [--produits 100000] [--repetitions 20]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Database  # noqa: E402
+
+TYPES = ["Écran", "Batterie", "Coque", "Chargeur", "Câble", "Vitre trempée",
+         "Connecteur de charge", "Haut-parleur", "Caméra arrière", "Nappe"]
+MARQUES = ["iPhone", "Samsung Galaxy", "Xiaomi Redmi", "Huawei", "Oppo",
+           "Nokia", "Realme", "Tecno", "Infinix", "Condor"]
+CATEGORIES = ["Pièces", "Accessoires", "Téléphones", "Réparation", "Énergie"]
+
+SAISIES = ["ecran", "Écran samsung", "batterie iphone 12", "câble", "xiaomi",
+           "REF-0421", "3760000012345", "coque oppo a5", "zzz-introuvable"]
+
+LIKE_SQL = """
+    SELECT * FROM produits
+    WHERE actif = 1
+      AND (nom LIKE ? OR reference LIKE ? OR code_barres LIKE ? OR categorie LIKE ?)
+    ORDER BY nom
+"""
+
+
+def creer_catalogue(db, nb):
+    rnd = random.Random(42)
+    lignes = []
+    for i in range(nb):
+        nom = f"{rnd.choice(TYPES)} {rnd.choice(MARQUES)} {rnd.randint(1, 60)}"
+        lignes.append((
+            f"37600{i:08d}",
+            f"REF-{i:04d}",
+            nom,
+            rnd.choice(CATEGORIES),
+            rnd.uniform(100, 5000),
+            rnd.uniform(150, 8000),
+            rnd.randint(0, 50),
+            1 if rnd.random() > 0.05 else 0,
+        ))
+    # un seul commit : les triggers alimentent produits_fts au passage
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO produits
+            (code_barres, reference, nom, categorie, description,
+             prix_achat, prix_vente, quantite, seuil_alerte, actif)
+            VALUES (?, ?, ?, ?, '', ?, ?, ?, 2, ?)
+        """, lignes)
+
+
+def _lire_like(db, like):
+    with db.lecture() as cur:
+        return cur.execute(LIKE_SQL, (like, like, like, like)).fetchall()
+
+
+def chronometrer(fonction, repetitions):
+    durees = []
+    resultat = None
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        resultat = fonction()
+        durees.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(durees), resultat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--produits", type=int, default=100_000)
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        db = Database(Path(dossier) / "bench.db")
+        if not db.recherche_fts:
+            print("SQLite sans FTS5 : rien à comparer.")
+            return None
+
+        t0 = time.perf_counter()
+        creer_catalogue(db, args.produits)
+        duree_import = time.perf_counter() - t0
+
+        print(f"Catalogue : {args.produits} produits (import + index FTS : {duree_import:.1f} s)")
+        print(f"Médiane sur {args.repetitions} répétitions, en ms")
+        print(f"{'saisie':24} {'LIKE':>8} {'nb':>7} {'FTS5':>8} {'nb':>7} {'gain':>7}")
+
+        resultats = []
+        for saisie in SAISIES:
+            like = f"%{saisie}%"
+            t_like, lignes_like = chronometrer(
+                lambda: _lire_like(db, like),
+                args.repetitions,
+            )
+            t_fts, lignes_fts = chronometrer(
+                lambda: db.rechercher_produits(saisie, uniquement_actifs=True),
+                args.repetitions,
+            )
+            gain = t_like / t_fts if t_fts else float("inf")
+            print(f"{saisie:24} {t_like:8.2f} {len(lignes_like):7} "
+                  f"{t_fts:8.2f} {len(lignes_fts):7} {gain:6.1f}x")
+            resultats.append({
+                "saisie": saisie,
+                "like_ms": t_like, "like_nb": len(lignes_like),
+                "fts_ms": t_fts, "fts_nb": len(lignes_fts),
+            })
+        db.close()
+    return resultats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/scan_code_barres.py
+"""
+Scan code-barres à la caisse : requête SQLite contre cache en mémoire.
+
+Crée un catalogue synthétique (100 000 produits par défaut) puis mesure la
+durée de Database.rechercher_produit_par_code pour une série de scans
+(codes existants, plus quelques codes inconnus) :
+  - sans cache (une requête par scan),
+  - avec le cache chargé par charger_cache_codes(), ventes comprises
+    (le stock en cache suit les sorties).
+
+Usage :
+    python -m benchmarks.scan_code_barres [--produits 100000] [--scans 20000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Database  # noqa: E402
+from benchmarks.commit_latency import _percentile  # noqa: E402
+
+
+def creer_catalogue(db, nb):
+    with db.transaction() as cur:
+        cur.executemany("""
+            INSERT INTO produits
+            (code_barres, reference, nom, categorie, description,
+             prix_achat, prix_vente, quantite, seuil_alerte, actif)
+            VALUES (?, ?, ?, 'Bench', '', 100, 150, 1000000, 2, 1)
+        """, [(f"37600{i:08d}", f"REF-{i:05d}", f"Produit {i}") for i in range(nb)])
+
+
+def mesurer(db, codes):
+    durees = []
+    for code in codes:
+        t0 = time.perf_counter()
+        db.rechercher_produit_par_code(code)
+        durees.append((time.perf_counter() - t0) * 1_000_000)
+    return {
+        "mediane_us": _percentile(durees, 50),
+        "p99_us": _percentile(durees, 99),
+        "max_us": max(durees),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--produits", type=int, default=100_000)
+    parser.add_argument("--scans", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(42)
+    codes = [f"37600{rnd.randrange(args.produits):08d}" if rnd.random() > 0.01
+             else f"INCONNU{i}" for i in range(args.scans)]
+
+    with tempfile.TemporaryDirectory() as dossier:
+        db = Database(Path(dossier) / "bench.db")
+        creer_catalogue(db, args.produits)
+
+        sql = mesurer(db, codes)
+
+        t0 = time.perf_counter()
+        nb_codes = db.charger_cache_codes()
+        duree_chargement = (time.perf_counter() - t0) * 1000
+
+        # quelques ventes pour vérifier que le cache suit le stock
+        caisse_id = db.get_caisses()[0]["id"]
+        produit = db.rechercher_produit_par_code(codes[0])
+        db.encaisser_vente(caisse_id, [{"produit_id": produit[0], "quantite": 3,
+                                        "prix_unitaire": 150.0, "sous_total": 450.0}],
+                           "ESPECES", 450.0, 0.0)
+        assert db.rechercher_produit_par_code(codes[0])[3] == produit[3] - 3
+
+        cache = mesurer(db, codes)
+        stats = db.stats_cache_codes()
+        db.close()
+
+    print(f"Catalogue : {args.produits} produits, {args.scans} scans "
+          f"(cache : {nb_codes} codes chargés en {duree_chargement:.0f} ms)")
+    print(f"{'mode':8} {'médiane':>9} {'p99':>9} {'max':>9}   (µs)")
+    for nom, r in (("SQL", sql), ("cache", cache)):
+        print(f"{nom:8} {r['mediane_us']:9.1f} {r['p99_us']:9.1f} {r['max_us']:9.1f}")
+    print(f"hits={stats['hits']} misses={stats['misses']} "
+          f"invalidations={stats['invalidations']} "
+          f"moyenne={stats['duree_moyenne_ms']:.4f} ms max={stats['duree_max_ms']:.3f} ms")
+    return {"sql": sql, "cache": cache, "stats": stats}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# benchmarks/suite_database.py
+"""
+Mesure de toutes les méthodes publiques de Database sur un historique réaliste.
+
+Génère un magasin synthétique (benchmarks.donnees) dans une base de travail,
+puis chronomètre :
+  - chaque méthode publique de Database (lectures, puis écritures sur la
+    base de travail),
+  - les lectures faites par chaque page de l'interface à son affichage.
+Les méthodes publiques sans mesure sont listées dans le rapport : une
+nouvelle méthode ne passe pas inaperçue.
+
+Le rapport JSON (--json) peut être comparé à celui d'une version
+précédente (--comparer) : les mesures plus lentes de plus de
+SEUIL_REGRESSION sont signalées.
+
+Usage :
+    python -m benchmarks.suite_database [--volume moyen] [--repetitions 5]
+        [--base data/bench.db] [--json rapport.json] [--comparer ancien.json]
+"""
+import argparse
+import inspect
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database import Database, FORMAT_DATE, TAILLE_PAGE  # noqa: E402
+from benchmarks.donnees import VOLUMES, VOLUME_DEFAUT, base_de_travail  # noqa: E402
+
+# Plus lent d'au moins 25 % que la mesure de référence : régression signalée
+SEUIL_REGRESSION = 1.25
+
+# Méthodes publiques volontairement non mesurées
+NON_MESUREES = {
+    "close": "ferme la connexion de la suite",
+    "transaction": "gestionnaire de contexte, mesuré à travers les écritures",
+    "lecture": "gestionnaire de contexte, mesuré à travers les lectures",
+}
+
+
+def _contexte(db):
+    """Identifiants tirés de la base générée, utilisés comme arguments."""
+    def valeur(sql):
+        with db.lecture() as cur:
+            ligne = cur.execute(sql).fetchone()
+        return ligne[0] if ligne else None
+
+    fin = datetime.now()
+    return {
+        "caisse_id": db.get_caisses()[0]["id"],
+        "ticket_id": valeur("SELECT MAX(id) FROM tickets_reparation"),
+        "ticket_en_cours": valeur("SELECT MAX(id) FROM tickets_reparation WHERE statut = 'En cours'"),
+        "vente_id": valeur("SELECT MAX(id) FROM ventes"),
+        "produit_id": valeur("SELECT MIN(id) FROM produits WHERE actif = 1"),
+        "code_barres": valeur("SELECT code_barres FROM produits WHERE actif = 1 ORDER BY id LIMIT 1"),
+        "creance_id": valeur("SELECT MAX(id) FROM creances_dettes"),
+        "debut_mois": (fin - timedelta(days=30)).strftime(FORMAT_DATE),
+        "debut_annee": (fin - timedelta(days=365)).strftime(FORMAT_DATE),
+        "aujourdhui": fin.strftime(FORMAT_DATE),
+        # jours clôturés successivement par cloturer_journee
+        "jours_cloture": [(fin - timedelta(days=k)).strftime(FORMAT_DATE) for k in range(60, 0, -1)],
+    }
+
+
+def _ligne_vente(ctx):
+    return [{"produit_id": ctx["produit_id"], "quantite": 1,
+             "prix_unitaire": 100.0, "sous_total": 100.0}]
+
+
+def _nouveau_produit(db, ctx):
+    return db.ajouter_produit(nom="Produit bench", prix_vente=10.0)
+
+
+# (méthode, appel(db, ctx)) : une méthode peut avoir plusieurs mesures.
+# Les lectures d'abord, les écritures ensuite (elles modifient la base).
+LECTURES = [
+    ("get_clients", lambda db, c: db.get_clients()),
+    ("get_tickets", lambda db, c: db.get_tickets()),
+    ("get_tickets", lambda db, c: db.get_tickets(statut="En cours")),
+    ("get_tickets", lambda db, c: db.get_tickets(limite=TAILLE_PAGE)),
+    ("get_ticket_by_id", lambda db, c: db.get_ticket_by_id(c["ticket_id"])),
+    ("get_creances", lambda db, c: db.get_creances()),
+    ("get_creances", lambda db, c: db.get_creances(limite=TAILLE_PAGE)),
+    ("get_produits", lambda db, c: db.get_produits()),
+    ("get_produits", lambda db, c: db.get_produits(uniquement_actifs=False, limite=TAILLE_PAGE)),
+    ("rechercher_produits", lambda db, c: db.rechercher_produits("ecran samsung")),
+    ("rechercher_produits", lambda db, c: db.rechercher_produits("phone", limite=TAILLE_PAGE)),
+    ("rechercher_produit_par_code", lambda db, c: db.rechercher_produit_par_code(c["code_barres"])),
+    ("produits_stock_bas", lambda db, c: db.produits_stock_bas()),
+    ("prevision_reassort", lambda db, c: db.prevision_reassort()),
+    ("get_ventes", lambda db, c: db.get_ventes(c["debut_mois"], c["aujourdhui"])),
+    ("get_ventes", lambda db, c: db.get_ventes(limite=TAILLE_PAGE)),
+    ("get_ventes_resume", lambda db, c: db.get_ventes_resume()),
+    ("get_ventes_resume", lambda db, c: db.get_ventes_resume(limite=TAILLE_PAGE)),
+    ("get_details_vente", lambda db, c: db.get_details_vente(c["vente_id"])),
+    ("get_totaux_ventes", lambda db, c: db.get_totaux_ventes("jour", c["debut_mois"], c["aujourdhui"])),
+    ("get_totaux_ventes", lambda db, c: db.get_totaux_ventes("mois", par="caisse")),
+    ("get_totaux_ventes", lambda db, c: db.get_totaux_ventes("semaine", c["debut_annee"],
+                                                             c["aujourdhui"], par="mode_paiement")),
+    ("get_caisses", lambda db, c: db.get_caisses()),
+    ("get_solde_caisse", lambda db, c: db.get_solde_caisse(c["caisse_id"])),
+    ("get_soldes_caisses", lambda db, c: db.get_soldes_caisses()),
+    ("get_mouvements_caisse", lambda db, c: db.get_mouvements_caisse(c["caisse_id"])),
+    ("get_mouvements_caisse", lambda db, c: db.get_mouvements_caisse(c["caisse_id"], limite=TAILLE_PAGE)),
+    ("get_mouvements_caisse", lambda db, c: db.get_mouvements_caisse(
+        date_debut=c["debut_mois"], date_fin=c["aujourdhui"])),
+    ("get_resume_caisse", lambda db, c: db.get_resume_caisse(c["caisse_id"], c["debut_mois"], c["aujourdhui"])),
+    ("get_clotures", lambda db, c: db.get_clotures()),
+    ("get_derniere_cloture", lambda db, c: db.get_derniere_cloture(c["caisse_id"])),
+    ("get_cloture", lambda db, c: db.get_cloture(1)),
+    ("reconcilier_soldes_caisses", lambda db, c: db.reconcilier_soldes_caisses()),
+    ("get_version_schema", lambda db, c: db.get_version_schema()),
+    ("get_pragmas", lambda db, c: db.get_pragmas()),
+    ("get_index_existants", lambda db, c: db.get_index_existants()),
+    ("verifier_index", lambda db, c: db.verifier_index()),
+    ("rapport_index", lambda db, c: db.rapport_index()),
+    ("stats_cache_codes", lambda db, c: db.stats_cache_codes()),
+    ("generation", lambda db, c: db.generation("produits", "ventes")),
+]
+
+ECRITURES = [
+    ("ajouter_client", lambda db, c: db.ajouter_client("Bench", "Client", "0555000000")),
+    ("ajouter_ticket_depot", lambda db, c: db.ajouter_ticket_depot(
+        "Client bench", "Samsung Galaxy", c["aujourdhui"], "Écran cassé")),
+    ("enregistrer_reception_pc", lambda db, c: db.enregistrer_reception_pc(
+        db.ajouter_ticket_depot("Client bench", "Oppo", c["aujourdhui"]),
+        "Écran remplacé", 5000.0, 3000.0)),
+    ("ajouter_creance", lambda db, c: db.ajouter_creance(
+        "Client bench", "Nokia", "Bench", 1000.0, 400.0, 600.0, c["aujourdhui"])),
+    ("mettre_a_jour_creance", lambda db, c: db.mettre_a_jour_creance(c["creance_id"], 500.0, 0.0)),
+    ("supprimer_creance", lambda db, c: db.supprimer_creance(db.ajouter_creance(
+        "Client bench", "Nokia", "Bench", 10.0, 10.0, 0.0, c["aujourdhui"]))),
+    ("ajouter_produit", lambda db, c: _nouveau_produit(db, c)),
+    ("modifier_produit", lambda db, c: db.modifier_produit(c["produit_id"], prix_vente=150.0)),
+    ("modifier_stock", lambda db, c: db.modifier_stock(c["produit_id"], 5)),
+    ("supprimer_produit", lambda db, c: db.supprimer_produit(_nouveau_produit(db, c))),
+    ("enregistrer_vente_comptoir", lambda db, c: db.enregistrer_vente_comptoir(
+        c["caisse_id"], _ligne_vente(c), "ESPECES", 100.0, 0.0)),
+    ("encaisser_vente", lambda db, c: db.encaisser_vente(
+        c["caisse_id"], _ligne_vente(c), "ESPECES", 100.0, 0.0)),
+    ("encaisser_vente", lambda db, c: db.encaisser_vente(
+        c["caisse_id"], _ligne_vente(c) * 3, "ESPECES", 100.0, 0.0, "Client bench")),
+    ("ajouter_mouvement_caisse", lambda db, c: db.ajouter_mouvement_caisse(
+        c["caisse_id"], "ENTREE", 100.0, "Bench")),
+    ("supprimer_mouvement_caisse", lambda db, c: db.supprimer_mouvement_caisse(
+        db.ajouter_mouvement_caisse(c["caisse_id"], "SORTIE", 1.0, "Bench"))),
+    ("ajouter_caisse", lambda db, c: db.ajouter_caisse(f"Caisse bench {time.perf_counter_ns()}")),
+    ("initialiser_caisses", lambda db, c: db.initialiser_caisses()),
+    ("cloturer_journee", lambda db, c: db.cloturer_journee(c["jours_cloture"].pop(0))),
+    ("charger_cache_codes", lambda db, c: db.charger_cache_codes()),
+    # même recherche qu'en lecture, cache des codes chargé cette fois
+    ("rechercher_produit_par_code", lambda db, c: db.rechercher_produit_par_code(c["code_barres"])),
+    ("reconstruire_ventes_jour", lambda db, c: db.reconstruire_ventes_jour()),
+    ("maintenir_index", lambda db, c: db.maintenir_index()),
+    ("create_tables", lambda db, c: db.create_tables()),
+    ("appliquer_migrations", lambda db, c: db.appliquer_migrations()),
+    ("appliquer_profil", lambda db, c: db.appliquer_profil(db.profil_connexion)),
+]
+
+
+def _lire(db, sql):
+    with db.lecture() as cur:
+        cur.execute(sql)
+        return cur.fetchall()
+
+
+# Lectures faites par chaque page à son affichage (show_* de ui/app.py)
+CHARGEMENTS_PAGES = {
+    "depot": lambda db, c: db.get_tickets(statut="En cours"),
+    "historique (réparations)": lambda db, c: _lire(
+        db, "SELECT * FROM tickets_reparation ORDER BY date_depot DESC, id DESC"),
+    "historique (occasions)": lambda db, c: _lire(
+        db, "SELECT * FROM occasion_achats ORDER BY date_achat DESC, id DESC"),
+    "historique (ventes)": lambda db, c: db.get_ventes_resume(),
+    "caisses": lambda db, c: (db.get_soldes_caisses(),
+                              db.get_mouvements_caisse(c["caisse_id"], limite=TAILLE_PAGE)),
+    "reception": lambda db, c: (db.get_caisses(), db.get_tickets(statut="En cours")),
+    "creances": lambda db, c: db.get_creances(),
+    "produits": lambda db, c: db.get_produits(limite=TAILLE_PAGE),
+    "vente": lambda db, c: (db.get_produits(), db.get_caisses()),
+    "occasion": lambda db, c: _lire(db, "SELECT * FROM occasion_achats ORDER BY id DESC"),
+}
+
+
+def chronometrer(fonction, repetitions):
+    """Durées de repetitions appels (ms) : médiane, min, max."""
+    durees = []
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - t0) * 1000)
+    return {
+        "mediane_ms": statistics.median(durees),
+        "min_ms": min(durees),
+        "max_ms": max(durees),
+        "repetitions": repetitions,
+    }
+
+
+def _mesurer(cas, db, ctx, repetitions):
+    """{nom: mesure} ; une méthode mesurée plusieurs fois est numérotée (nom#2...)."""
+    resultats = {}
+    for methode, appel in cas:
+        nom = methode
+        k = 2
+        while nom in resultats:
+            nom, k = f"{methode}#{k}", k + 1
+        resultats[nom] = chronometrer(lambda: appel(db, ctx), repetitions)
+    return resultats
+
+
+def methodes_publiques():
+    return sorted(nom for nom, _f in inspect.getmembers(Database, inspect.isfunction)
+                  if not nom.startswith("_"))
+
+
+def executer(db, repetitions=5):
+    """Toutes les mesures sur une base déjà remplie (voir generer_magasin)."""
+    ctx = _contexte(db)
+    pages = {nom: chronometrer(lambda f=f: f(db, ctx), repetitions)
+             for nom, f in CHARGEMENTS_PAGES.items()}
+    lectures = _mesurer(LECTURES, db, ctx, repetitions)
+    ecritures = _mesurer(ECRITURES, db, ctx, repetitions)
+
+    mesurees = {m for m, _a in LECTURES + ECRITURES}
+    return {
+        "pages": pages,
+        "lectures": lectures,
+        "ecritures": ecritures,
+        "non_mesurees": [m for m in methodes_publiques()
+                         if m not in mesurees and m not in NON_MESUREES],
+    }
+
+
+def comparer(rapport, reference, seuil=SEUIL_REGRESSION):
+    """Mesures plus lentes que dans reference : [(section, nom, avant_ms, apres_ms)]."""
+    regressions = []
+    for section in ("pages", "lectures", "ecritures"):
+        for nom, mesure in rapport.get(section, {}).items():
+            avant = reference.get(section, {}).get(nom)
+            if not avant:
+                continue
+            # en dessous de 0,05 ms, l'écart est du bruit de mesure
+            if mesure["mediane_ms"] > max(avant["mediane_ms"] * seuil, avant["mediane_ms"] + 0.05):
+                regressions.append((section, nom, avant["mediane_ms"], mesure["mediane_ms"]))
+    return regressions
+
+
+def _afficher(titre, mesures):
+    print(f"\n{titre}")
+    print(f"  {'':40} {'médiane':>9} {'min':>9} {'max':>9}   (ms)")
+    for nom, m in mesures.items():
+        print(f"  {nom:40} {m['mediane_ms']:9.2f} {m['min_ms']:9.2f} {m['max_ms']:9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--volume", choices=sorted(VOLUMES), default=VOLUME_DEFAUT)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--base", help="base de travail conservée (réutilisée si déjà remplie)")
+    parser.add_argument("--json", help="fichier où écrire le rapport")
+    parser.add_argument("--comparer", help="rapport JSON d'une version précédente")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = Path(args.base) if args.base else Path(dossier) / "bench.db"
+        db, generation = base_de_travail(chemin, args.volume)
+        mesures = executer(db, args.repetitions)
+        tables = {}
+        for table in ("clients", "produits", "ventes", "details_ventes", "tickets_reparation",
+                      "mouvements_caisse", "creances_dettes", "occasion_achats"):
+            with db.lecture() as cur:
+                tables[table] = cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        rapport = {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "version_schema": db.get_version_schema(),
+            "profil": db.profil_connexion,
+            "volume": {"nom": args.volume, **VOLUMES[args.volume]},
+            "lignes": tables,
+            "generation_s": generation,
+            **mesures,
+        }
+        db.close()
+
+    _afficher("Chargement des pages", rapport["pages"])
+    _afficher("Lectures", rapport["lectures"])
+    _afficher("Écritures", rapport["ecritures"])
+    if rapport["non_mesurees"]:
+        print(f"\nMéthodes publiques sans mesure : {', '.join(rapport['non_mesurees'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+        print(f"\nRapport écrit dans {args.json}")
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+        regressions = comparer(rapport, reference)
+        print(f"\nComparaison avec {args.comparer} ({reference.get('date', '?')}) :")
+        if not regressions:
+            print("  aucune régression")
+        for section, nom, avant, apres in regressions:
+            print(f"  {section}/{nom} : {avant:.2f} -> {apres:.2f} ms (x{apres / avant:.2f})")
+
+    return rapport
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
+import math
 import os
+import re
 import sys
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Dossier du fichier database.py (dans le projet ou dans le bundle PyInstaller)
@@ -50,182 +55,1185 @@ def _get_default_db_path() -> Path:
 DEFAULT_DB_PATH = _get_default_db_path()
 
 
+# Format de stockage des dates : ISO, triable comme du texte.
+FORMAT_DATE = "%Y-%m-%d"
+FORMAT_DATE_HEURE = "%Y-%m-%d %H:%M:%S"
+
+# Formats reconnus en saisie : (format, contient une heure ?)
+_FORMATS_DATE_SAISIE = (
+    ("%Y-%m-%d %H:%M:%S", True),
+    ("%Y-%m-%d %H:%M", True),
+    ("%Y-%m-%d", False),
+    ("%d/%m/%Y %H:%M:%S", True),
+    ("%d/%m/%Y %H:%M", True),
+    ("%d/%m/%Y", False),
+    ("%d-%m-%Y", False),
+)
+
+
+def date_vers_iso(valeur):
+    """
+    Convertit une date saisie ("01/12/2025", "01/12/2025 10:30", "2025-12-01"...)
+    au format de stockage : "2025-12-01" ou "2025-12-01 10:30:00".
+    Une valeur vide ou non reconnue est retournée telle quelle.
+    """
+    if not valeur:
+        return valeur
+    texte = str(valeur).strip()
+    for fmt, avec_heure in _FORMATS_DATE_SAISIE:
+        try:
+            dt = datetime.strptime(texte, fmt)
+        except ValueError:
+            continue
+        return dt.strftime(FORMAT_DATE_HEURE if avec_heure else FORMAT_DATE)
+    return texte
+
+
+def _bornes_periode(date_debut, date_fin):
+    """
+    Retourne (debut, fin_exclue) au format ISO pour filtrer une colonne
+    date / date-heure avec "col >= debut AND col < fin_exclue".
+    """
+    debut = str(date_vers_iso(date_debut))[:10]
+    fin = datetime.strptime(str(date_vers_iso(date_fin))[:10], FORMAT_DATE) + timedelta(days=1)
+    return debut, fin.strftime(FORMAT_DATE)
+
+
+def _jour_suivant(jour):
+    """"2025-12-01" -> "2025-12-02"."""
+    return (datetime.strptime(jour, FORMAT_DATE) + timedelta(days=1)).strftime(FORMAT_DATE)
+
+
+def _lignes_caisse(table, colonne_date, colonnes, caisse_id, debut, fin_exclue,
+                   precedente=None, cle_precedente=None, plafond=None):
+    """
+    (sql, params) : SELECT colonnes des lignes de table (mouvements_caisse ou
+    ventes) d'une caisse, datées >= debut (None = depuis l'origine) et < fin_exclue.
+    - precedente : clôture dont les lignes sont exclues, car déjà comptées
+      (id <= precedente[cle_precedente] et datées jusqu'à son jour). Les
+      lignes saisies après elle pour un jour déjà clôturé restent comptées.
+    - plafond : identifiant maximal compté (None = pas de limite).
+    """
+    def requete(conditions, params):
+        if plafond is not None:
+            conditions = conditions + ["id <= ?"]
+            params = params + [plafond]
+        return f"SELECT {colonnes} FROM {table} WHERE {' AND '.join(conditions)}", params
+
+    if precedente is None:
+        conditions = ["caisse_id = ?", f"{colonne_date} < ?"]
+        params = [caisse_id, fin_exclue]
+        if debut:
+            conditions.append(f"{colonne_date} >= ?")
+            params.append(debut)
+        return requete(conditions, params)
+
+    fin_precedente = _jour_suivant(precedente["date_cloture"])
+    sql, params = requete(
+        ["caisse_id = ?", f"{colonne_date} >= ?", f"{colonne_date} < ?"],
+        [caisse_id, max(debut or fin_precedente, fin_precedente), fin_exclue],
+    )
+    # Saisies après coup pour un jour déjà clôturé : lues à partir de l'id
+    # (clé primaire) ; le "+" empêche SQLite de parcourir plutôt l'index
+    # par date, qui lirait tout l'historique de la caisse.
+    conditions = ["id > ?", "+caisse_id = ?", f"+{colonne_date} < ?"]
+    params_retard = [precedente[cle_precedente], caisse_id, min(fin_precedente, fin_exclue)]
+    if debut:
+        conditions.append(f"+{colonne_date} >= ?")
+        params_retard.append(debut)
+    sql_retard, params_retard = requete(conditions, params_retard)
+    return f"{sql} UNION ALL {sql_retard}", params + params_retard
+
+
+# Taille de page conseillée pour les listes affichées (lignes les plus récentes)
+TAILLE_PAGE = 200
+
+
+def _lire_liste(cur, select, conditions, params, tri,
+                decroissant=True, limite=None, apres=None):
+    """
+    Exécute "select WHERE conditions ORDER BY tri" avec pagination par curseur
+    (keyset) : la page suivante repart de la dernière ligne vue au lieu
+    d'utiliser OFFSET, ce qui reste rapide quelle que soit la profondeur.
+
+    - tri : colonnes de tri, la dernière doit être unique (ex. ("date_depot", "id")).
+    - limite None : retourne toutes les lignes (comportement historique).
+    - limite N    : retourne (lignes, curseur_suivant) ; curseur_suivant est le
+      tuple des valeurs de tri de la dernière ligne, à repasser dans apres=,
+      ou None s'il n'y a plus de ligne après cette page.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if apres is not None:
+        colonnes = ", ".join(tri)
+        marques = ", ".join("?" * len(tri))
+        conditions.append(f"({colonnes}) {'<' if decroissant else '>'} ({marques})")
+        params.extend(apres)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    ordre = ", ".join(f"{c} {'DESC' if decroissant else 'ASC'}" for c in tri)
+    sql = f"{select} {where} ORDER BY {ordre}"
+
+    if limite is None:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+    limite = int(limite)
+    cur.execute(f"{sql} LIMIT ?", params + [limite + 1])
+    lignes = cur.fetchall()
+    if len(lignes) <= limite:
+        return lignes, None
+    lignes = lignes[:limite]
+    # "v.date_heure" -> colonne "date_heure" de la ligne
+    suivant = tuple(lignes[-1][c.split(".")[-1]] for c in tri)
+    return lignes, suivant
+
+
+# Prévision de réassort (prevision_reassort) : jours de ventes observés,
+# délai de livraison fournisseur et jours de stock visés après commande.
+REASSORT_JOURS_HISTORIQUE = 30
+REASSORT_DELAI_LIVRAISON = 3
+REASSORT_JOURS_COUVERTURE = 14
+
+
+# Recherche plein texte des produits (FTS5) : poids bm25 par colonne,
+# dans l'ordre nom, reference, code_barres, categorie.
+POIDS_RECHERCHE_PRODUITS = (10.0, 4.0, 4.0, 1.0)
+
+
+def _expression_fts(terme):
+    """
+    Transforme une saisie libre en requête FTS5 : chaque mot devient un
+    préfixe obligatoire ("ecr iph" -> "ecr"* "iph"*).
+    Retourne None si la saisie ne contient aucun mot.
+    """
+    mots = re.findall(r"\w+", str(terme or ""))
+    if not mots:
+        return None
+    return " ".join(f'"{mot}"*' for mot in mots)
+
+
+# Profils de connexion SQLite : PRAGMA appliqués à l'ouverture de la base.
+# Le profil est choisi dans settings.json ("db_profil"), chaque PRAGMA
+# pouvant être surchargé individuellement ("db_pragmas").
+PROFILS_CONNEXION = {
+    # Réglages d'origine de SQLite : journal de rollback, fsync à chaque commit
+    "classique": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    # WAL : les lectures ne bloquent plus les écritures, commit sans fsync
+    # du fichier principal (sûr en WAL, seul le dernier commit peut être
+    # perdu en cas de coupure de courant)
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # en Kio (valeur négative) : ~16 Mo
+        "mmap_size": 268435456,     # 256 Mo lus via mmap
+        "temp_store": "MEMORY",     # tris / tables temporaires en mémoire
+        "busy_timeout": 5000,       # ms d'attente si la base est verrouillée
+    },
+}
+PROFIL_CONNEXION_DEFAUT = "wal"
+
+# PRAGMA réglables (les noms sont insérés tels quels dans la requête)
+_PRAGMAS_AUTORISES = {
+    "journal_mode", "synchronous", "cache_size",
+    "mmap_size", "temp_store", "busy_timeout",
+}
+
+
+def _pragma_valide(nom, valeur):
+    """Vrai si nom est réglable et valeur un entier ou un mot-clé (WAL, NORMAL...)."""
+    if nom not in _PRAGMAS_AUTORISES or isinstance(valeur, bool):
+        return False
+    return isinstance(valeur, int) or (isinstance(valeur, str) and valeur.isalpha())
+
+
+# Index secondaires attendus : nom -> (table, colonnes).
+# Après modification de cette liste, ajouter une migration qui crée / supprime
+# les index concernés (instructions écrites en dur, voir _migration_2_index).
+# Au démarrage, create_tables() aligne la base sur cette liste (_aligner_index) :
+# les index manquants sont créés, les anciens "idx_*" retirés.
+INDEX = {
+    # get_tickets(statut=...) : filtre + tri sans passer par une table temporaire
+    "idx_tickets_statut_date": ("tickets_reparation", "statut, date_depot, id"),
+    # get_mouvements_caisse(caisse_id) et reconcilier_soldes_caisses
+    "idx_mouvements_caisse_date": ("mouvements_caisse", "caisse_id, date_mouvement, id"),
+    # get_details_vente(vente_id)
+    "idx_details_ventes_vente": ("details_ventes", "vente_id"),
+    # rechercher_produit_par_code (scanner code-barres)
+    "idx_produits_code_barres": ("produits", "code_barres, actif"),
+    # get_produits(uniquement_actifs=True) trié par nom
+    "idx_produits_actif_nom": ("produits", "actif, nom"),
+    # créances d'un client / liste triée par date
+    "idx_creances_client": ("creances_dettes", "client_nom"),
+    "idx_creances_date": ("creances_dettes", "date_retrait, id"),
+    # get_ventes trié / filtré par date
+    "idx_ventes_date_heure": ("ventes", "date_heure"),
+    # pages sans filtre (keyset sur date + id / nom + id)
+    "idx_tickets_date": ("tickets_reparation", "date_depot, id"),
+    "idx_mouvements_date": ("mouvements_caisse", "date_mouvement, id"),
+    "idx_produits_nom": ("produits", "nom"),
+    # nombre de ventes d'une caisse sur une période (clôtures / rapport Z)
+    "idx_ventes_caisse_date": ("ventes", "caisse_id, date_heure"),
+}
+
+# Requêtes "chaudes" vérifiées par Database.rapport_index() (EXPLAIN QUERY PLAN).
+REQUETES_CHAUDES = {
+    "get_tickets(statut)": (
+        "SELECT * FROM tickets_reparation WHERE statut = ? "
+        "ORDER BY date_depot DESC, id DESC",
+        ("En cours",),
+    ),
+    "get_mouvements_caisse(caisse_id)": (
+        "SELECT * FROM mouvements_caisse WHERE caisse_id = ? "
+        "ORDER BY date_mouvement DESC, id DESC",
+        (1,),
+    ),
+    "get_totaux_ventes": (
+        "SELECT jour, SUM(montant_total) FROM ventes_jour "
+        "WHERE jour >= ? AND jour < ? GROUP BY jour",
+        ("2025-12-01", "2026-01-01"),
+    ),
+    "get_solde_caisse": (
+        "SELECT solde FROM soldes_caisses WHERE caisse_id = ?",
+        (1,),
+    ),
+    "get_details_vente": (
+        "SELECT * FROM details_ventes WHERE vente_id = ?",
+        (1,),
+    ),
+    "rechercher_produit_par_code": (
+        "SELECT id FROM produits WHERE code_barres = ? AND actif = 1",
+        ("0000000000000",),
+    ),
+    "get_produits(actifs)": (
+        "SELECT * FROM produits WHERE actif = 1 ORDER BY nom",
+        (),
+    ),
+    "get_creances": (
+        "SELECT * FROM creances_dettes ORDER BY date_retrait DESC, id DESC",
+        (),
+    ),
+    "get_tickets(page suivante)": (
+        "SELECT * FROM tickets_reparation WHERE (date_depot, id) < (?, ?) "
+        "ORDER BY date_depot DESC, id DESC LIMIT 201",
+        ("2025-12-01", 1),
+    ),
+    "get_mouvements_caisse(page suivante)": (
+        "SELECT * FROM mouvements_caisse WHERE (date_mouvement, id) < (?, ?) "
+        "ORDER BY date_mouvement DESC, id DESC LIMIT 201",
+        ("2025-12-01 00:00:00", 1),
+    ),
+    "get_produits(tous, page suivante)": (
+        "SELECT * FROM produits WHERE (nom, id) > (?, ?) ORDER BY nom, id LIMIT 201",
+        ("", 0),
+    ),
+}
+
+
+# ============================================================
+# MIGRATIONS DU SCHÉMA (PRAGMA user_version)
+# ============================================================
+#
+# Chaque migration est une fonction qui reçoit un curseur et applique ses
+# modifications. Elles sont exécutées une seule fois, dans l'ordre, à
+# l'intérieur d'une même transaction (voir Database.appliquer_migrations).
+# Pour faire évoluer le schéma : ajouter une fonction et l'ajouter à la fin
+# de MIGRATIONS, ne jamais modifier une migration déjà livrée.
+
+
+def _aligner_index(cur):
+    """
+    Aligne les index de la base sur la liste INDEX actuelle (maintenir_index ;
+    les migrations ont leurs propres instructions, figées) :
+    - crée les index manquants,
+    - supprime les index "idx_*" qui ne sont plus déclarés.
+    Retourne (crees, supprimes).
+    """
+    cur.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'
+    """)
+    existants = {row[0] for row in cur.fetchall()}
+    crees = []
+    supprimes = []
+
+    for nom in sorted(existants):
+        if nom not in INDEX:
+            cur.execute(f"DROP INDEX IF EXISTS {nom}")
+            supprimes.append(nom)
+
+    for nom, (table, colonnes) in INDEX.items():
+        if nom not in existants:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {nom} ON {table} ({colonnes})")
+            crees.append(nom)
+
+    return crees, supprimes
+
+
+def _migration_1_schema_initial(cur):
+    """Tables de base (identiques aux anciens CREATE TABLE IF NOT EXISTS)."""
+
+    # ---------- TABLE CLIENTS ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            prenom TEXT,
+            telephone TEXT,
+            email TEXT,
+            adresse TEXT
+        )
+    """)
+
+    # ---------- TABLE TICKETS DE RÉPARATION (DÉPÔT + RÉCEPTION) ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tickets_reparation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+            -- Infos client (simple pour l'instant)
+            client_nom      TEXT NOT NULL,
+            client_tel      TEXT,
+
+            -- Infos téléphone (anciennement PC)
+            pc_marque       TEXT NOT NULL,
+            pc_modele       TEXT,
+            pc_num_serie    TEXT,
+
+            -- Accessoires remis
+            avec_chargeur   INTEGER NOT NULL DEFAULT 0,  -- 0 = non, 1 = oui
+            avec_batterie   INTEGER NOT NULL DEFAULT 0,  -- 0 = non, 1 = oui
+
+            -- Dépôt
+            diagnostic_initial TEXT,
+            date_depot         TEXT NOT NULL,           -- ex: "2025-12-01"
+
+            -- Réception / réparation
+            travaux_effectues  TEXT,
+            date_retrait       TEXT,                    -- rempli à la réception
+            montant_total      REAL,
+            montant_paye       REAL,
+            montant_restant    REAL,
+
+            -- Statut global
+            statut TEXT NOT NULL DEFAULT 'En cours'     -- En cours / Terminé / Livré / Annulé / Supprimé...
+        )
+    """)
+
+    # ---------- TABLE CRÉANCES / DETTES ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS creances_dettes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+            ticket_id       INTEGER,      -- lien vers ticket de réparation (optionnel)
+            client_nom      TEXT NOT NULL,
+            pc_marque       TEXT,
+            description     TEXT,        -- ce qu'on a réparé / remarque
+            montant_total   REAL NOT NULL,
+            montant_paye    REAL NOT NULL,
+            montant_restant REAL NOT NULL,
+            date_retrait    TEXT NOT NULL,
+
+            FOREIGN KEY (ticket_id) REFERENCES tickets_reparation(id)
+        )
+    """)
+
+    # ---------- TABLE PRODUITS / STOCK ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS produits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code_barres TEXT,             -- code-barres éventuel
+            reference  TEXT,              -- référence interne
+            nom        TEXT NOT NULL,     -- nom du produit
+            categorie  TEXT,              -- ex: Téléphone, Accessoire, Composant...
+            description TEXT,             -- infos supplémentaires
+            prix_achat REAL NOT NULL DEFAULT 0,
+            prix_vente REAL NOT NULL DEFAULT 0,
+            quantite   INTEGER NOT NULL DEFAULT 0,
+            seuil_alerte INTEGER NOT NULL DEFAULT 0,
+            actif      INTEGER NOT NULL DEFAULT 1  -- 1 = actif, 0 = désactivé
+        )
+    """)
+
+    # ---------- TABLE VENTES AU COMPTOIR ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ventes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_heure     TEXT NOT NULL,      -- "2025-12-01 14:30:00"
+            caisse_id      INTEGER,            -- caisse utilisée
+            client_nom     TEXT,               -- pour l'instant texte libre
+            mode_paiement  TEXT NOT NULL,      -- espece / carte / autre
+            montant_total  REAL NOT NULL,
+            montant_paye   REAL NOT NULL,
+            monnaie_rendue REAL NOT NULL,
+            FOREIGN KEY (caisse_id) REFERENCES caisses(id)
+        )
+    """)
+
+    # ---------- TABLE DÉTAILS DE VENTE ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS details_ventes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vente_id    INTEGER NOT NULL,
+            produit_id  INTEGER,          -- NULL si produit manuel
+            libelle     TEXT,             -- nom du produit manuel
+            quantite    REAL NOT NULL,
+            prix_unitaire REAL NOT NULL,
+            sous_total  REAL NOT NULL,
+            FOREIGN KEY (vente_id) REFERENCES ventes(id),
+            FOREIGN KEY (produit_id) REFERENCES produits(id)
+        )
+    """)
+
+    # ---------- TABLE CAISSES ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS caisses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL UNIQUE,
+            description TEXT
+        )
+    """)
+
+    # ---------- TABLE MOUVEMENTS DE CAISSE ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS mouvements_caisse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            caisse_id INTEGER NOT NULL,
+            date_mouvement TEXT NOT NULL,   -- "2025-12-01 10:30:00"
+            type TEXT NOT NULL,             -- 'ENTREE' ou 'SORTIE'
+            montant REAL NOT NULL,
+            description TEXT,
+            FOREIGN KEY (caisse_id) REFERENCES caisses(id)
+        )
+    """)
+
+    # ---------- TABLE ACHATS TÉLÉPHONES D'OCCASION ----------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS occasion_achats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tel_nom TEXT,
+            tel_marque TEXT,
+            tel_imei TEXT,
+            date_achat TEXT,
+            vendeur_nom TEXT,
+            vendeur_prenom TEXT,
+            vendeur_piece_type TEXT,
+            vendeur_piece_num TEXT,
+            vendeur_piece_lieu TEXT,
+            vendeur_piece_date TEXT,
+            vendeur_tel TEXT,
+            vendeur_adresse TEXT
+        )
+    """)
+
+    # ---------- CAISSES PAR DÉFAUT ----------
+    cur.execute("SELECT COUNT(*) FROM caisses")
+    if cur.fetchone()[0] == 0:
+        cur.executemany("""
+            INSERT OR IGNORE INTO caisses (nom, description)
+            VALUES (?, ?)
+        """, [
+            ("Caisse comptoir", "Caisse principale des ventes"),
+            ("Caisse fournisseurs", "Paiement des fournisseurs"),
+        ])
+
+
+def _migration_2_index(cur):
+    """Index secondaires (liste figée à la livraison de la migration)."""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_tickets_statut_date"
+        " ON tickets_reparation (statut, date_depot, id)",
+        "CREATE INDEX IF NOT EXISTS idx_mouvements_caisse_date"
+        " ON mouvements_caisse (caisse_id, date_mouvement, id)",
+        "CREATE INDEX IF NOT EXISTS idx_details_ventes_vente ON details_ventes (vente_id)",
+        "CREATE INDEX IF NOT EXISTS idx_produits_code_barres ON produits (code_barres, actif)",
+        "CREATE INDEX IF NOT EXISTS idx_produits_actif_nom ON produits (actif, nom)",
+        "CREATE INDEX IF NOT EXISTS idx_creances_client ON creances_dettes (client_nom)",
+        "CREATE INDEX IF NOT EXISTS idx_creances_date ON creances_dettes (date_retrait, id)",
+        "CREATE INDEX IF NOT EXISTS idx_ventes_date_heure ON ventes (date_heure)",
+    ):
+        cur.execute(sql)
+
+
+def _migration_3_dates_iso(cur):
+    """Convertit les dates "jj/mm/aaaa[ hh:mm:ss]" existantes au format ISO."""
+    colonnes = (
+        ("tickets_reparation", "date_depot"),
+        ("tickets_reparation", "date_retrait"),
+        ("creances_dettes", "date_retrait"),
+        ("mouvements_caisse", "date_mouvement"),
+        ("occasion_achats", "date_achat"),
+    )
+    for table, colonne in colonnes:
+        cur.execute(f"SELECT id, {colonne} FROM {table} WHERE {colonne} LIKE '%/%'")
+        maj = []
+        for row in cur.fetchall():
+            iso = date_vers_iso(row[1])
+            if iso != row[1]:
+                maj.append((iso, row[0]))
+        if maj:
+            cur.executemany(f"UPDATE {table} SET {colonne} = ? WHERE id = ?", maj)
+
+
+def _migration_4_index_pagination(cur):
+    """Index pour la pagination des listes sans filtre."""
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_tickets_date ON tickets_reparation (date_depot, id)",
+        "CREATE INDEX IF NOT EXISTS idx_mouvements_date ON mouvements_caisse (date_mouvement, id)",
+        "CREATE INDEX IF NOT EXISTS idx_produits_nom ON produits (nom)",
+    ):
+        cur.execute(sql)
+
+
+def _migration_5_recherche_produits(cur):
+    """
+    Index plein texte des produits (FTS5, sans accents, préfixes indexés),
+    tenu à jour par triggers. Si SQLite est compilé sans FTS5, la migration
+    ne crée rien et rechercher_produits reste sur LIKE.
+    """
+    try:
+        cur.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS produits_fts USING fts5(
+                nom, reference, code_barres, categorie,
+                content='produits', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS produits_fts_ai AFTER INSERT ON produits BEGIN
+            INSERT INTO produits_fts (rowid, nom, reference, code_barres, categorie)
+            VALUES (new.id, new.nom, new.reference, new.code_barres, new.categorie);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS produits_fts_ad AFTER DELETE ON produits BEGIN
+            INSERT INTO produits_fts (produits_fts, rowid, nom, reference, code_barres, categorie)
+            VALUES ('delete', old.id, old.nom, old.reference, old.code_barres, old.categorie);
+        END
+    """)
+    # seules les colonnes indexées déclenchent la mise à jour (pas le stock)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS produits_fts_au
+        AFTER UPDATE OF nom, reference, code_barres, categorie ON produits BEGIN
+            INSERT INTO produits_fts (produits_fts, rowid, nom, reference, code_barres, categorie)
+            VALUES ('delete', old.id, old.nom, old.reference, old.code_barres, old.categorie);
+            INSERT INTO produits_fts (rowid, nom, reference, code_barres, categorie)
+            VALUES (new.id, new.nom, new.reference, new.code_barres, new.categorie);
+        END
+    """)
+    cur.execute("INSERT INTO produits_fts (produits_fts) VALUES ('rebuild')")
+
+
+# Montant d'un mouvement de caisse compté dans le solde (alias de table : {t})
+_MONTANT_SIGNE = ("CASE {t}.type WHEN 'ENTREE' THEN {t}.montant "
+                  "WHEN 'SORTIE' THEN -{t}.montant ELSE 0 END")
+
+
+def _migration_6_soldes_caisses(cur):
+    """
+    Solde de chaque caisse tenu à jour par triggers sur mouvements_caisse
+    (dans la transaction de l'écriture), au lieu d'un SUM sur tout l'historique.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS soldes_caisses (
+            caisse_id INTEGER PRIMARY KEY,
+            solde REAL NOT NULL DEFAULT 0,
+            nb_mouvements INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (caisse_id) REFERENCES caisses(id)
+        )
+    """)
+    nouveau = _MONTANT_SIGNE.format(t="new")
+    ancien = _MONTANT_SIGNE.format(t="old")
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS soldes_caisses_ai AFTER INSERT ON mouvements_caisse BEGIN
+            INSERT INTO soldes_caisses (caisse_id, solde, nb_mouvements)
+            VALUES (new.caisse_id, {nouveau}, 1)
+            ON CONFLICT (caisse_id) DO UPDATE
+            SET solde = solde + excluded.solde, nb_mouvements = nb_mouvements + 1;
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS soldes_caisses_ad AFTER DELETE ON mouvements_caisse BEGIN
+            UPDATE soldes_caisses
+            SET solde = solde - {ancien}, nb_mouvements = nb_mouvements - 1
+            WHERE caisse_id = old.caisse_id;
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS soldes_caisses_au
+        AFTER UPDATE OF caisse_id, type, montant ON mouvements_caisse BEGIN
+            UPDATE soldes_caisses
+            SET solde = solde - {ancien}, nb_mouvements = nb_mouvements - 1
+            WHERE caisse_id = old.caisse_id;
+            INSERT INTO soldes_caisses (caisse_id, solde, nb_mouvements)
+            VALUES (new.caisse_id, {nouveau}, 1)
+            ON CONFLICT (caisse_id) DO UPDATE
+            SET solde = solde + excluded.solde, nb_mouvements = nb_mouvements + 1;
+        END
+    """)
+    _recalculer_soldes_caisses(cur)
+
+
+def _recalculer_soldes_caisses(cur):
+    """Reconstruit soldes_caisses à partir du journal mouvements_caisse."""
+    cur.execute("DELETE FROM soldes_caisses")
+    cur.execute(f"""
+        INSERT INTO soldes_caisses (caisse_id, solde, nb_mouvements)
+        SELECT m.caisse_id, SUM({_MONTANT_SIGNE.format(t="m")}), COUNT(*)
+        FROM mouvements_caisse m
+        GROUP BY m.caisse_id
+    """)
+
+
+def _migration_7_clotures_caisse(cur):
+    """
+    Clôtures journalières (rapport Z) : un instantané par caisse et par jour
+    clôturé, pour ne relire que les mouvements postérieurs à la dernière clôture.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS clotures_caisse (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            caisse_id INTEGER NOT NULL,
+            date_debut TEXT,                -- 1er jour couvert (NULL = depuis l'origine)
+            date_cloture TEXT NOT NULL,     -- dernier jour couvert "2025-12-01"
+            date_heure TEXT NOT NULL,       -- moment de la clôture
+            solde_ouverture REAL NOT NULL,
+            total_entrees REAL NOT NULL,
+            total_sorties REAL NOT NULL,
+            solde_cloture REAL NOT NULL,
+            nb_mouvements INTEGER NOT NULL,
+            nb_ventes INTEGER NOT NULL,
+            UNIQUE (caisse_id, date_cloture),
+            FOREIGN KEY (caisse_id) REFERENCES caisses(id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ventes_caisse_date ON ventes (caisse_id, date_heure)")
+
+
+# Clé d'une vente dans ventes_jour (alias de table : {t})
+_CLE_VENTES_JOUR = ("substr({t}.date_heure, 1, 10), COALESCE({t}.caisse_id, 0), "
+                    "COALESCE({t}.mode_paiement, '')")
+
+# get_totaux_ventes : période -> expression SQL du premier jour de la période
+_PERIODES_VENTES = {
+    "jour": "jour",
+    "semaine": "date(jour, '-6 days', 'weekday 1')",   # lundi
+    "mois": "substr(jour, 1, 7) || '-01'",
+}
+# get_totaux_ventes(par=...) -> colonne de ventes_jour
+_DETAILS_VENTES = {"caisse": "caisse_id", "mode_paiement": "mode_paiement"}
+
+
+def _migration_8_ventes_jour(cur):
+    """
+    Cumul des ventes par jour, caisse et mode de paiement, tenu à jour par
+    triggers sur ventes (dans la transaction du passage en caisse).
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ventes_jour (
+            jour TEXT NOT NULL,             -- "2025-12-01"
+            caisse_id INTEGER NOT NULL,     -- 0 = vente sans caisse
+            mode_paiement TEXT NOT NULL,
+            nb_ventes INTEGER NOT NULL DEFAULT 0,
+            montant_total REAL NOT NULL DEFAULT 0,
+            montant_paye REAL NOT NULL DEFAULT 0,
+            monnaie_rendue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (jour, caisse_id, mode_paiement)
+        ) WITHOUT ROWID
+    """)
+    ajout = f"""
+            INSERT INTO ventes_jour
+            (jour, caisse_id, mode_paiement, nb_ventes, montant_total, montant_paye, monnaie_rendue)
+            VALUES ({_CLE_VENTES_JOUR.format(t="new")}, 1,
+                    COALESCE(new.montant_total, 0), COALESCE(new.montant_paye, 0),
+                    COALESCE(new.monnaie_rendue, 0))
+            ON CONFLICT (jour, caisse_id, mode_paiement) DO UPDATE
+            SET nb_ventes = nb_ventes + 1,
+                montant_total = montant_total + excluded.montant_total,
+                montant_paye = montant_paye + excluded.montant_paye,
+                monnaie_rendue = monnaie_rendue + excluded.monnaie_rendue;"""
+    retrait = f"""
+            UPDATE ventes_jour
+            SET nb_ventes = nb_ventes - 1,
+                montant_total = montant_total - COALESCE(old.montant_total, 0),
+                montant_paye = montant_paye - COALESCE(old.montant_paye, 0),
+                monnaie_rendue = monnaie_rendue - COALESCE(old.monnaie_rendue, 0)
+            WHERE (jour, caisse_id, mode_paiement) = ({_CLE_VENTES_JOUR.format(t="old")});"""
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ventes_jour_ai AFTER INSERT ON ventes BEGIN{ajout}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ventes_jour_ad AFTER DELETE ON ventes BEGIN{retrait}
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ventes_jour_au
+        AFTER UPDATE OF date_heure, caisse_id, mode_paiement,
+                        montant_total, montant_paye, monnaie_rendue
+        ON ventes BEGIN{retrait}{ajout}
+        END
+    """)
+    _recalculer_ventes_jour(cur)
+
+
+def _recalculer_ventes_jour(cur):
+    """Reconstruit ventes_jour à partir de la table ventes."""
+    cur.execute("DELETE FROM ventes_jour")
+    cur.execute(f"""
+        INSERT INTO ventes_jour
+        (jour, caisse_id, mode_paiement, nb_ventes, montant_total, montant_paye, monnaie_rendue)
+        SELECT {_CLE_VENTES_JOUR.format(t="v")}, COUNT(*),
+               COALESCE(SUM(v.montant_total), 0), COALESCE(SUM(v.montant_paye), 0),
+               COALESCE(SUM(v.monnaie_rendue), 0)
+        FROM ventes v
+        GROUP BY 1, 2, 3
+    """)
+
+
+def _migration_9_clotures_par_identifiant(cur):
+    """
+    Chaque clôture retient le dernier mouvement et la dernière vente qu'elle
+    a comptés (voir Database.cloturer_journee). Clôtures existantes : tout
+    ce qui était daté jusqu'à leur jour.
+    """
+    cur.execute("ALTER TABLE clotures_caisse ADD COLUMN dernier_mouvement_id INTEGER NOT NULL DEFAULT 0")
+    cur.execute("ALTER TABLE clotures_caisse ADD COLUMN derniere_vente_id INTEGER NOT NULL DEFAULT 0")
+    cur.execute("""
+        UPDATE clotures_caisse SET
+            dernier_mouvement_id = COALESCE((
+                SELECT MAX(m.id) FROM mouvements_caisse m
+                WHERE m.date_mouvement < date(clotures_caisse.date_cloture, '+1 day')
+            ), 0),
+            derniere_vente_id = COALESCE((
+                SELECT MAX(v.id) FROM ventes v
+                WHERE v.date_heure < date(clotures_caisse.date_cloture, '+1 day')
+            ), 0)
+    """)
+
+
+# (numéro de version, description, fonction)
+MIGRATIONS = [
+    (1, "Schéma initial", _migration_1_schema_initial),
+    (2, "Index secondaires", _migration_2_index),
+    (3, "Dates au format ISO", _migration_3_dates_iso),
+    (4, "Index de pagination", _migration_4_index_pagination),
+    (5, "Recherche plein texte des produits", _migration_5_recherche_produits),
+    (6, "Soldes des caisses matérialisés", _migration_6_soldes_caisses),
+    (7, "Clôtures journalières des caisses", _migration_7_clotures_caisse),
+    (8, "Cumul journalier des ventes", _migration_8_ventes_jour),
+    (9, "Clôtures découpées par identifiant", _migration_9_clotures_par_identifiant),
+]
+
+# Version du schéma attendue par ce code
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# Connexions de lecture gardées ouvertes entre deux lectures ; au-delà (plus
+# de lectures simultanées), une lecture ouvre une connexion temporaire
+# plutôt que d'attendre qu'une autre se libère.
+TAILLE_POOL_LECTURE = 4
+
+
+# Tables écrites par les triggers de create_tables quand la table clé change :
+# leur génération avance avec elle (voir Database.generation).
+TABLES_TENUES_PAR_TRIGGER = {
+    "produits": ("produits_fts",),
+    "mouvements_caisse": ("soldes_caisses",),
+    "ventes": ("ventes_jour",),
+}
+
+
+class Connexions:
+    """
+    Connexions d'une Database à son fichier :
+      - une seule connexion d'écriture, réservée par ecrire() au thread
+        appelant le temps d'une transaction (verrou réentrant : les
+        écritures de tous les threads sont sérialisées) ;
+      - un pool de connexions de lecture (PRAGMA query_only) prises et
+        rendues par lire() : en WAL, une lecture longue ne bloque ni les
+        écritures ni les autres lectures, sur n'importe quel thread.
+    Chaque appel reçoit son propre curseur, fermé à la sortie du bloc :
+    aucun curseur partagé dont lastrowid ou les lignes en attente
+    pourraient être changés par un autre appel.
+
+    ouvrir(lecture=False) : crée une connexion réglée (voir
+    Database._ouvrir_connexion). Sans lectures séparées (base ":memory:",
+    propre à une connexion), lire() passe par la connexion d'écriture.
+    apres_ecriture(tables) : appelé une fois à la fin du bloc ecrire() le
+    plus externe, avec les tables déclarées par tous ses blocs.
+    """
+
+    def __init__(self, ouvrir, taille_pool=TAILLE_POOL_LECTURE, lectures_separees=True,
+                 apres_ecriture=None):
+        self._ouvrir = ouvrir
+        self.taille_pool = taille_pool
+        self.lectures_separees = lectures_separees
+        self.apres_ecriture = apres_ecriture
+        self.ecriture = ouvrir()
+
+        self._verrou = threading.RLock()
+        self._proprietaire = None   # thread qui tient la connexion d'écriture
+        self._profondeur = 0        # blocs ecrire() imbriqués de ce thread
+        self._tables = set()        # tables déclarées par ces blocs
+        self._libres = []           # connexions de lecture disponibles
+        self._verrou_pool = threading.Lock()
+
+    @contextmanager
+    def ecrire(self, tables=()):
+        """
+        Curseur sur la connexion d'écriture. Commit à la sortie du bloc le
+        plus externe, rollback complet si une erreur en sort ; un bloc
+        imbriqué fait partie de la transaction englobante.
+        tables : tables écrites par le bloc, transmises à apres_ecriture.
+        """
+        with self._verrou:
+            self._profondeur += 1
+            self._tables.update(tables)
+            self._proprietaire = threading.get_ident()
+            cur = self.ecriture.cursor()
+            try:
+                yield cur
+                if self._profondeur == 1:
+                    self.ecriture.commit()
+            except BaseException:
+                if self._profondeur == 1:
+                    self.ecriture.rollback()
+                raise
+            finally:
+                cur.close()
+                self._profondeur -= 1
+                if not self._profondeur:
+                    self._proprietaire = None
+                    tables, self._tables = self._tables, set()
+                    if tables and self.apres_ecriture is not None:
+                        self.apres_ecriture(tables)
+
+    @contextmanager
+    def lire(self):
+        """
+        Curseur de lecture. Un thread en cours d'écriture lit sur la
+        connexion d'écriture (il voit ses propres écritures non validées) ;
+        les autres lisent sur une connexion du pool.
+        """
+        if self._proprietaire == threading.get_ident() or not self.lectures_separees:
+            with self._verrou:
+                cur = self.ecriture.cursor()
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+            return
+
+        conn = self._prendre()
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+            self._rendre(conn)
+
+    def _prendre(self):
+        with self._verrou_pool:
+            if self._libres:
+                return self._libres.pop()
+        return self._ouvrir(lecture=True)
+
+    def _rendre(self, conn):
+        with self._verrou_pool:
+            if len(self._libres) < self.taille_pool:
+                self._libres.append(conn)
+                return
+        conn.close()
+
+    def fermer_lectures(self):
+        """Ferme les connexions de lecture libres (rouvertes à la demande)."""
+        with self._verrou_pool:
+            libres, self._libres = self._libres, []
+        for conn in libres:
+            conn.close()
+
+    def fermer(self):
+        self.fermer_lectures()
+        self.ecriture.close()
+
+
 class Database:
-    def __init__(self, db_name=None):
+    def __init__(self, db_name=None, profil=None, pragmas=None, journal=None):
         """
         db_name : chemin vers la base SQLite.
         - Si None, on utilise un emplacement par défaut :
           * En dev : <projet>/data/magasin.db
           * En exe (PyInstaller) : dossier utilisateur (APPDATA\\pyramide\\magasin.db)
+        profil : nom d'un profil de PROFILS_CONNEXION (défaut : PROFIL_CONNEXION_DEFAUT).
+        pragmas : dict optionnel de PRAGMA qui surchargent ceux du profil.
+        journal : JournalRequetes optionnel (journal_requetes.py) qui mesure
+        chaque requête et chaque appel de méthode.
+
+        Les écritures passent par transaction(), les lectures par lecture() :
+        chacune a son curseur, les lectures tournent sur un pool de
+        connexions (voir Connexions). Une même Database peut servir au
+        thread Tk et au thread de lecture (ui/taches_db.py).
         """
         if db_name is None:
             db_name = DEFAULT_DB_PATH
 
-        # Connexion à la base SQLite
-        self.conn = sqlite3.connect(str(db_name))
-        # les lignes retournées seront des objets "Row" accessibles par nom de colonne
-        self.conn.row_factory = sqlite3.Row
-        # Activation des clés étrangères (par sécurité)
-        self.conn.execute("PRAGMA foreign_keys = ON")
-        self.cursor = self.conn.cursor()
+        # Chemin et réglages conservés pour ouvrir d'autres connexions
+        # sur la même base (ex. thread de lecture, voir ui/taches_db.py)
+        self.db_name = str(db_name)
+        self.pragmas_connexion = dict(pragmas or {})
+        self.journal = journal
+        if journal is not None:
+            journal.instrumenter(self)
+
+        # Connexion d'écriture + pool de connexions de lecture
+        self._reglages = {}     # PRAGMA du profil, appliqués à chaque connexion
+        self._generations = {}  # table -> génération (voir generation())
+        self._connexions = Connexions(self._ouvrir_connexion,
+                                      lectures_separees=self.db_name != ":memory:",
+                                      apres_ecriture=self._tables_modifiees)
+        # connexion d'écriture : à n'utiliser qu'à travers transaction()
+        self.conn = self._connexions.ecriture
+        self.appliquer_profil(profil, pragmas)
         self.create_tables()
 
-    def create_tables(self):
-        """Création de toutes les tables nécessaires."""
-
-        # ---------- TABLE CLIENTS ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS clients (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                prenom TEXT,
-                telephone TEXT,
-                email TEXT,
-                adresse TEXT
+        # Cache code-barres -> produit (scanner de la caisse), inactif tant que
+        # charger_cache_codes() n'a pas été appelé
+        self._cache_codes = None
+        self._codes_par_produit = {}
+        self._stats_codes = {"hits": 0, "misses": 0, "invalidations": 0,
+                             "recherches": 0, "duree_totale": 0.0, "duree_max": 0.0}
+
+        # Index plein texte disponible ? (absent si SQLite n'a pas FTS5)
+        with self.lecture() as cur:
+            cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'produits_fts'"
             )
-        """)
+            self.recherche_fts = cur.fetchone() is not None
 
-        # ---------- TABLE TICKETS DE RÉPARATION (DÉPÔT + RÉCEPTION) ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tickets_reparation (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-
-                -- Infos client (simple pour l'instant)
-                client_nom      TEXT NOT NULL,
-                client_tel      TEXT,
-
-                -- Infos téléphone (anciennement PC)
-                pc_marque       TEXT NOT NULL,
-                pc_modele       TEXT,
-                pc_num_serie    TEXT,
-
-                -- Accessoires remis
-                avec_chargeur   INTEGER NOT NULL DEFAULT 0,  -- 0 = non, 1 = oui
-                avec_batterie   INTEGER NOT NULL DEFAULT 0,  -- 0 = non, 1 = oui
-
-                -- Dépôt
-                diagnostic_initial TEXT,
-                date_depot         TEXT NOT NULL,           -- ex: "01/12/2025"
-
-                -- Réception / réparation
-                travaux_effectues  TEXT,
-                date_retrait       TEXT,                    -- rempli à la réception
-                montant_total      REAL,
-                montant_paye       REAL,
-                montant_restant    REAL,
-
-                -- Statut global
-                statut TEXT NOT NULL DEFAULT 'En cours'     -- En cours / Terminé / Livré / Annulé / Supprimé...
-            )
-        """)
+    def _ouvrir_connexion(self, lecture=False):
+        """
+        Nouvelle connexion à la base, réglée comme les autres : lignes
+        sqlite3.Row (accès par nom de colonne), clés étrangères, PRAGMA du
+        profil. Une connexion de lecture refuse toute écriture (query_only).
+        Utilisable depuis n'importe quel thread, un seul à la fois (Connexions).
+        """
+        if self.journal is None:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        else:
+            conn = self.journal.connecter(self.db_name, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        for nom, valeur in self._reglages.items():
+            # journal_mode est enregistré dans le fichier : réglé par l'écriture
+            if lecture and nom == "journal_mode":
+                continue
+            # journal_mode renvoie une ligne : on la consomme
+            conn.execute(f"PRAGMA {nom} = {valeur}").fetchall()
+        if lecture:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def appliquer_profil(self, profil=None, pragmas=None):
+        """
+        Applique un profil de connexion (PRAGMA) à la connexion d'écriture
+        et aux connexions de lecture (celles du pool sont rouvertes).
+        Un profil inconnu est remplacé par le profil par défaut, un PRAGMA
+        non autorisé est ignoré.
+        Retourne le nom du profil effectivement appliqué.
+        """
+        if profil not in PROFILS_CONNEXION:
+            profil = PROFIL_CONNEXION_DEFAUT
+
+        reglages = dict(PROFILS_CONNEXION[profil])
+        for nom, valeur in (pragmas or {}).items():
+            if _pragma_valide(nom, valeur):
+                reglages[nom] = valeur
+
+        with self.transaction() as cur:
+            for nom, valeur in reglages.items():
+                # journal_mode renvoie une ligne : on la consomme
+                cur.execute(f"PRAGMA {nom} = {valeur}").fetchall()
+        self._reglages = reglages
+        self._connexions.fermer_lectures()
+
+        self.profil_connexion = profil
+        return profil
+
+    def get_pragmas(self):
+        """Retourne {nom: valeur actuelle} pour les PRAGMA réglables."""
+        with self.lecture() as cur:
+            return {
+                nom: cur.execute(f"PRAGMA {nom}").fetchone()[0]
+                for nom in sorted(_PRAGMAS_AUTORISES)
+            }
 
-        # ---------- TABLE CRÉANCES / DETTES ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS creances_dettes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-
-                ticket_id       INTEGER,      -- lien vers ticket de réparation (optionnel)
-                client_nom      TEXT NOT NULL,
-                pc_marque       TEXT,
-                description     TEXT,        -- ce qu'on a réparé / remarque
-                montant_total   REAL NOT NULL,
-                montant_paye    REAL NOT NULL,
-                montant_restant REAL NOT NULL,
-                date_retrait    TEXT NOT NULL,
-
-                FOREIGN KEY (ticket_id) REFERENCES tickets_reparation(id)
-            )
-        """)
+    def create_tables(self):
+        """
+        Création / mise à jour de toutes les tables nécessaires (aucune
+        migration si la base est déjà à la version SCHEMA_VERSION), puis
+        index vérifiés à chaque démarrage : un index déclaré dans INDEX mais
+        absent (supprimé à la main, base restaurée...) est recréé.
+        self.index_corriges = (crees, supprimes) de ce démarrage.
+        """
+        self.appliquer_migrations()
+        self.index_corriges = self.maintenir_index()
 
-        # ---------- TABLE PRODUITS / STOCK ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS produits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                code_barres TEXT,             -- code-barres éventuel
-                reference  TEXT,              -- référence interne
-                nom        TEXT NOT NULL,     -- nom du produit
-                categorie  TEXT,              -- ex: Téléphone, Accessoire, Composant...
-                description TEXT,             -- infos supplémentaires
-                prix_achat REAL NOT NULL DEFAULT 0,
-                prix_vente REAL NOT NULL DEFAULT 0,
-                quantite   INTEGER NOT NULL DEFAULT 0,
-                seuil_alerte INTEGER NOT NULL DEFAULT 0,
-                actif      INTEGER NOT NULL DEFAULT 1  -- 1 = actif, 0 = désactivé
-            )
-        """)
+    # ============================================================
+    # MIGRATIONS
+    # ============================================================
 
-        # ---------- TABLE VENTES AU COMPTOIR ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ventes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date_heure     TEXT NOT NULL,      -- "2025-12-01 14:30:00"
-                caisse_id      INTEGER,            -- caisse utilisée
-                client_nom     TEXT,               -- pour l'instant texte libre
-                mode_paiement  TEXT NOT NULL,      -- espece / carte / autre
-                montant_total  REAL NOT NULL,
-                montant_paye   REAL NOT NULL,
-                monnaie_rendue REAL NOT NULL,
-                FOREIGN KEY (caisse_id) REFERENCES caisses(id)
-            )
-        """)
+    def get_version_schema(self):
+        """Retourne la version du schéma enregistrée dans la base (PRAGMA user_version)."""
+        with self.lecture() as cur:
+            cur.execute("PRAGMA user_version")
+            return int(cur.fetchone()[0])
 
-        # ---------- TABLE DÉTAILS DE VENTE ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS details_ventes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vente_id    INTEGER NOT NULL,
-                produit_id  INTEGER,          -- NULL si produit manuel
-                libelle     TEXT,             -- nom du produit manuel
-                quantite    REAL NOT NULL,
-                prix_unitaire REAL NOT NULL,
-                sous_total  REAL NOT NULL,
-                FOREIGN KEY (vente_id) REFERENCES ventes(id),
-                FOREIGN KEY (produit_id) REFERENCES produits(id)
-            )
-        """)
+    def appliquer_migrations(self):
+        """
+        Applique, dans une seule transaction, les migrations dont le numéro est
+        supérieur à la version de la base, puis met à jour PRAGMA user_version.
+        En cas d'erreur, tout est annulé (la base reste à son ancienne version).
 
-        # ---------- TABLE CAISSES ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS caisses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL UNIQUE,
-                description TEXT
-            )
-        """)
+        Retourne la liste des numéros de migrations appliquées ([] si à jour).
+        """
+        version = self.get_version_schema()
+        a_appliquer = [m for m in MIGRATIONS if m[0] > version]
+        if not a_appliquer:
+            return []
 
-        # ---------- TABLE MOUVEMENTS DE CAISSE ----------
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS mouvements_caisse (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                caisse_id INTEGER NOT NULL,
-                date_mouvement TEXT NOT NULL,   -- "01/12/2025 10:30"
-                type TEXT NOT NULL,             -- 'ENTREE' ou 'SORTIE'
-                montant REAL NOT NULL,
-                description TEXT,
-                FOREIGN KEY (caisse_id) REFERENCES caisses(id)
-            )
-        """)
+        with self.transaction() as cur:
+            # BEGIN explicite : sqlite3 n'ouvre pas de transaction avant un CREATE
+            if not self.conn.in_transaction:
+                cur.execute("BEGIN")
+            for numero, _description, migration in a_appliquer:
+                migration(cur)
+            cur.execute(f"PRAGMA user_version = {int(a_appliquer[-1][0])}")
+
+        return [m[0] for m in a_appliquer]
+
+    # ============================================================
+    # INDEX
+    # ============================================================
 
-        self.conn.commit()
+    def get_index_existants(self):
+        """Retourne {nom_index: table} pour les index "idx_*" présents en base."""
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT name, tbl_name FROM sqlite_master
+                WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'
+            """)
+            return {row["name"]: row["tbl_name"] for row in cur.fetchall()}
+
+    def maintenir_index(self):
+        """
+        Aligne immédiatement les index de la base sur la liste INDEX
+        (appelé à chaque démarrage par create_tables). Retourne (crees, supprimes).
+        """
+        with self.transaction() as cur:
+            return _aligner_index(cur)
 
-        # Créer des caisses par défaut si aucune
-        self.initialiser_caisses()
+    def verifier_index(self):
+        """Retourne la liste des index déclarés dans INDEX mais absents de la base."""
+        existants = self.get_index_existants()
+        return [nom for nom in INDEX if nom not in existants]
+
+    def rapport_index(self):
+        """
+        Exécute EXPLAIN QUERY PLAN sur les requêtes chaudes (REQUETES_CHAUDES).
+
+        Retourne une liste de dicts :
+            {"requete": str, "plan": str, "index": str ou None, "scan": bool}
+        "scan" vaut True si SQLite parcourt une table entière sans index.
+        """
+        rapport = []
+        for nom, (sql, params) in REQUETES_CHAUDES.items():
+            with self.lecture() as cur:
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                details = [row["detail"] for row in cur.fetchall()]
+
+            index_utilise = None
+            scan = False
+            for d in details:
+                if " INDEX " in f" {d} ":
+                    index_utilise = d.split(" INDEX ", 1)[1].split(" ")[0]
+                elif d.startswith("SCAN ") and "USING" not in d:
+                    scan = True
+
+            rapport.append({
+                "requete": nom,
+                "plan": " | ".join(details),
+                "index": index_utilise,
+                "scan": scan,
+            })
+        return rapport
+
+    # ============================================================
+    # TRANSACTIONS
+    # ============================================================
+
+    def transaction(self, *tables):
+        """
+        with db.transaction("ventes", ...) as cur : écritures sur la connexion
+        d'écriture (réservée au thread appelant jusqu'à la fin du bloc),
+        un seul commit à la fin du bloc, rollback complet en cas d'erreur.
+        Les blocs imbriqués font partie de la transaction englobante.
+        tables : tables écrites dans le bloc ; leur génération avance une
+        fois, à la fin de la transaction englobante (voir generation()).
+        """
+        return self._connexions.ecrire(tables)
+
+    def lecture(self):
+        """
+        with db.lecture() as cur : curseur de lecture propre à l'appel,
+        sur une connexion du pool (voir Connexions).
+        """
+        return self._connexions.lire()
+
+    # ============================================================
+    # GÉNÉRATIONS DES TABLES
+    # ============================================================
+
+    def _tables_modifiees(self, tables):
+        """Fin d'une transaction : une génération de plus par table écrite."""
+        for table in tables:
+            for nom in (table,) + TABLES_TENUES_PAR_TRIGGER.get(table, ()):
+                self._generations[nom] = self._generations.get(nom, 0) + 1
+
+    def generation(self, *tables):
+        """
+        Génération courante des tables données (tuple) : elle change à la fin
+        de chaque transaction qui les déclare (transaction(*tables)), ainsi
+        que pour les tables tenues par trigger (TABLES_TENUES_PAR_TRIGGER).
+        Une page qui la note au moment de sa lecture sait ensuite si ses
+        données sont encore à jour. Une écriture annulée (rollback) compte
+        aussi : au pire, une relecture de trop.
+        """
+        return tuple(self._generations.get(table, 0) for table in tables)
 
     # ============================================================
     # CLIENTS
     # ============================================================
 
     def ajouter_client(self, nom, prenom="", telephone="", email="", adresse=""):
-        self.cursor.execute("""
-            INSERT INTO clients (nom, prenom, telephone, email, adresse)
-            VALUES (?, ?, ?, ?, ?)
-        """, (nom, prenom, telephone, email, adresse))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaction("clients") as cur:
+            cur.execute("""
+                INSERT INTO clients (nom, prenom, telephone, email, adresse)
+                VALUES (?, ?, ?, ?, ?)
+            """, (nom, prenom, telephone, email, adresse))
+            return cur.lastrowid
 
     def get_clients(self):
-        self.cursor.execute("SELECT * FROM clients ORDER BY nom")
-        return self.cursor.fetchall()
+        with self.lecture() as cur:
+            cur.execute("SELECT * FROM clients ORDER BY nom")
+            return cur.fetchall()
 
     # ============================================================
     # TICKETS DE RÉPARATION (DÉPÔT / RÉCEPTION)
@@ -242,51 +1250,50 @@ class Database:
         """
         Enregistre un dépôt de téléphone (bon de dépôt).
         """
-        self.cursor.execute("""
-            INSERT INTO tickets_reparation
-            (client_nom, client_tel,
-             pc_marque, pc_modele, pc_num_serie,
-             avec_chargeur, avec_batterie,
-             diagnostic_initial, date_depot,
-             travaux_effectues, date_retrait,
-             montant_total, montant_paye, montant_restant,
-             statut)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, 'En cours')
-        """, (
-            client_nom, client_tel,
-            pc_marque, pc_modele, pc_num_serie,
-            1 if avec_chargeur else 0,
-            1 if avec_batterie else 0,
-            diagnostic_initial, date_depot
-        ))
-        self.conn.commit()
-        return self.cursor.lastrowid
-
-    def get_tickets(self, statut=None):
-        """
-        Récupère les tickets de réparation.
+        with self.transaction("tickets_reparation") as cur:
+            cur.execute("""
+                INSERT INTO tickets_reparation
+                (client_nom, client_tel,
+                 pc_marque, pc_modele, pc_num_serie,
+                 avec_chargeur, avec_batterie,
+                 diagnostic_initial, date_depot,
+                 travaux_effectues, date_retrait,
+                 montant_total, montant_paye, montant_restant,
+                 statut)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, 'En cours')
+            """, (
+                client_nom, client_tel,
+                pc_marque, pc_modele, pc_num_serie,
+                1 if avec_chargeur else 0,
+                1 if avec_batterie else 0,
+                diagnostic_initial, date_vers_iso(date_depot)
+            ))
+            return cur.lastrowid
+
+    def get_tickets(self, statut=None, limite=None, apres=None):
+        """
+        Récupère les tickets de réparation, les plus récents d'abord.
         Si statut est donné, filtre par statut ('En cours', 'Terminé', 'Livré', etc.).
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
         """
+        conditions, params = [], []
         if statut:
-            self.cursor.execute("""
-                SELECT * FROM tickets_reparation
-                WHERE statut = ?
-                ORDER BY date_depot DESC, id DESC
-            """, (statut,))
-        else:
-            self.cursor.execute("""
-                SELECT * FROM tickets_reparation
-                ORDER BY date_depot DESC, id DESC
-            """)
-        return self.cursor.fetchall()
+            conditions.append("statut = ?")
+            params.append(statut)
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, "SELECT * FROM tickets_reparation", conditions, params,
+                ("date_depot", "id"), limite=limite, apres=apres,
+            )
 
     def get_ticket_by_id(self, ticket_id):
         """Retourne un ticket de réparation par son ID."""
-        self.cursor.execute("""
-            SELECT * FROM tickets_reparation
-            WHERE id = ?
-        """, (ticket_id,))
-        return self.cursor.fetchone()
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT * FROM tickets_reparation
+                WHERE id = ?
+            """, (ticket_id,))
+            return cur.fetchone()
 
     def enregistrer_reception_pc(self, ticket_id, travaux_effectues,
                                  montant_total, montant_paye,
@@ -298,13 +1305,14 @@ class Database:
         - travaux_effectues : texte décrivant la réparation
         - montant_total : montant total de la réparation
         - montant_paye : ce que le client paye maintenant
-        - date_retrait : date de retrait (jj/mm/aaaa), aujourd'hui par défaut
+        - date_retrait : date de retrait (jj/mm/aaaa ou ISO), aujourd'hui par défaut
         - statut : 'Livré' (par défaut), ou 'Terminé', etc.
 
         Retourne le montant restant à payer (>= 0).
         """
         if date_retrait is None:
-            date_retrait = datetime.now().strftime("%d/%m/%Y")
+            date_retrait = datetime.now().strftime(FORMAT_DATE)
+        date_retrait = date_vers_iso(date_retrait)
 
         montant_total = float(montant_total or 0)
         montant_paye = float(montant_paye or 0)
@@ -312,25 +1320,25 @@ class Database:
         if montant_restant < 0:
             montant_restant = 0.0
 
-        self.cursor.execute("""
-            UPDATE tickets_reparation
-            SET travaux_effectues = ?,
-                date_retrait = ?,
-                montant_total = ?,
-                montant_paye = ?,
-                montant_restant = ?,
-                statut = ?
-            WHERE id = ?
-        """, (
-            travaux_effectues,
-            date_retrait,
-            montant_total,
-            montant_paye,
-            montant_restant,
-            statut,
-            ticket_id
-        ))
-        self.conn.commit()
+        with self.transaction("tickets_reparation") as cur:
+            cur.execute("""
+                UPDATE tickets_reparation
+                SET travaux_effectues = ?,
+                    date_retrait = ?,
+                    montant_total = ?,
+                    montant_paye = ?,
+                    montant_restant = ?,
+                    statut = ?
+                WHERE id = ?
+            """, (
+                travaux_effectues,
+                date_retrait,
+                montant_total,
+                montant_paye,
+                montant_restant,
+                statut,
+                ticket_id
+            ))
         return montant_restant
 
     # ============================================================
@@ -344,53 +1352,56 @@ class Database:
         Ajoute une créance / dette dans la base.
         ticket_id est optionnel (None dans ton interface actuelle).
         """
-        self.cursor.execute("""
-            INSERT INTO creances_dettes
-            (ticket_id, client_nom, pc_marque, description,
-             montant_total, montant_paye, montant_restant, date_retrait)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            ticket_id,
-            client_nom,
-            pc_marque,
-            description,
-            float(montant_total),
-            float(montant_paye),
-            float(montant_restant),
-            date_retrait
-        ))
-        self.conn.commit()
-        return self.cursor.lastrowid
-
-    def get_creances(self):
-        """Récupère toutes les créances / dettes."""
-        self.cursor.execute("""
-            SELECT * FROM creances_dettes
-            ORDER BY date_retrait DESC, id DESC
-        """)
-        return self.cursor.fetchall()
+        with self.transaction("creances_dettes") as cur:
+            cur.execute("""
+                INSERT INTO creances_dettes
+                (ticket_id, client_nom, pc_marque, description,
+                 montant_total, montant_paye, montant_restant, date_retrait)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                ticket_id,
+                client_nom,
+                pc_marque,
+                description,
+                float(montant_total),
+                float(montant_paye),
+                float(montant_restant),
+                date_vers_iso(date_retrait)
+            ))
+            return cur.lastrowid
+
+    def get_creances(self, limite=None, apres=None):
+        """
+        Récupère toutes les créances / dettes, les plus récentes d'abord.
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
+        """
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, "SELECT * FROM creances_dettes", [], [],
+                ("date_retrait", "id"), limite=limite, apres=apres,
+            )
 
     def mettre_a_jour_creance(self, creance_id, montant_paye, montant_restant):
         """
         Met à jour les montants d'une créance existante.
         """
-        self.cursor.execute("""
-            UPDATE creances_dettes
-            SET montant_paye = ?, montant_restant = ?
-            WHERE id = ?
-        """, (float(montant_paye), float(montant_restant), creance_id))
-        self.conn.commit()
+        with self.transaction("creances_dettes") as cur:
+            cur.execute("""
+                UPDATE creances_dettes
+                SET montant_paye = ?, montant_restant = ?
+                WHERE id = ?
+            """, (float(montant_paye), float(montant_restant), creance_id))
 
     def supprimer_creance(self, creance_id):
         """
         Supprime définitivement une créance / dette.
         (Utilisé pour effacer les créances dont le reste à payer est 0.)
         """
-        self.cursor.execute("""
-            DELETE FROM creances_dettes
-            WHERE id = ?
-        """, (creance_id,))
-        self.conn.commit()
+        with self.transaction("creances_dettes") as cur:
+            cur.execute("""
+                DELETE FROM creances_dettes
+                WHERE id = ?
+            """, (creance_id,))
 
     # ============================================================
     # PRODUITS / STOCK
@@ -403,75 +1414,202 @@ class Database:
         """
         Ajoute un produit dans le stock.
         """
-        self.cursor.execute("""
-            INSERT INTO produits
-            (code_barres, reference, nom, categorie, description,
-             prix_achat, prix_vente, quantite, seuil_alerte, actif)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-        """, (
-            code_barres or None,
-            reference or None,
-            nom,
-            categorie or None,
-            description or None,
-            float(prix_achat),
-            float(prix_vente),
-            int(quantite),
-            int(seuil_alerte),
-        ))
-        self.conn.commit()
-        return self.cursor.lastrowid
-
-    def get_produits(self, uniquement_actifs=True):
-        """
-        Retourne la liste des produits.
+        with self.transaction("produits") as cur:
+            cur.execute("""
+                INSERT INTO produits
+                (code_barres, reference, nom, categorie, description,
+                 prix_achat, prix_vente, quantite, seuil_alerte, actif)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+            """, (
+                code_barres or None,
+                reference or None,
+                nom,
+                categorie or None,
+                description or None,
+                float(prix_achat),
+                float(prix_vente),
+                int(quantite),
+                int(seuil_alerte),
+            ))
+            produit_id = cur.lastrowid
+        self._invalider_cache_produit(produit_id, code_barres)
+        return produit_id
+
+    def get_produits(self, uniquement_actifs=True, limite=None, apres=None):
+        """
+        Retourne la liste des produits, triée par nom.
         Si uniquement_actifs=True, ne retourne que ceux avec actif=1.
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
         """
-        if uniquement_actifs:
-            self.cursor.execute("""
-                SELECT * FROM produits
-                WHERE actif = 1
-                ORDER BY nom
-            """)
-        else:
-            self.cursor.execute("""
-                SELECT * FROM produits
-                ORDER BY nom
-            """)
-        return self.cursor.fetchall()
+        conditions = ["actif = 1"] if uniquement_actifs else []
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, "SELECT * FROM produits", conditions, [],
+                ("nom", "id"), decroissant=False, limite=limite, apres=apres,
+            )
 
-    def rechercher_produits(self, terme, uniquement_actifs=True):
+    def rechercher_produits(self, terme, uniquement_actifs=True, limite=None, apres=None):
         """
         Recherche par nom, référence, code_barres ou catégorie.
+
+        Passe par l'index plein texte (FTS5) : chaque mot saisi est cherché
+        comme début de mot, sans tenir compte des accents ni de la casse, et
+        les résultats sont classés par pertinence (bm25, le nom compte le plus).
+        Si rien ne correspond (ex. "phone" pour "iPhone"), on retombe sur
+        l'ancienne recherche LIKE '%terme%' (triée par nom).
+
+        Avec limite : retourne (page, curseur_suivant). Le curseur, à repasser
+        tel quel dans apres=, garde le mode de la recherche : ("fts", nombre
+        de lignes déjà lues) ou ("like", nom, id) (voir _lire_liste()).
         """
+        mode = apres[0] if apres is not None else None
+        expression = _expression_fts(terme) if self.recherche_fts else None
+        if expression and mode in (None, "fts"):
+            decalage = apres[1] if mode else 0
+            resultat = self._rechercher_produits_fts(expression, uniquement_actifs, limite, decalage)
+            if limite is None:
+                if resultat:
+                    return resultat
+            else:
+                lignes, suivant = resultat
+                # page suivante d'une recherche plein texte : jamais de repli
+                if lignes or mode == "fts":
+                    return lignes, None if suivant is None else ("fts", suivant)
+
         like = f"%{terme}%"
+        conditions = ["(nom LIKE ? OR reference LIKE ? OR code_barres LIKE ? OR categorie LIKE ?)"]
         if uniquement_actifs:
-            self.cursor.execute("""
-                SELECT * FROM produits
-                WHERE actif = 1
-                  AND (nom LIKE ? OR reference LIKE ? OR code_barres LIKE ? OR categorie LIKE ?)
-                ORDER BY nom
-            """, (like, like, like, like))
-        else:
-            self.cursor.execute("""
-                SELECT * FROM produits
-                WHERE (nom LIKE ? OR reference LIKE ? OR code_barres LIKE ? OR categorie LIKE ?)
-                ORDER BY nom
-            """, (like, like, like, like))
-        return self.cursor.fetchall()
+            conditions.insert(0, "actif = 1")
+        with self.lecture() as cur:
+            resultat = _lire_liste(
+                cur, "SELECT * FROM produits", conditions, [like, like, like, like],
+                ("nom", "id"), decroissant=False, limite=limite,
+                apres=apres[1:] if mode == "like" else None,
+            )
+        if limite is None:
+            return resultat
+        lignes, suivant = resultat
+        return lignes, None if suivant is None else ("like",) + suivant
+
+    def _rechercher_produits_fts(self, expression, uniquement_actifs, limite, decalage):
+        """Requête FTS5 classée ; mêmes colonnes que la table produits."""
+        poids = ", ".join(str(p) for p in POIDS_RECHERCHE_PRODUITS)
+        sql = f"""
+            SELECT p.* FROM produits_fts
+            JOIN produits p ON p.id = produits_fts.rowid
+            WHERE produits_fts MATCH ?
+            {"AND p.actif = 1" if uniquement_actifs else ""}
+            ORDER BY bm25(produits_fts, {poids}), p.nom, p.id
+        """
+        with self.lecture() as cur:
+            if limite is None:
+                cur.execute(sql, (expression,))
+                return cur.fetchall()
+
+            limite, decalage = int(limite), int(decalage or 0)
+            cur.execute(f"{sql} LIMIT ? OFFSET ?", (expression, limite + 1, decalage))
+            lignes = cur.fetchall()
+        if len(lignes) <= limite:
+            return lignes, None
+        return lignes[:limite], decalage + limite
 
     def rechercher_produit_par_code(self, code_barres):
         """
-        Recherche un produit par code-barres. 
+        Recherche un produit actif par code-barres.
         Retourne un tuple (id, nom, prix_vente, quantite, code_barres, seuil_alerte) ou None.
+        Si le cache est chargé (charger_cache_codes), un code connu ne coûte
+        aucune requête ; un code inconnu est lu en base puis mis en cache.
+        """
+        debut = time.perf_counter()
+        try:
+            if self._cache_codes is not None:
+                produit = self._cache_codes.get(code_barres)
+                if produit is not None:
+                    self._stats_codes["hits"] += 1
+                    return produit
+                self._stats_codes["misses"] += 1
+
+            with self.lecture() as cur:
+                cur.execute("""
+                    SELECT id, nom, prix_vente, quantite, code_barres, seuil_alerte
+                    FROM produits
+                    WHERE code_barres = ? AND actif = 1
+                """, (code_barres,))
+                row = cur.fetchone()
+            produit = tuple(row) if row else None
+            if produit and self._cache_codes is not None:
+                self._mettre_en_cache(produit)
+            return produit
+        finally:
+            duree = time.perf_counter() - debut
+            self._stats_codes["recherches"] += 1
+            self._stats_codes["duree_totale"] += duree
+            self._stats_codes["duree_max"] = max(self._stats_codes["duree_max"], duree)
+
+    # --- Cache des codes-barres -----------------------------------
+
+    def charger_cache_codes(self):
+        """
+        Charge en mémoire tous les produits actifs ayant un code-barres.
+        Le cache est tenu à jour par ajouter_produit, modifier_produit,
+        supprimer_produit, modifier_stock et les ventes.
+        Retourne le nombre de codes chargés.
+        """
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT id, nom, prix_vente, quantite, code_barres, seuil_alerte
+                FROM produits
+                WHERE actif = 1 AND code_barres IS NOT NULL AND code_barres <> ''
+            """)
+            self._cache_codes = {}
+            self._codes_par_produit = {}
+            for row in cur.fetchall():
+                self._mettre_en_cache(tuple(row))
+        return len(self._cache_codes)
+
+    def stats_cache_codes(self):
+        """
+        Compteurs du cache code-barres : hits, misses, invalidations,
+        nombre de codes en cache, durée moyenne / max d'une recherche (ms).
         """
-        self.cursor.execute("""
-            SELECT id, nom, prix_vente, quantite, code_barres, seuil_alerte
-            FROM produits
-            WHERE code_barres = ? AND actif = 1
-        """, (code_barres,))
-        row = self.cursor.fetchone()
-        return row
+        s = self._stats_codes
+        return {
+            "actif": self._cache_codes is not None,
+            "codes": len(self._cache_codes or {}),
+            "hits": s["hits"],
+            "misses": s["misses"],
+            "invalidations": s["invalidations"],
+            "recherches": s["recherches"],
+            "duree_moyenne_ms": (s["duree_totale"] / s["recherches"] * 1000) if s["recherches"] else 0.0,
+            "duree_max_ms": s["duree_max"] * 1000,
+        }
+
+    def _mettre_en_cache(self, produit):
+        pid, code = produit[0], produit[4]
+        self._cache_codes[code] = produit
+        self._codes_par_produit[pid] = code
+
+    def _invalider_cache_produit(self, produit_id=None, code_barres=None):
+        """Retire du cache le produit (par id) et/ou le code donné : relu au prochain scan."""
+        if self._cache_codes is None:
+            return
+        codes = {code_barres} if code_barres else set()
+        ancien = self._codes_par_produit.pop(produit_id, None)
+        if ancien:
+            codes.add(ancien)
+        for code in codes:
+            if self._cache_codes.pop(code, None) is not None:
+                self._stats_codes["invalidations"] += 1
+
+    def _ajuster_stock_cache(self, produit_id, delta_quantite):
+        """Répercute une variation de stock (déjà validée en base) sur le cache."""
+        if self._cache_codes is None:
+            return
+        code = self._codes_par_produit.get(produit_id)
+        produit = self._cache_codes.get(code) if code else None
+        if produit is None or produit[3] is None:
+            return
+        self._cache_codes[code] = produit[:3] + (produit[3] + delta_quantite,) + produit[4:]
 
     def modifier_produit(self, produit_id, nom=None, code_barres=None,
                          reference=None, categorie=None, description=None,
@@ -521,41 +1659,118 @@ class Database:
         valeurs.append(produit_id)
 
         requete = f"UPDATE produits SET {', '.join(champs)} WHERE id = ?"
-        self.cursor.execute(requete, valeurs)
-        self.conn.commit()
+        with self.transaction("produits") as cur:
+            cur.execute(requete, valeurs)
+        self._invalider_cache_produit(produit_id, code_barres)
 
     def supprimer_produit(self, produit_id):
         """
         Supprime définitivement un produit.
         Peut échouer si des ventes y font référence (clé étrangère).
         """
-        self.cursor.execute("DELETE FROM produits WHERE id = ?", (produit_id,))
-        self.conn.commit()
+        with self.transaction("produits") as cur:
+            cur.execute("DELETE FROM produits WHERE id = ?", (produit_id,))
+        self._invalider_cache_produit(produit_id)
 
     def modifier_stock(self, produit_id, delta_quantite):
         """
         Modifie le stock d'un produit (ajout ou retrait).
         delta_quantite peut être positif (entrée) ou négatif (sortie).
         """
-        self.cursor.execute("""
-            UPDATE produits
-            SET quantite = quantite + ?
-            WHERE id = ?
-        """, (int(delta_quantite), produit_id))
-        self.conn.commit()
+        with self.transaction("produits") as cur:
+            cur.execute("""
+                UPDATE produits
+                SET quantite = quantite + ?
+                WHERE id = ?
+            """, (int(delta_quantite), produit_id))
+        self._ajuster_stock_cache(produit_id, int(delta_quantite))
 
     def produits_stock_bas(self):
         """
         Retourne les produits dont le stock est inférieur ou égal au seuil d'alerte.
         """
-        self.cursor.execute("""
-            SELECT * FROM produits
-            WHERE actif = 1
-              AND seuil_alerte > 0
-              AND quantite <= seuil_alerte
-            ORDER BY nom
-        """)
-        return self.cursor.fetchall()
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT * FROM produits
+                WHERE actif = 1
+                  AND seuil_alerte > 0
+                  AND quantite <= seuil_alerte
+                ORDER BY nom
+            """)
+            return cur.fetchall()
+
+    def prevision_reassort(self, jours_historique=REASSORT_JOURS_HISTORIQUE,
+                           delai_livraison=REASSORT_DELAI_LIVRAISON,
+                           jours_couverture=REASSORT_JOURS_COUVERTURE,
+                           tous=False):
+        """
+        Prévision de réassort à partir du rythme de vente réel.
+
+        Les quantités vendues sur les `jours_historique` derniers jours sont
+        totalisées pour tous les produits en UNE requête (GROUP BY), puis
+        pour chaque produit actif :
+          - vente_jour    : quantité vendue par jour,
+          - couverture    : jours de stock restants (None si aucune vente),
+          - point_commande: vente_jour x delai_livraison + seuil_alerte,
+          - a_commander   : quantité pour tenir delai_livraison + jours_couverture
+                            jours au-delà du seuil d'alerte (arrondie au-dessus).
+        Un produit est proposé quand son stock est au point de commande ou
+        en dessous (le seuil d'alerte seul suffit pour un produit sans vente).
+
+        Retourne une liste de dicts (produits proposés, ou tous si tous=True),
+        du stock le plus court au plus long :
+            {"id", "nom", "code_barres", "quantite", "seuil_alerte", "prix_achat",
+             "prix_vente", "vendu", "vente_jour", "couverture", "point_commande",
+             "a_commander"}
+        """
+        depuis = (datetime.now() - timedelta(days=int(jours_historique))).strftime(FORMAT_DATE)
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT p.id, p.nom, p.code_barres, p.quantite, p.seuil_alerte,
+                       p.prix_achat, p.prix_vente, COALESCE(s.vendu, 0) AS vendu
+                FROM produits p
+                LEFT JOIN (
+                    SELECT d.produit_id, SUM(d.quantite) AS vendu
+                    FROM ventes v
+                    JOIN details_ventes d ON d.vente_id = v.id
+                    WHERE v.date_heure >= ? AND d.produit_id IS NOT NULL
+                    GROUP BY d.produit_id
+                ) s ON s.produit_id = p.id
+                WHERE p.actif = 1
+            """, (depuis,))
+            lignes = cur.fetchall()
+
+        propositions = []
+        for row in lignes:
+            stock = int(row["quantite"] or 0)
+            seuil = int(row["seuil_alerte"] or 0)
+            vente_jour = float(row["vendu"]) / max(int(jours_historique), 1)
+
+            point_commande = vente_jour * delai_livraison + seuil
+            objectif = vente_jour * (delai_livraison + jours_couverture) + seuil
+            a_commander = max(0, math.ceil(objectif - stock - 1e-9))
+            a_proposer = a_commander > 0 and (vente_jour > 0 or seuil > 0) and stock <= point_commande
+            if not (tous or a_proposer):
+                continue
+
+            propositions.append({
+                "id": row["id"],
+                "nom": row["nom"],
+                "code_barres": row["code_barres"],
+                "quantite": stock,
+                "seuil_alerte": seuil,
+                "prix_achat": float(row["prix_achat"] or 0.0),
+                "prix_vente": float(row["prix_vente"] or 0.0),
+                "vendu": float(row["vendu"]),
+                "vente_jour": vente_jour,
+                "couverture": (stock / vente_jour) if vente_jour > 0 else None,
+                "point_commande": point_commande,
+                "a_commander": a_commander if a_proposer else 0,
+            })
+
+        # stock le plus court d'abord ; produits sans vente (couverture None) à la fin
+        propositions.sort(key=lambda p: (p["couverture"] is None, p["couverture"] or 0, p["nom"] or ""))
+        return propositions
 
     # ============================================================
     # VENTES AU COMPTOIR
@@ -565,7 +1780,9 @@ class Database:
                                    mode_paiement, montant_paye,
                                    monnaie_rendue, client_nom=None):
         """
-        Enregistre une vente au comptoir et met à jour le stock.
+        Enregistre une vente au comptoir et met à jour le stock
+        (une seule transaction, sans mouvement de caisse ni créance :
+        voir encaisser_vente pour le passage en caisse complet).
 
         items = liste de dicts:
             {
@@ -576,74 +1793,250 @@ class Database:
                 "sous_total": float
             }
         """
+        with self.transaction():
+            vente_id = self._inserer_vente(caisse_id, items, mode_paiement,
+                                           montant_paye, monnaie_rendue, client_nom)
+        self._reporter_sorties_cache(items)
+        return vente_id
+
+    def encaisser_vente(self, caisse_id, items,
+                        mode_paiement, montant_paye,
+                        monnaie_rendue, client_nom=None,
+                        description_mouvement="Vente comptoir N°{vente_id}",
+                        description_creance="Vente comptoir N°{vente_id}"):
+        """
+        Passage en caisse complet, en UNE seule transaction (un seul commit) :
+        - la vente et toutes ses lignes de détail,
+        - les sorties de stock,
+        - le mouvement de caisse (ENTREE) si montant_paye > 0,
+        - la créance du client si le paiement est partiel.
+
+        Si une étape échoue, rien n'est enregistré.
+        Dans les descriptions, "{vente_id}" est remplacé par le numéro de la vente.
+
+        Retourne (vente_id, reste) où reste est le montant laissé en créance.
+        """
+        total = sum(float(it["sous_total"]) for it in items or [])
+        montant_paye = float(montant_paye or 0)
+        reste = total - montant_paye if montant_paye < total else 0.0
+
+        with self.transaction("creances_dettes") as cur:
+            vente_id = self._inserer_vente(caisse_id, items, mode_paiement,
+                                           montant_paye, monnaie_rendue, client_nom)
+
+            if montant_paye > 0:
+                self._inserer_mouvement_caisse(
+                    caisse_id, "ENTREE", montant_paye,
+                    description_mouvement.replace("{vente_id}", str(vente_id))
+                )
+
+            if reste > 0.01:
+                cur.execute("""
+                    INSERT INTO creances_dettes
+                    (ticket_id, client_nom, pc_marque, description,
+                     montant_total, montant_paye, montant_restant, date_retrait)
+                    VALUES (NULL, ?, '', ?, ?, ?, ?, ?)
+                """, (
+                    client_nom or "Client inconnu",
+                    description_creance.replace("{vente_id}", str(vente_id)),
+                    float(total),
+                    montant_paye,
+                    float(reste),
+                    datetime.now().strftime(FORMAT_DATE),
+                ))
+            else:
+                reste = 0.0
+
+        self._reporter_sorties_cache(items)
+        return vente_id, reste
+
+    def _inserer_vente(self, caisse_id, items, mode_paiement,
+                       montant_paye, monnaie_rendue, client_nom):
+        """
+        Insère la vente, ses lignes (executemany) et décrémente le stock,
+        dans la transaction englobante (self.transaction()), sans commit propre.
+        """
         if not items:
             raise ValueError("La liste des articles est vide.")
 
         total = sum(float(it["sous_total"]) for it in items)
-        date_heure = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        self.cursor.execute("""
-            INSERT INTO ventes
-            (date_heure, caisse_id, client_nom, mode_paiement,
-             montant_total, montant_paye, monnaie_rendue)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            date_heure,
-            caisse_id,
-            client_nom,
-            mode_paiement,
-            float(total),
-            float(montant_paye),
-            float(monnaie_rendue),
-        ))
-        vente_id = self.cursor.lastrowid
-
-        for it in items:
-            pid = it.get("produit_id")
-            nom = it.get("nom") or None
-            qte = float(it.get("quantite") or 0)
-            pu = float(it.get("prix_unitaire") or 0)
-            st = float(it.get("sous_total") or 0)
-
-            self.cursor.execute("""
+        date_heure = datetime.now().strftime(FORMAT_DATE_HEURE)
+
+        with self.transaction("ventes", "details_ventes", "produits") as cur:
+            cur.execute("""
+                INSERT INTO ventes
+                (date_heure, caisse_id, client_nom, mode_paiement,
+                 montant_total, montant_paye, monnaie_rendue)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                date_heure,
+                caisse_id,
+                client_nom,
+                mode_paiement,
+                float(total),
+                float(montant_paye),
+                float(monnaie_rendue),
+            ))
+            vente_id = cur.lastrowid
+
+            lignes = [(
+                vente_id,
+                it.get("produit_id"),
+                it.get("nom") or None,
+                float(it.get("quantite") or 0),
+                float(it.get("prix_unitaire") or 0),
+                float(it.get("sous_total") or 0),
+            ) for it in items]
+            sorties_stock = self._sorties_stock(items)
+
+            cur.executemany("""
                 INSERT INTO details_ventes
                 (vente_id, produit_id, libelle, quantite, prix_unitaire, sous_total)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (vente_id, pid, nom, qte, pu, st))
+            """, lignes)
 
-            if pid:
-                self.modifier_stock(pid, -int(qte))
+            if sorties_stock:
+                cur.executemany("""
+                    UPDATE produits
+                    SET quantite = quantite - ?
+                    WHERE id = ?
+                """, [(qte, pid) for pid, qte in sorties_stock.items()])
 
-        self.conn.commit()
         return vente_id
 
-    def get_ventes(self, date_debut=None, date_fin=None):
+    @staticmethod
+    def _sorties_stock(items):
+        """produit_id -> quantité vendue (les produits manuels sans id sont ignorés)."""
+        sorties = {}
+        for it in items:
+            pid = it.get("produit_id")
+            if pid:
+                sorties[pid] = sorties.get(pid, 0) + int(float(it.get("quantite") or 0))
+        return sorties
+
+    def _reporter_sorties_cache(self, items):
+        """Après le commit d'une vente : décrémente le stock des produits en cache."""
+        if self._cache_codes is None:
+            return
+        for pid, qte in self._sorties_stock(items).items():
+            self._ajuster_stock_cache(pid, -qte)
+
+    def get_ventes(self, date_debut=None, date_fin=None, limite=None, apres=None):
         """
-        Retourne la liste des ventes.
-        - si date_debut et date_fin (au format 'YYYY-MM-DD') sont donnés, filtre par date.
+        Retourne la liste des ventes, les plus récentes d'abord.
+        - si date_debut et date_fin (jj/mm/aaaa ou 'YYYY-MM-DD') sont donnés,
+          filtre par date (bornes incluses, parcours de l'index sur date_heure).
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
         """
+        conditions, params = [], []
         if date_debut and date_fin:
-            self.cursor.execute("""
-                SELECT * FROM ventes
-                WHERE DATE(date_heure) BETWEEN ? AND ?
-                ORDER BY date_heure DESC
-            """, (date_debut, date_fin))
-        else:
-            self.cursor.execute("""
-                SELECT * FROM ventes
-                ORDER BY date_heure DESC
-            """)
-        return self.cursor.fetchall()
+            conditions.append("date_heure >= ? AND date_heure < ?")
+            params.extend(_bornes_periode(date_debut, date_fin))
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, "SELECT * FROM ventes", conditions, params,
+                ("date_heure", "id"), limite=limite, apres=apres,
+            )
+
+    def get_ventes_resume(self, date_debut=None, date_fin=None, limite=None, apres=None):
+        """
+        Comme get_ventes(), avec en plus pour chaque vente (en UNE requête) :
+        - nb_lignes       : nombre de lignes de détail,
+        - nb_produits     : nombre de produits différents,
+        - quantite_totale : nombre total d'articles vendus.
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
+        """
+        conditions, params = [], []
+        if date_debut and date_fin:
+            conditions.append("v.date_heure >= ? AND v.date_heure < ?")
+            params.extend(_bornes_periode(date_debut, date_fin))
+
+        select = """
+            SELECT v.*,
+                   COALESCE(d.nb_lignes, 0)       AS nb_lignes,
+                   COALESCE(d.nb_produits, 0)     AS nb_produits,
+                   COALESCE(d.quantite_totale, 0) AS quantite_totale
+            FROM ventes v
+            LEFT JOIN (
+                SELECT vente_id,
+                       COUNT(*)                   AS nb_lignes,
+                       COUNT(DISTINCT produit_id) AS nb_produits,
+                       SUM(quantite)              AS quantite_totale
+                FROM details_ventes
+                GROUP BY vente_id
+            ) d ON d.vente_id = v.id
+        """
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, select, conditions, params,
+                ("v.date_heure", "v.id"), limite=limite, apres=apres,
+            )
+
+    # --- Cumuls (ventes_jour) -------------------------------------
+
+    def get_totaux_ventes(self, periode="jour", date_debut=None, date_fin=None, par=None):
+        """
+        Totaux des ventes par jour, semaine (commençant le lundi) ou mois,
+        lus dans ventes_jour : quelques lignes par jour, quel que soit le
+        nombre de ventes.
+        - date_debut / date_fin : bornes incluses (facultatives).
+        - par : None, "caisse" ou "mode_paiement" pour détailler chaque période.
+
+        Retourne une liste de dicts, de la période la plus ancienne à la plus récente :
+            {"periode": "2025-12-01", ("caisse_id" | "mode_paiement"),
+             "nb_ventes", "montant_total", "montant_paye", "monnaie_rendue"}
+        où "periode" est le premier jour de la période.
+        """
+        if periode not in _PERIODES_VENTES:
+            raise ValueError(f"periode doit être parmi {sorted(_PERIODES_VENTES)}")
+        if par is not None and par not in _DETAILS_VENTES:
+            raise ValueError(f"par doit être None ou parmi {sorted(_DETAILS_VENTES)}")
+
+        colonnes = [f"{_PERIODES_VENTES[periode]} AS periode"]
+        if par:
+            colonnes.append(_DETAILS_VENTES[par])
+        conditions, params = [], []
+        if date_debut and date_fin:
+            conditions.append("jour >= ? AND jour < ?")
+            params.extend(_bornes_periode(date_debut, date_fin))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        groupe = ", ".join(str(i + 1) for i in range(len(colonnes)))
+
+        with self.lecture() as cur:
+            cur.execute(f"""
+                SELECT {', '.join(colonnes)},
+                       SUM(nb_ventes) AS nb_ventes,
+                       SUM(montant_total) AS montant_total,
+                       SUM(montant_paye) AS montant_paye,
+                       SUM(monnaie_rendue) AS monnaie_rendue
+                FROM ventes_jour
+                {where}
+                GROUP BY {groupe}
+                HAVING SUM(nb_ventes) > 0
+                ORDER BY {groupe}
+            """, params)
+            return [dict(row) for row in cur.fetchall()]
+
+    def reconstruire_ventes_jour(self):
+        """
+        Recalcule entièrement ventes_jour à partir des ventes (une transaction).
+        Retourne le nombre de lignes de cumul.
+        """
+        with self.transaction("ventes_jour") as cur:
+            _recalculer_ventes_jour(cur)
+            cur.execute("SELECT COUNT(*) FROM ventes_jour")
+            return cur.fetchone()[0]
 
     def get_details_vente(self, vente_id):
         """
         Retourne les lignes détail pour une vente donnée.
         """
-        self.cursor.execute("""
-            SELECT * FROM details_ventes
-            WHERE vente_id = ?
-        """, (vente_id,))
-        return self.cursor.fetchall()
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT * FROM details_ventes
+                WHERE vente_id = ?
+            """, (vente_id,))
+            return cur.fetchall()
 
     # ============================================================
     # CAISSES
@@ -651,24 +2044,26 @@ class Database:
 
     def initialiser_caisses(self):
         """Crée des caisses par défaut si aucune n'existe."""
-        self.cursor.execute("SELECT COUNT(*) FROM caisses")
-        n = self.cursor.fetchone()[0]
+        with self.lecture() as cur:
+            cur.execute("SELECT COUNT(*) FROM caisses")
+            n = cur.fetchone()[0]
         if n == 0:
             self.ajouter_caisse("Caisse comptoir", "Caisse principale des ventes")
             self.ajouter_caisse("Caisse fournisseurs", "Paiement des fournisseurs")
 
     def ajouter_caisse(self, nom, description=""):
-        self.cursor.execute("""
-            INSERT OR IGNORE INTO caisses (nom, description)
-            VALUES (?, ?)
-        """, (nom, description))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        with self.transaction("caisses") as cur:
+            cur.execute("""
+                INSERT OR IGNORE INTO caisses (nom, description)
+                VALUES (?, ?)
+            """, (nom, description))
+            return cur.lastrowid
 
     def get_caisses(self):
         """Retourne la liste des caisses (id, nom, description)."""
-        self.cursor.execute("SELECT id, nom, description FROM caisses ORDER BY id")
-        return self.cursor.fetchall()
+        with self.lecture() as cur:
+            cur.execute("SELECT id, nom, description FROM caisses ORDER BY id")
+            return cur.fetchall()
 
     # ============================================================
     # MOUVEMENTS DE CAISSE
@@ -680,82 +2075,421 @@ class Database:
         Ajoute un mouvement de caisse.
         type_mvt : 'ENTREE' ou 'SORTIE'
         """
+        return self._inserer_mouvement_caisse(
+            caisse_id, type_mvt, montant, description, date_mouvement
+        )
+
+    def _inserer_mouvement_caisse(self, caisse_id, type_mvt, montant,
+                                  description="", date_mouvement=None):
+        """Insère un mouvement de caisse, dans la transaction englobante s'il y en a une."""
         type_mvt = (type_mvt or "").upper()
         if type_mvt not in ("ENTREE", "SORTIE"):
             raise ValueError("type_mvt doit être 'ENTREE' ou 'SORTIE'")
 
         if date_mouvement is None:
-            date_mouvement = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-        self.cursor.execute("""
-            INSERT INTO mouvements_caisse
-            (caisse_id, date_mouvement, type, montant, description)
-            VALUES (?, ?, ?, ?, ?)
-        """, (caisse_id, date_mouvement, type_mvt, float(montant), description))
-        self.conn.commit()
-        return self.cursor.lastrowid
-
-    def get_mouvements_caisse(self, caisse_id=None):
+            date_mouvement = datetime.now().strftime(FORMAT_DATE_HEURE)
+        date_mouvement = date_vers_iso(date_mouvement)
+
+        with self.transaction("mouvements_caisse") as cur:
+            cur.execute("""
+                INSERT INTO mouvements_caisse
+                (caisse_id, date_mouvement, type, montant, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, (caisse_id, date_mouvement, type_mvt, float(montant), description))
+            return cur.lastrowid
+
+    def get_mouvements_caisse(self, caisse_id=None, date_debut=None, date_fin=None,
+                              limite=None, apres=None):
         """
-        Retourne les mouvements de caisse.
+        Retourne les mouvements de caisse, les plus récents d'abord.
         Si caisse_id est donné, filtre sur cette caisse.
+        Si date_debut et date_fin sont donnés, filtre sur la période (bornes incluses).
+        Avec limite : retourne (page, curseur_suivant), voir _lire_liste().
         """
+        conditions = []
+        params = []
         if caisse_id:
-            self.cursor.execute("""
-                SELECT * FROM mouvements_caisse
-                WHERE caisse_id = ?
-                ORDER BY date_mouvement DESC, id DESC
-            """, (caisse_id,))
-        else:
-            self.cursor.execute("""
-                SELECT * FROM mouvements_caisse
-                ORDER BY date_mouvement DESC, id DESC
-            """)
-        return self.cursor.fetchall()
+            conditions.append("caisse_id = ?")
+            params.append(caisse_id)
+        if date_debut and date_fin:
+            debut, fin = _bornes_periode(date_debut, date_fin)
+            conditions.append("date_mouvement >= ? AND date_mouvement < ?")
+            params.extend([debut, fin])
+
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur, "SELECT * FROM mouvements_caisse", conditions, params,
+                ("date_mouvement", "id"), limite=limite, apres=apres,
+            )
 
     def supprimer_mouvement_caisse(self, mouvement_id: int):
         """
         Supprime définitivement un mouvement de caisse.
+        Refusé (ValueError) si une clôture l'a déjà compté : son rapport Z et
+        la chaîne des soldes de clôture ne correspondraient plus à la caisse.
         """
-        self.cursor.execute(
-            "DELETE FROM mouvements_caisse WHERE id = ?",
-            (mouvement_id,)
-        )
-        self.conn.commit()
+        with self.transaction("mouvements_caisse") as cur:
+            cur.execute("""
+                SELECT MAX(cl.date_cloture)
+                FROM mouvements_caisse m
+                JOIN clotures_caisse cl ON cl.caisse_id = m.caisse_id
+                WHERE m.id = ? AND m.id <= cl.dernier_mouvement_id
+                  AND m.date_mouvement < date(cl.date_cloture, '+1 day')
+            """, (mouvement_id,))
+            cloture = cur.fetchone()[0]
+            if cloture:
+                raise ValueError(
+                    f"Mouvement compris dans la clôture du {cloture} : "
+                    "suppression impossible (saisir un mouvement inverse)."
+                )
+            cur.execute(
+                "DELETE FROM mouvements_caisse WHERE id = ?",
+                (mouvement_id,)
+            )
 
     def get_solde_caisse(self, caisse_id):
         """
-        Calcule le solde d'une caisse : somme(ENTREE) - somme(SORTIE)
-        """
-        self.cursor.execute("""
-            SELECT
-                COALESCE(SUM(
-                    CASE WHEN type = 'ENTREE' THEN montant
-                         WHEN type = 'SORTIE' THEN -montant
-                    END
-                ), 0)
-            FROM mouvements_caisse
-            WHERE caisse_id = ?
-        """, (caisse_id,))
-        solde = self.cursor.fetchone()[0]
-        return float(solde or 0.0)
+        Solde d'une caisse : somme(ENTREE) - somme(SORTIE).
+        Lu dans soldes_caisses (tenu à jour par triggers), sans parcourir
+        l'historique des mouvements.
+        """
+        with self.lecture() as cur:
+            cur.execute(
+                "SELECT solde FROM soldes_caisses WHERE caisse_id = ?", (caisse_id,)
+            )
+            row = cur.fetchone()
+        return float(row[0] or 0.0) if row else 0.0
+
+    def get_soldes_caisses(self):
+        """Retourne la liste des caisses (id, nom, description, solde) en une requête."""
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT c.id, c.nom, c.description, COALESCE(s.solde, 0) AS solde
+                FROM caisses c
+                LEFT JOIN soldes_caisses s ON s.caisse_id = c.id
+                ORDER BY c.id
+            """)
+            return cur.fetchall()
+
+    def reconcilier_soldes_caisses(self, corriger=False, tolerance=0.005):
+        """
+        Recalcule le solde de chaque caisse à partir des mouvements et le
+        compare au solde matérialisé ; vérifie aussi la chaîne des clôtures :
+        le solde de la dernière clôture doit être la somme des mouvements
+        qu'elle couvre, et chaque clôture doit ouvrir au solde de la précédente.
+
+        Retourne une liste de dicts, une par caisse :
+            {"caisse_id", "nom", "solde", "solde_calcule", "ecart",
+             "nb_mouvements", "nb_calcule", "derniere_cloture", "solde_cloture",
+             "solde_cloture_calcule", "ecart_cloture", "ruptures_cloture", "derive"}
+        (derniere_cloture et les soldes de clôture à None sans clôture).
+        "derive" vaut True si un écart dépasse la tolérance (ou si le nombre
+        de mouvements diffère, ou si la chaîne des clôtures est rompue).
+        Avec corriger=True, les soldes sont reconstruits depuis les mouvements
+        (une transaction) ; les clôtures, elles, ne sont jamais modifiées.
+        """
+        with self.lecture() as cur:
+            cur.execute(f"""
+                SELECT c.id, c.nom,
+                       COALESCE(s.solde, 0), COALESCE(s.nb_mouvements, 0),
+                       COALESCE(j.solde, 0), COALESCE(j.nb, 0)
+                FROM caisses c
+                LEFT JOIN soldes_caisses s ON s.caisse_id = c.id
+                LEFT JOIN (
+                    SELECT m.caisse_id, SUM({_MONTANT_SIGNE.format(t="m")}) AS solde,
+                           COUNT(*) AS nb
+                    FROM mouvements_caisse m
+                    GROUP BY m.caisse_id
+                ) j ON j.caisse_id = c.id
+                ORDER BY c.id
+            """)
+            lignes = cur.fetchall()
+
+            # dernière clôture de chaque caisse et somme des mouvements qu'elle couvre
+            cur.execute(f"""
+                SELECT cl.caisse_id, cl.date_cloture, cl.solde_cloture,
+                       (SELECT COALESCE(SUM({_MONTANT_SIGNE.format(t="m")}), 0)
+                        FROM mouvements_caisse m
+                        WHERE m.caisse_id = cl.caisse_id
+                          AND m.id <= cl.dernier_mouvement_id
+                          AND m.date_mouvement < date(cl.date_cloture, '+1 day'))
+                FROM clotures_caisse cl
+                WHERE cl.date_cloture = (SELECT MAX(date_cloture) FROM clotures_caisse
+                                         WHERE caisse_id = cl.caisse_id)
+            """)
+            dernieres = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+
+            # clôtures qui n'ouvrent pas au solde de clôture précédent
+            cur.execute("""
+                SELECT caisse_id, COUNT(*) FROM (
+                    SELECT caisse_id,
+                           solde_ouverture - LAG(solde_cloture, 1, 0)
+                               OVER (PARTITION BY caisse_id ORDER BY date_cloture) AS saut
+                    FROM clotures_caisse
+                )
+                WHERE ABS(saut) > ?
+                GROUP BY caisse_id
+            """, (tolerance,))
+            ruptures = {row[0]: row[1] for row in cur.fetchall()}
+
+        rapport = []
+        for cid, nom, solde, nb, solde_calcule, nb_calcule in lignes:
+            ecart = float(solde) - float(solde_calcule)
+            date_cloture, solde_cloture, cloture_calcule = dernieres.get(cid, (None, None, None))
+            ecart_cloture = (float(solde_cloture) - float(cloture_calcule)
+                             if date_cloture is not None else 0.0)
+            rapport.append({
+                "caisse_id": cid,
+                "nom": nom,
+                "solde": float(solde),
+                "solde_calcule": float(solde_calcule),
+                "ecart": ecart,
+                "nb_mouvements": nb,
+                "nb_calcule": nb_calcule,
+                "derniere_cloture": date_cloture,
+                "solde_cloture": None if solde_cloture is None else float(solde_cloture),
+                "solde_cloture_calcule": None if cloture_calcule is None else float(cloture_calcule),
+                "ecart_cloture": ecart_cloture,
+                "ruptures_cloture": ruptures.get(cid, 0),
+                "derive": (abs(ecart) > tolerance or nb != nb_calcule
+                           or abs(ecart_cloture) > tolerance or cid in ruptures),
+            })
+
+        if corriger:
+            with self.transaction("soldes_caisses") as cur:
+                _recalculer_soldes_caisses(cur)
+        return rapport
+
+    # ============================================================
+    # CLÔTURES DE CAISSE (RAPPORT Z)
+    # ============================================================
+
+    def cloturer_journee(self, jour=None, caisse_id=None):
+        """
+        Clôture la journée (par défaut aujourd'hui) pour une caisse ou pour
+        toutes : un instantané par caisse avec solde d'ouverture (= solde de
+        la clôture précédente), entrées, sorties, solde de clôture, nombre de
+        mouvements et de ventes. Seuls les mouvements postérieurs à la
+        clôture précédente sont lus (un seul commit pour toutes les caisses).
+
+        Une clôture compte les mouvements et ventes datés jusqu'à ce jour et
+        non encore comptés, et retient le dernier identifiant de chacun
+        (dernier_mouvement_id, derniere_vente_id) : une ligne saisie après
+        coup pour un jour déjà clôturé est comptée dans la clôture suivante,
+        comme sur un ticket Z. La chaîne des soldes de clôture reste ainsi
+        égale au solde de la caisse.
+
+        Une caisse déjà clôturée à cette date (ou plus tard) est ignorée.
+        Retourne la liste des clôtures créées (voir get_cloture).
+        """
+        jour = str(date_vers_iso(jour or datetime.now().strftime(FORMAT_DATE)))[:10]
+        if jour > datetime.now().strftime(FORMAT_DATE):
+            raise ValueError("Impossible de clôturer une journée future.")
+        fin = _jour_suivant(jour)
+
+        if caisse_id:
+            caisses = [caisse_id]
+        else:
+            caisses = [row["id"] for row in self.get_caisses()]
+
+        ids = []
+        with self.transaction("clotures_caisse") as cur:
+            # écritures sérialisées : aucune ligne ne peut s'intercaler d'ici le commit
+            dernier_mouvement = cur.execute("SELECT COALESCE(MAX(id), 0) FROM mouvements_caisse").fetchone()[0]
+            derniere_vente = cur.execute("SELECT COALESCE(MAX(id), 0) FROM ventes").fetchone()[0]
+            for cid in caisses:
+                precedente = self.get_derniere_cloture(cid)
+                if precedente and precedente["date_cloture"] >= jour:
+                    continue
+                if precedente:
+                    debut = _jour_suivant(precedente["date_cloture"])
+                    ouverture = float(precedente["solde_cloture"])
+                else:
+                    debut, ouverture = None, 0.0
+
+                t = self._totaux_periode_caisse(cid, None, fin, precedente=precedente,
+                                                plafond=(dernier_mouvement, derniere_vente))
+                cur.execute("""
+                    INSERT INTO clotures_caisse
+                    (caisse_id, date_debut, date_cloture, date_heure,
+                     solde_ouverture, total_entrees, total_sorties, solde_cloture,
+                     nb_mouvements, nb_ventes, dernier_mouvement_id, derniere_vente_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    cid, debut, jour, datetime.now().strftime(FORMAT_DATE_HEURE),
+                    ouverture, t["total_entrees"], t["total_sorties"],
+                    ouverture + t["total_entrees"] - t["total_sorties"],
+                    t["nb_mouvements"], t["nb_ventes"], dernier_mouvement, derniere_vente,
+                ))
+                ids.append(cur.lastrowid)
+
+        return [self.get_cloture(i) for i in ids]
+
+    def get_cloture(self, cloture_id):
+        """Retourne une clôture (avec le nom de la caisse : caisse_nom) ou None."""
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT cl.*, c.nom AS caisse_nom
+                FROM clotures_caisse cl
+                JOIN caisses c ON c.id = cl.caisse_id
+                WHERE cl.id = ?
+            """, (cloture_id,))
+            return cur.fetchone()
+
+    def get_derniere_cloture(self, caisse_id):
+        """Retourne la clôture la plus récente d'une caisse, ou None."""
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT cl.*, c.nom AS caisse_nom
+                FROM clotures_caisse cl
+                JOIN caisses c ON c.id = cl.caisse_id
+                WHERE cl.caisse_id = ?
+                ORDER BY cl.date_cloture DESC
+                LIMIT 1
+            """, (caisse_id,))
+            return cur.fetchone()
+
+    def get_clotures(self, caisse_id=None, limite=None, apres=None):
+        """
+        Retourne les clôtures, les plus récentes d'abord (filtre facultatif
+        sur la caisse). Avec limite : retourne (page, curseur_suivant).
+        """
+        conditions = []
+        params = []
+        if caisse_id:
+            conditions.append("cl.caisse_id = ?")
+            params.append(caisse_id)
+        with self.lecture() as cur:
+            return _lire_liste(
+                cur,
+                "SELECT cl.*, c.nom AS caisse_nom FROM clotures_caisse cl "
+                "JOIN caisses c ON c.id = cl.caisse_id",
+                conditions, params, ("cl.date_cloture", "cl.id"),
+                limite=limite, apres=apres,
+            )
+
+    def get_resume_caisse(self, caisse_id, date_debut, date_fin):
+        """
+        Totaux d'une caisse sur une période (bornes incluses) :
+            {"total_entrees", "total_sorties", "solde_periode",
+             "nb_mouvements", "nb_ventes", "clotures"}
+        Les jours couverts par une clôture sont lus dans clotures_caisse ;
+        seuls les jours non clôturés (ou une clôture à cheval sur le début
+        de la période) sont recalculés à partir des mouvements.
+        Une clôture de la période compte telle quelle, avec les lignes saisies
+        après coup pour des jours antérieurs (comme son ticket Z).
+        "clotures" est le nombre de clôtures utilisées telles quelles.
+        """
+        debut, fin = _bornes_periode(date_debut, date_fin)
+        with self.lecture() as cur:
+            cur.execute("""
+                SELECT * FROM clotures_caisse
+                WHERE caisse_id = ? AND date_cloture >= ? AND date_cloture < ?
+                ORDER BY date_cloture
+            """, (caisse_id, debut, fin))
+            clotures = cur.fetchall()
+
+        if not clotures:
+            resume = self._totaux_periode_caisse(caisse_id, debut, fin)
+            resume["clotures"] = 0
+            resume["solde_periode"] = resume["total_entrees"] - resume["total_sorties"]
+            return resume
+
+        resume = {"total_entrees": 0.0, "total_sorties": 0.0,
+                  "nb_mouvements": 0, "nb_ventes": 0, "clotures": 0}
+
+        def ajouter(totaux):
+            for cle in ("total_entrees", "total_sorties", "nb_mouvements", "nb_ventes"):
+                resume[cle] += totaux[cle]
+
+        for cl in clotures:
+            if cl["date_debut"] is not None and cl["date_debut"] >= debut:
+                ajouter(cl)
+                resume["clotures"] += 1
+            else:
+                # à cheval sur le début : seulement ses lignes datées dans la période
+                ajouter(self._totaux_periode_caisse(
+                    caisse_id, debut, _jour_suivant(cl["date_cloture"]),
+                    plafond=(cl["dernier_mouvement_id"], cl["derniere_vente_id"]),
+                ))
+        # après la dernière clôture : lignes de la période qu'elle n'a pas comptées
+        ajouter(self._totaux_periode_caisse(caisse_id, debut, fin, precedente=clotures[-1]))
+
+        resume["solde_periode"] = resume["total_entrees"] - resume["total_sorties"]
+        return resume
+
+    def _totaux_periode_caisse(self, caisse_id, debut, fin_exclue, precedente=None, plafond=None):
+        """
+        Entrées, sorties, nombre de mouvements et de ventes d'une caisse
+        pour les dates >= debut (None = depuis l'origine) et < fin_exclue,
+        hors lignes déjà comptées par la clôture precedente, sans dépasser
+        plafond = (dernier_mouvement_id, derniere_vente_id). Voir _lignes_caisse.
+        """
+        plafond_mouvements, plafond_ventes = plafond or (None, None)
+        mouvements, params_mouvements = _lignes_caisse(
+            "mouvements_caisse", "date_mouvement", "type, montant", caisse_id, debut, fin_exclue,
+            precedente, "dernier_mouvement_id", plafond_mouvements,
+        )
+        ventes, params_ventes = _lignes_caisse(
+            "ventes", "date_heure", "id", caisse_id, debut, fin_exclue,
+            precedente, "derniere_vente_id", plafond_ventes,
+        )
+        with self.lecture() as cur:
+            cur.execute(f"""
+                SELECT COALESCE(SUM(CASE WHEN type = 'ENTREE' THEN montant END), 0),
+                       COALESCE(SUM(CASE WHEN type = 'SORTIE' THEN montant END), 0),
+                       COUNT(*)
+                FROM ({mouvements})
+            """, params_mouvements)
+            entrees, sorties, nb_mouvements = cur.fetchone()
+
+            cur.execute(f"SELECT COUNT(*) FROM ({ventes})", params_ventes)
+            nb_ventes = cur.fetchone()[0]
+
+        return {
+            "total_entrees": float(entrees or 0.0),
+            "total_sorties": float(sorties or 0.0),
+            "nb_mouvements": nb_mouvements,
+            "nb_ventes": nb_ventes,
+        }
 
     def close(self):
-        self.conn.close()
+        self._connexions.fermer()
 
 
 if __name__ == "__main__":
     db = Database()
     print("Base :", DEFAULT_DB_PATH)
-    print("Tables créées / vérifiées.")
+    print(f"Schéma : version {db.get_version_schema()} (attendue : {SCHEMA_VERSION})")
+    print(f"Profil de connexion : {db.profil_connexion} {db.get_pragmas()}")
     print("Clients  :", len(db.get_clients()))
     print("Tickets  :", len(db.get_tickets()))
     print("Créances :", len(db.get_creances()))
     print("Caisses  :", db.get_caisses())
+    corriger = "--corriger-soldes" in sys.argv[1:]
+    for r in db.reconcilier_soldes_caisses(corriger=corriger):
+        etat = "ÉCART" if r["derive"] else "OK"
+        print(f"  [{etat:5}] {r['nom']:25} solde {r['solde']:.2f} / "
+              f"mouvements {r['solde_calcule']:.2f} (écart {r['ecart']:+.2f})"
+              + (" -> corrigé" if corriger and r["derive"] else ""))
+        if r["derniere_cloture"]:
+            print(f"          clôture du {r['derniere_cloture']} : solde {r['solde_cloture']:.2f} / "
+                  f"mouvements couverts {r['solde_cloture_calcule']:.2f} "
+                  f"(écart {r['ecart_cloture']:+.2f}, ruptures de chaîne {r['ruptures_cloture']})")
     print("Mouvements de caisse :", len(db.get_mouvements_caisse()))
     produits = db.get_produits(uniquement_actifs=False)
     print("Produits :", len(produits))
     ventes = db.get_ventes()
     print("Ventes   :", len(ventes))
+    for t in db.get_totaux_ventes("mois")[-3:]:
+        print(f"  {t['periode'][:7]} : {t['nb_ventes']} ventes, {t['montant_total']:.2f} DA")
+    crees, supprimes = db.index_corriges
+    if crees or supprimes:
+        print(f"Index corrigés au démarrage : créés {crees or '-'}, supprimés {supprimes or '-'}")
+    manquants = db.verifier_index()
+    print("Index manquants :", manquants or "aucun")
+    for r in db.rapport_index():
+        etat = "SCAN" if r["scan"] else "OK"
+        print(f"  [{etat:4}] {r['requete']:35} -> {r['index'] or '-'}")
     db.close()
     print("OK.")
@@ -0,0 +1,342 @@
+# journal_requetes.py
+"""
+Instrumentation optionnelle de la base : durée de chaque requête et de
+chaque appel de méthode de Database.
+
+Activée par settings.json ("db_requetes_lentes_ms": seuil en ms) ou par la
+variable d'environnement RED_REQUETES_LENTES_MS (prioritaire) :
+  - chaque requête (execute, executemany, executescript) est mesurée, de
+    l'exécution jusqu'à la dernière ligne lue, avec la forme de ses
+    paramètres (types seulement : pas de noms de clients ni de montants
+    dans le journal) et le nombre de lignes lues ou modifiées,
+  - celles qui dépassent le seuil sont écrites dans un fichier journal
+    tournant (requetes_lentes.log, TAILLE_MAX_JOURNAL x NB_JOURNAUX),
+  - chaque appel d'une méthode publique de Database est chronométré ;
+    rapport() donne l'histogramme des durées par méthode et les requêtes
+    les plus coûteuses (écrit à la fermeture de l'application).
+
+Désactivée, rien ne change : Database garde une connexion sqlite3 normale.
+"""
+import bisect
+import functools
+import inspect
+import logging
+import logging.handlers
+import os
+import sqlite3
+import threading
+import time
+
+# Variable d'environnement : seuil (ms) des requêtes lentes, active le journal
+ENV_REQUETES_LENTES = "RED_REQUETES_LENTES_MS"
+SEUIL_DEFAUT_MS = 100.0
+
+TAILLE_MAX_JOURNAL = 1_000_000  # octets par fichier
+NB_JOURNAUX = 3                 # anciens fichiers conservés (.1, .2, .3)
+
+# Classes de l'histogramme (ms) : <1, 1-5, 5-20, 20-100, 100-500, >=500
+BORNES_HISTOGRAMME_MS = (1, 5, 20, 100, 500)
+_BORNES_S = tuple(b / 1000 for b in BORNES_HISTOGRAMME_MS)
+
+# Requêtes exécutées hors d'une méthode publique de Database (ouverture de
+# la base, requête écrite par une page dans db.lecture()...)
+HORS_METHODE = "(hors méthode publique)"
+
+# Méthodes publiques non chronométrées
+_NON_MESUREES = {"close", "transaction", "lecture"}
+
+
+def seuil_requetes_lentes(reglage=None):
+    """
+    Seuil (ms) du journal des requêtes, None s'il est désactivé.
+    reglage : valeur de settings.json ; RED_REQUETES_LENTES_MS l'emporte.
+    true (ou une valeur illisible) donne SEUIL_DEFAUT_MS.
+    """
+    valeur = os.environ.get(ENV_REQUETES_LENTES, reglage)
+    if valeur is None or valeur is False or valeur == "":
+        return None
+    if valeur is True:
+        return SEUIL_DEFAUT_MS
+    try:
+        return max(0.0, float(valeur))
+    except (TypeError, ValueError):
+        return SEUIL_DEFAUT_MS
+
+
+def forme_parametres(parametres):
+    """Types des paramètres d'une requête, sans leurs valeurs : "(int, str)"."""
+    if not parametres:
+        return "()"
+    if isinstance(parametres, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parametres.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in parametres) + ")"
+
+
+def _stats_vides():
+    return {"nombre": 0, "total": 0.0, "max": 0.0, "lignes": 0,
+            "histogramme": [0] * (len(_BORNES_S) + 1)}
+
+
+class CurseurJournalise(sqlite3.Cursor):
+    """Curseur dont chaque requête est mesurée puis transmise au journal de sa connexion."""
+
+    # [sql, forme, méthode, durée, lignes] de la requête dont les lignes
+    # sont encore en lecture
+    _en_cours = None
+
+    def execute(self, sql, parametres=()):
+        return self._executer(super().execute, sql, parametres, forme_parametres(parametres))
+
+    def executemany(self, sql, suite):
+        suite = list(suite)
+        forme = f"{len(suite)} x {forme_parametres(suite[0] if suite else ())}"
+        return self._executer(super().executemany, sql, suite, forme)
+
+    def executescript(self, script):
+        self._terminer()
+        journal = self.connection.journal
+        methode = journal.methode_courante()
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            journal.enregistrer(script, "script", methode, time.perf_counter() - t0, 0)
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        ligne = super().fetchone()
+        self._lues(t0, ligne is not None, ligne is None)
+        return ligne
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        lignes = super().fetchmany(self.arraysize if size is None else size)
+        self._lues(t0, len(lignes), not lignes)
+        return lignes
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        lignes = super().fetchall()
+        self._lues(t0, len(lignes), True)
+        return lignes
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        try:
+            ligne = super().__next__()
+        except StopIteration:
+            self._lues(t0, 0, True)
+            raise
+        self._lues(t0, 1, False)
+        return ligne
+
+    def close(self):
+        self._terminer()
+        super().close()
+
+    def __del__(self):
+        # curseur abandonné avant la dernière ligne (ex. execute(...).fetchone())
+        try:
+            self._terminer()
+        except Exception:
+            pass
+
+    def _executer(self, executer, sql, parametres, forme):
+        self._terminer()
+        journal = self.connection.journal
+        methode = journal.methode_courante()
+        t0 = time.perf_counter()
+        try:
+            executer(sql, parametres)
+        except Exception:
+            journal.enregistrer(sql, forme, methode, time.perf_counter() - t0, 0)
+            raise
+        duree = time.perf_counter() - t0
+        if self.description is None:
+            # INSERT / UPDATE / DELETE... : rien à lire
+            journal.enregistrer(sql, forme, methode, duree, max(self.rowcount, 0))
+        else:
+            self._en_cours = [sql, forme, methode, duree, 0]
+        return self
+
+    def _lues(self, t0, nombre, fini):
+        en_cours = self._en_cours
+        if en_cours is None:
+            return
+        en_cours[3] += time.perf_counter() - t0
+        en_cours[4] += nombre
+        if fini:
+            self._terminer()
+
+    def _terminer(self):
+        en_cours, self._en_cours = self._en_cours, None
+        if en_cours is not None:
+            self.connection.journal.enregistrer(*en_cours)
+
+
+class ConnexionJournalisee(sqlite3.Connection):
+    """Connexion dont les curseurs (y compris ceux de conn.execute) sont des CurseurJournalise."""
+
+    journal = None
+
+    def cursor(self, factory=CurseurJournalise):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametres=()):
+        return self.cursor().execute(sql, parametres)
+
+    def executemany(self, sql, suite):
+        return self.cursor().executemany(sql, suite)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+class JournalRequetes:
+    """
+    Durées des requêtes et des méthodes de Database, partagé par toutes
+    les connexions ouvertes avec connecter() (thread Tk et thread de
+    lecture, voir ui/taches_db.py).
+
+    fichier : journal des requêtes lentes (sortie d'erreur si None).
+    seuil_ms : durée à partir de laquelle une requête y est écrite.
+    """
+
+    def __init__(self, fichier=None, seuil_ms=SEUIL_DEFAUT_MS):
+        self.fichier = fichier
+        self.seuil = seuil_ms / 1000
+        self.methodes = {}    # méthode -> durées de ses appels
+        self.requetes = {}    # méthode -> durées des requêtes qu'elle a exécutées
+        self.sql = {}         # texte SQL -> durées
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+
+        # Logger propre au journal (pas de propagation vers la racine)
+        self._log = logging.Logger("red.requetes", logging.INFO)
+        if fichier is None:
+            self._gestionnaire = logging.StreamHandler()
+        else:
+            self._gestionnaire = logging.handlers.RotatingFileHandler(
+                fichier, maxBytes=TAILLE_MAX_JOURNAL, backupCount=NB_JOURNAUX,
+                encoding="utf-8", delay=True,
+            )
+        self._gestionnaire.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self._log.addHandler(self._gestionnaire)
+
+    # ----------------------------------------------------------
+    # BRANCHEMENT
+    # ----------------------------------------------------------
+
+    def connecter(self, chemin, **options):
+        """
+        Ouvre une connexion SQLite dont toutes les requêtes sont mesurées
+        (options : arguments de sqlite3.connect, check_same_thread...).
+        """
+        conn = sqlite3.connect(chemin, factory=ConnexionJournalisee, **options)
+        conn.journal = self
+        return conn
+
+    def instrumenter(self, db):
+        """Chronomètre les méthodes publiques de db (sur l'instance)."""
+        for nom, _fonction in inspect.getmembers(type(db), inspect.isfunction):
+            if not nom.startswith("_") and nom not in _NON_MESUREES:
+                setattr(db, nom, self.envelopper(nom, getattr(db, nom)))
+
+    def envelopper(self, nom, methode):
+        """methode chronométrée ; les requêtes qu'elle exécute lui sont attribuées."""
+        local = self._local
+
+        @functools.wraps(methode)
+        def mesuree(*args, **kwargs):
+            pile = local.__dict__.setdefault("pile", [])
+            pile.append(nom)
+            t0 = time.perf_counter()
+            try:
+                return methode(*args, **kwargs)
+            finally:
+                duree = time.perf_counter() - t0
+                pile.pop()
+                self._ajouter(self.methodes, nom, duree, 0)
+
+        return mesuree
+
+    def methode_courante(self):
+        """Méthode de Database en cours sur ce thread (la plus interne)."""
+        pile = getattr(self._local, "pile", None)
+        return pile[-1] if pile else HORS_METHODE
+
+    # ----------------------------------------------------------
+    # MESURES
+    # ----------------------------------------------------------
+
+    def enregistrer(self, sql, forme, methode, duree, lignes):
+        """Ajoute une requête terminée aux statistiques (et au journal si lente)."""
+        self._ajouter(self.requetes, methode, duree, lignes)
+        self._ajouter(self.sql, sql, duree, lignes)
+        if duree >= self.seuil:
+            self._log.warning("%.1f ms | %s | %d ligne(s) | %s | %s",
+                              duree * 1000, methode, lignes, forme, _compacter(sql))
+
+    def _ajouter(self, table, cle, duree, lignes):
+        with self._verrou:
+            stats = table.get(cle)
+            if stats is None:
+                stats = table[cle] = _stats_vides()
+            stats["nombre"] += 1
+            stats["total"] += duree
+            stats["lignes"] += lignes
+            if duree > stats["max"]:
+                stats["max"] = duree
+            stats["histogramme"][bisect.bisect_right(_BORNES_S, duree)] += 1
+
+    # ----------------------------------------------------------
+    # RAPPORT
+    # ----------------------------------------------------------
+
+    def rapport(self, nb_requetes=15):
+        """Histogramme des durées par méthode, puis les requêtes au temps total le plus élevé."""
+        with self._verrou:
+            methodes = {nom: dict(s) for nom, s in self.methodes.items()}
+            requetes = {nom: dict(s) for nom, s in self.requetes.items()}
+            sql = sorted(self.sql.items(), key=lambda e: e[1]["total"], reverse=True)
+
+        # requêtes hors méthode : comptées comme une "méthode" de plus
+        if HORS_METHODE in requetes:
+            methodes[HORS_METHODE] = requetes[HORS_METHODE]
+
+        classes = ["<1"] + [f"{a}-{b}" for a, b in zip(BORNES_HISTOGRAMME_MS, BORNES_HISTOGRAMME_MS[1:])]
+        classes.append(f">={BORNES_HISTOGRAMME_MS[-1]}")
+        lignes = [
+            f"Méthodes de Database (durées en ms, seuil du journal : {self.seuil * 1000:g} ms)",
+            f"  {'méthode':30} {'appels':>7} {'total':>10} {'moy.':>8} {'max':>8} "
+            + " ".join(f"{c:>7}" for c in classes)
+            + f" {'requêtes':>9} {'lignes':>9}",
+        ]
+        for nom, s in sorted(methodes.items(), key=lambda e: e[1]["total"], reverse=True):
+            r = requetes.get(nom, _stats_vides())
+            lignes.append(
+                f"  {nom:30} {s['nombre']:7} {s['total'] * 1000:10.1f} "
+                f"{s['total'] * 1000 / s['nombre']:8.2f} {s['max'] * 1000:8.1f} "
+                + " ".join(f"{n:7}" for n in s["histogramme"])
+                + f" {r['nombre']:9} {r['lignes']:9}"
+            )
+
+        lignes.append("")
+        lignes.append("Requêtes les plus coûteuses (temps total, ms)")
+        lignes.append(f"  {'nombre':>7} {'total':>10} {'max':>8} {'lignes':>9}  requête")
+        for texte, s in sql[:nb_requetes]:
+            lignes.append(f"  {s['nombre']:7} {s['total'] * 1000:10.1f} {s['max'] * 1000:8.1f} "
+                          f"{s['lignes']:9}  {_compacter(texte)[:100]}")
+        return "\n".join(lignes)
+
+    def terminer(self):
+        """Écrit le rapport dans le journal, le ferme et retourne le rapport."""
+        texte = self.rapport()
+        self._log.info("Fin de session\n%s", texte)
+        self._gestionnaire.close()
+        return texte
+
+
+def _compacter(sql):
+    """Requête sur une ligne (espaces et retours à la ligne réduits)."""
+    return " ".join(sql.split())
@@ -1,8 +1,18 @@
-from ui.app import Application
+import os
+import sys
+import time
+
+DEBUT = time.perf_counter()
+
+from ui.app import Application  # noqa: E402
 
 
 def main():
-    app = Application()
+    # Mesure du démarrage : python main.py --mesure-demarrage
+    # (ou variable d'environnement RED_MESURE_DEMARRAGE=1) ; la fenêtre se
+    # ferme dès qu'elle est affichée, après impression des durées.
+    mesure = "--mesure-demarrage" in sys.argv[1:] or bool(os.environ.get("RED_MESURE_DEMARRAGE"))
+    app = Application(mesure_demarrage=DEBUT if mesure else None)
     app.run()
 
 
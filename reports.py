@@ -0,0 +1,271 @@
+# reports.py
+"""
+Analyses des ventes, calculées en NumPy sur des tableaux colonnes.
+
+Les lignes de vente (details_ventes + date de la vente) sont lues en une
+seule requête dans un DonneesVentes ; chaque analyse est ensuite un calcul
+vectorisé sur ces colonnes (bincount, cumsum...), sans boucle Python par
+ligne :
+  - chiffre_affaires_par_produit : CA et quantités par produit,
+  - marges_par_produit           : marge avec produits.prix_achat,
+  - classement_abc               : classes A / B / C selon la part du CA,
+  - moyenne_mobile               : CA journalier et sa moyenne glissante,
+  - carte_horaire                : jour de la semaine x heure de la journée.
+
+NumPy n'est nécessaire que pour ce module : sans lui, le reste de
+l'application fonctionne et charger_ventes lève NumPyManquant.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy absent : analyses indisponibles
+    np = None
+
+from database import date_vers_iso
+
+JOURS_SEMAINE = ("Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche")
+
+# Part cumulée du chiffre d'affaires qui délimite les classes A et B
+SEUILS_ABC = (0.80, 0.95)
+
+
+class NumPyManquant(RuntimeError):
+    """NumPy n'est pas installé (pip install numpy)."""
+
+
+def _verifier_numpy():
+    if np is None:
+        raise NumPyManquant("Les analyses de ventes nécessitent NumPy (pip install numpy).")
+
+
+class DonneesVentes:
+    """
+    Lignes de vente en colonnes (un tableau NumPy par colonne, même longueur) :
+      - produit_id   : int64, 0 pour un article saisi à la main,
+      - quantite     : float64,
+      - montant      : float64 (sous_total de la ligne),
+      - jour         : datetime64[D], jour de la vente,
+      - heure        : int8, 0..23,
+      - jour_semaine : int8, 0 = lundi .. 6 = dimanche.
+    cout_unitaire[pid] est le prix d'achat du produit pid, noms[pid] son nom.
+    """
+
+    def __init__(self, produit_id, quantite, montant, jour, heure, jour_semaine,
+                 cout_unitaire=None, noms=None):
+        _verifier_numpy()
+        self.produit_id = np.asarray(produit_id, dtype=np.int64)
+        self.quantite = np.asarray(quantite, dtype=np.float64)
+        self.montant = np.asarray(montant, dtype=np.float64)
+        self.jour = np.asarray(jour, dtype="datetime64[D]")
+        self.heure = np.asarray(heure, dtype=np.int8)
+        self.jour_semaine = np.asarray(jour_semaine, dtype=np.int8)
+        # cout_unitaire couvre tous les produit_id présents (0 si inconnu)
+        taille = int(self.produit_id.max()) + 1 if len(self.produit_id) else 1
+        cout = np.zeros(taille) if cout_unitaire is None else np.asarray(cout_unitaire, dtype=np.float64)
+        if len(cout) < taille:
+            cout = np.concatenate((cout, np.zeros(taille - len(cout))))
+        self.cout_unitaire = cout
+        self.noms = noms or {}
+
+    def __len__(self):
+        return len(self.produit_id)
+
+
+def _lignes(cur, sql, params, champs):
+    """
+    Exécute la requête et remplit directement un tableau NumPy structuré
+    (un champ par colonne, champs = [(nom, dtype), ...]) en parcourant le
+    curseur : ni liste de tuples intermédiaire, ni passage par du texte.
+    """
+    cur.execute(sql, params)
+    return np.fromiter(cur, dtype=champs)
+
+
+def charger_ventes(db, date_debut=None, date_fin=None):
+    """
+    Lit toutes les lignes de vente (filtre facultatif sur la période, bornes
+    incluses) et les prix d'achat des produits, colonne par colonne.
+    SQLite ne renvoie que des nombres (date de la vente en secondes Unix) ;
+    jour, heure et jour de la semaine sont découpés par NumPy, une fois par
+    vente et non par ligne.
+
+    La lecture reste bornée par SQLite, qui rend les lignes une à une :
+    mesuré à environ 1,3 s pour 1 000 000 de lignes et 0,3 s pour 200 000
+    (benchmarks/analyse_ventes --base), dont 0,8 s par million de lignes
+    pour le seul parcours de details_ventes. L'objectif de moins d'une
+    seconde n'est tenu que par les analyses, pas par ce chargement.
+    """
+    _verifier_numpy()
+    conditions, params = [], []
+    if date_debut and date_fin:
+        conditions.append("v.date_heure >= ? AND v.date_heure < date(?, '+1 day')")
+        params.extend([str(date_vers_iso(date_debut))[:10], str(date_vers_iso(date_fin))[:10]])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # sans période, pas de jointure : les lignes sont lues dans l'ordre de la table
+    filtre_lignes = f"WHERE d.vente_id IN (SELECT v.id FROM ventes v {where})" if conditions else ""
+
+    with db.lecture() as cur:
+        cur.row_factory = None
+        lignes = _lignes(cur, f"""
+            SELECT d.vente_id, COALESCE(d.produit_id, 0), d.quantite, d.sous_total
+            FROM details_ventes d
+            {filtre_lignes}
+        """, params, [("vente_id", np.int64), ("produit_id", np.int64),
+                      ("quantite", np.float64), ("montant", np.float64)])
+        ventes = _lignes(cur, f"""
+            SELECT v.id, CAST(strftime('%s', v.date_heure) AS INTEGER)
+            FROM ventes v
+            {where}
+            ORDER BY v.id
+        """, params, [("id", np.int64), ("secondes", np.int64)])
+
+        cur.execute("SELECT id, nom, prix_achat FROM produits")
+        produits = cur.fetchall()
+
+    # position de la vente de chaque ligne (ids des ventes triés) ; une ligne
+    # dont la vente n'existe plus est ignorée, comme le faisait la jointure
+    ids_ventes = ventes["id"]
+    position = np.searchsorted(ids_ventes, lignes["vente_id"])
+    if len(ids_ventes):
+        position = np.minimum(position, len(ids_ventes) - 1)
+        trouvees = ids_ventes[position] == lignes["vente_id"]
+    else:
+        trouvees = np.zeros(len(lignes), dtype=bool)
+    if not trouvees.all():
+        lignes, position = lignes[trouvees], position[trouvees]
+
+    jours = ventes["secondes"] // 86400
+    heures = (ventes["secondes"] % 86400) // 3600
+
+    cout_unitaire = np.zeros(max([p[0] for p in produits], default=0) + 1)
+    for pid, _nom, prix_achat in produits:
+        cout_unitaire[pid] = float(prix_achat or 0.0)
+
+    return DonneesVentes(
+        # copies contiguës : les analyses parcourent chaque colonne seule
+        produit_id=np.ascontiguousarray(lignes["produit_id"]),
+        quantite=np.ascontiguousarray(lignes["quantite"]),
+        montant=np.ascontiguousarray(lignes["montant"]),
+        jour=jours[position].astype("datetime64[D]"),
+        heure=heures[position],
+        # 1970-01-01 était un jeudi -> 0 = lundi
+        jour_semaine=(jours[position] + 3) % 7,
+        cout_unitaire=cout_unitaire,
+        noms={p[0]: p[1] for p in produits},
+    )
+
+
+def chiffre_affaires_par_produit(donnees):
+    """
+    Retourne {"produit_id", "quantite", "chiffre_affaires"} (tableaux),
+    trié par chiffre d'affaires décroissant. Les articles manuels
+    (produit_id 0) sont exclus.
+    """
+    _verifier_numpy()
+    taille = len(donnees.cout_unitaire)
+    ca = np.bincount(donnees.produit_id, weights=donnees.montant, minlength=taille)
+    quantite = np.bincount(donnees.produit_id, weights=donnees.quantite, minlength=taille)
+    vendus = np.flatnonzero(np.bincount(donnees.produit_id, minlength=taille))
+    vendus = vendus[vendus != 0]
+
+    ordre = np.argsort(-ca[vendus], kind="stable")
+    ids = vendus[ordre]
+    return {
+        "produit_id": ids,
+        "quantite": quantite[ids],
+        "chiffre_affaires": ca[ids],
+    }
+
+
+def marges_par_produit(donnees):
+    """
+    Comme chiffre_affaires_par_produit, avec en plus :
+      - "cout"      : quantité x prix d'achat,
+      - "marge"     : chiffre d'affaires - coût,
+      - "taux_marge": marge / chiffre d'affaires (0 si CA nul).
+    """
+    resultat = chiffre_affaires_par_produit(donnees)
+    ca = resultat["chiffre_affaires"]
+    cout = resultat["quantite"] * donnees.cout_unitaire[resultat["produit_id"]]
+    marge = ca - cout
+    resultat["cout"] = cout
+    resultat["marge"] = marge
+    resultat["taux_marge"] = np.divide(marge, ca, out=np.zeros_like(marge), where=ca != 0)
+    return resultat
+
+
+def classement_abc(chiffre_affaires, seuils=SEUILS_ABC):
+    """
+    Classe chaque valeur selon la part cumulée du total (valeurs triées
+    par ordre décroissant) : "A" jusqu'à seuils[0], "B" jusqu'à seuils[1],
+    "C" au-delà. Retourne un tableau de "A" / "B" / "C" dans l'ordre d'entrée.
+    """
+    _verifier_numpy()
+    ca = np.asarray(chiffre_affaires, dtype=np.float64)
+    classes = np.full(len(ca), "C", dtype="<U1")
+    total = ca.sum()
+    if total <= 0:
+        return classes
+
+    ordre = np.argsort(-ca, kind="stable")
+    # part cumulée AVANT chaque produit : le produit qui franchit le seuil reste en A
+    part_avant = (np.cumsum(ca[ordre]) - ca[ordre]) / total
+    classes_triees = np.where(part_avant < seuils[0], "A",
+                              np.where(part_avant < seuils[1], "B", "C"))
+    classes[ordre] = classes_triees
+    return classes
+
+
+def moyenne_mobile(donnees, fenetre=7):
+    """
+    Chiffre d'affaires par jour (jours sans vente compris, à 0) et sa
+    moyenne mobile sur `fenetre` jours (NaN tant que la fenêtre n'est pas pleine).
+    Retourne {"jour", "chiffre_affaires", "moyenne"}.
+    """
+    _verifier_numpy()
+    if not len(donnees):
+        vide = np.array([], dtype=np.float64)
+        return {"jour": np.array([], dtype="datetime64[D]"),
+                "chiffre_affaires": vide, "moyenne": vide}
+
+    premier = donnees.jour.min()
+    decalage = (donnees.jour - premier).astype(np.int64)
+    ca = np.bincount(decalage, weights=donnees.montant)
+    jours = premier + np.arange(len(ca))
+
+    cumul = np.concatenate(([0.0], np.cumsum(ca)))
+    moyenne = np.full(len(ca), np.nan)
+    if len(ca) >= fenetre:
+        moyenne[fenetre - 1:] = (cumul[fenetre:] - cumul[:-fenetre]) / fenetre
+    return {"jour": jours, "chiffre_affaires": ca, "moyenne": moyenne}
+
+
+def carte_horaire(donnees, valeur="montant"):
+    """
+    Matrice 7 x 24 (lundi..dimanche x 0h..23h) :
+    valeur="montant" -> chiffre d'affaires, "lignes" -> nombre de lignes vendues.
+    """
+    _verifier_numpy()
+    if valeur not in ("montant", "lignes"):
+        raise ValueError("valeur doit être 'montant' ou 'lignes'")
+    case = donnees.jour_semaine.astype(np.int64) * 24 + donnees.heure
+    poids = donnees.montant if valeur == "montant" else None
+    return np.bincount(case, weights=poids, minlength=7 * 24)[:7 * 24].reshape(7, 24)
+
+
+if __name__ == "__main__":
+    from database import Database
+
+    db = Database()
+    donnees = charger_ventes(db)
+    print(f"Lignes de vente : {len(donnees)}")
+    if len(donnees):
+        marges = marges_par_produit(donnees)
+        classes = classement_abc(marges["chiffre_affaires"])
+        for i in range(min(10, len(marges["produit_id"]))):
+            pid = int(marges["produit_id"][i])
+            print(f"  [{classes[i]}] {donnees.noms.get(pid, pid)!s:30} "
+                  f"CA {marges['chiffre_affaires'][i]:10.2f}  marge {marges['marge'][i]:10.2f}")
+        carte = carte_horaire(donnees)
+        jour, heure = np.unravel_index(np.argmax(carte), carte.shape)
+        print(f"Créneau le plus fort : {JOURS_SEMAINE[jour]} {heure}h")
+    db.close()
@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import time
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox, ttk, simpledialog, filedialog
@@ -8,22 +9,44 @@ from datetime import datetime
 
 import customtkinter as ctk
 
-from database import Database
-from .dialogs import CreditClientDialog, ManualProductDialog, AchatDialog, VenteDialog
-from .pages.depot import DepotPage
-from .pages.historique import HistoriquePage
-from .pages.caisses_historique import CaisseHistoriquePage
-from .pages.occasion import OccasionPage
+from database import Database, TAILLE_PAGE
+from journal_requetes import JournalRequetes, seuil_requetes_lentes
+from .formatage import formater_date
+from .taches_db import ExecuteurDB, afficher_chargement, masquer_chargement
+from .surveillance_boucle import SurveillanceBoucle, seuil_blocage
+from .treeview_virtuel import TreeviewVirtuel
+from .recherche_live import RechercheLive, champs_produit
+from .synchro_tree import synchroniser_tree
 from . import custom_messagebox  # si tu l'utilises pour tes popups perso
 
 
+# Tables lues par chaque page : show_<page> ne relit rien tant que leur
+# génération (Database.generation) n'a pas changé depuis la dernière lecture.
+TABLES_PAGES = {
+    "depot": ("tickets_reparation",),
+    "historique": ("tickets_reparation", "occasion_achats", "ventes", "details_ventes"),
+    "caisses": ("caisses", "soldes_caisses", "mouvements_caisse"),
+    "reception": ("tickets_reparation",),
+    "creances": ("creances_dettes",),
+    "produits": ("produits",),
+    "vente": ("produits",),
+    "occasion": ("occasion_achats",),
+}
+
+
 class Application:
-    def __init__(self):
+    def __init__(self, mesure_demarrage=None):
+        """
+        mesure_demarrage : instant (time.perf_counter) du lancement du
+        programme. S'il est donné, les durées du démarrage sont affichées
+        dès que la fenêtre apparaît, puis l'application se ferme.
+        """
+        self.mesure_demarrage = mesure_demarrage
+        self.temps_demarrage = [("imports", time.perf_counter())]
+
         ctk.set_appearance_mode("light")
         ctk.set_default_color_theme("blue")
 
-        self.db = Database()
-
         # ---------- FICHIER DE PARAMÈTRES ----------
         self.base_dir = Path(__file__).resolve().parents[1]
 
@@ -48,10 +71,24 @@ class Application:
         self.store_logo_path = None  # chemin complet vers un logo optionnel
         self.admin_password = ""     # mot de passe admin (texte simple)
         self.admin_authenticated = False  # True après login réussi, pour la session
+        self.db_profil = None   # profil de connexion SQLite (None = profil par défaut)
+        self.db_pragmas = {}    # PRAGMA qui surchargent ceux du profil
+        self.db_requetes_lentes_ms = None   # seuil du journal des requêtes (None = désactivé)
+        self.ui_blocage_ms = None           # seuil des blocages de la fenêtre (None = défaut, 0 = désactivé)
 
         # Charger les paramètres sauvés (si le fichier existe)
         self._load_settings()
 
+        # Journal des requêtes lentes + temps par méthode (optionnel, voir journal_requetes.py)
+        seuil = seuil_requetes_lentes(self.db_requetes_lentes_ms)
+        self.journal_requetes = None
+        if seuil is not None:
+            self.journal_requetes = JournalRequetes(self.data_dir / "requetes_lentes.log", seuil)
+
+        self.db = Database(profil=self.db_profil, pragmas=self.db_pragmas,
+                           journal=self.journal_requetes)
+        self._etape_demarrage("paramètres + base")
+
         self.root = ctk.CTk()
         self.root.title("Red - Gestion du magasin de téléphonie")
         self.root.geometry("1100x700")
@@ -60,6 +97,15 @@ class Application:
         except Exception:
             pass
 
+        # Lectures lourdes exécutées hors du thread Tk (connexion dédiée)
+        self.executeur_db = ExecuteurDB(self.root, self.db)
+
+        # Blocages de la boucle Tk écrits dans blocages.log (démarrée à l'affichage)
+        self.surveillance = None
+        seuil = seuil_blocage(self.ui_blocage_ms)
+        if seuil is not None:
+            self.surveillance = SurveillanceBoucle(self.root, self.data_dir / "blocages.log", seuil)
+
         self.logo_image = None
         self.caisse_selectionnee_id = None
 
@@ -69,14 +115,61 @@ class Application:
 
         self.reception_ticket_id = None
 
+        self._etape_demarrage("fenêtre")
+
         self._build_header()
         self._build_pages()
         self.show_accueil()
+        self._etape_demarrage("accueil")
+
+        # <Map> de la fenêtre principale : elle est à l'écran
+        self._fenetre_affichee = False
+        self.root.bind("<Map>", self._on_fenetre_affichee, add="+")
+
+    # DÉMARRAGE ------------------------------------------------
+
+    def _etape_demarrage(self, nom):
+        self.temps_demarrage.append((nom, time.perf_counter()))
+
+    def _on_fenetre_affichee(self, event):
+        if event.widget is not self.root or self._fenetre_affichee:
+            return
+        self._fenetre_affichee = True
+        self._etape_demarrage("premier affichage")
+
+        # Scanner de la caisse : codes-barres servis depuis la mémoire.
+        # Chargé une fois la fenêtre visible (sans cache, un scan passe par SQLite).
+        self.root.after_idle(self.db.charger_cache_codes)
+
+        # mainloop tourne : le battement de la surveillance ne compte plus le démarrage
+        if self.surveillance is not None:
+            self.surveillance.demarrer()
+
+        if self.mesure_demarrage is not None:
+            self.afficher_temps_demarrage()
+            self.root.after_idle(self.root.destroy)
+
+    def afficher_temps_demarrage(self):
+        """Affiche la durée de chaque étape du démarrage et le temps jusqu'à la fenêtre."""
+        precedent = self.mesure_demarrage
+        if precedent is None:
+            precedent = self.temps_demarrage[0][1]
+        debut = precedent
+        print(f"{'étape':24} {'ms':>8}")
+        for nom, instant in self.temps_demarrage:
+            print(f"{nom:24} {(instant - precedent) * 1000:8.1f}")
+            precedent = instant
+        print(f"{'fenêtre affichée après':24} {(precedent - debut) * 1000:8.1f}")
 
     # PARAMÈTRES (fichier JSON) -------------------------------
 
     def _load_settings(self):
-        """Charge store_name, store_tel, store_logo_path, admin_password depuis settings.json."""
+        """
+        Charge store_name, store_tel, store_logo_path, admin_password depuis settings.json,
+        ainsi que le profil de connexion à la base (db_profil, db_pragmas) et
+        les seuils du journal des requêtes lentes (db_requetes_lentes_ms) et
+        des blocages de la fenêtre (ui_blocage_ms).
+        """
         if not self.settings_file.exists():
             return
         try:
@@ -89,6 +182,11 @@ class Application:
         self.store_tel = data.get("store_tel", self.store_tel)
         self.store_logo_path = data.get("store_logo_path") or None
         self.admin_password = data.get("admin_password", self.admin_password)
+        self.db_profil = data.get("db_profil") or None
+        if isinstance(data.get("db_pragmas"), dict):
+            self.db_pragmas = data["db_pragmas"]
+        self.db_requetes_lentes_ms = data.get("db_requetes_lentes_ms")
+        self.ui_blocage_ms = data.get("ui_blocage_ms")
         # à chaque démarrage, l'admin doit se reconnecter
         self.admin_authenticated = False
 
@@ -100,6 +198,15 @@ class Application:
             "store_logo_path": self.store_logo_path,
             "admin_password": self.admin_password,
         }
+        # Réglages de la base : conservés seulement s'ils ont été définis
+        if self.db_profil:
+            data["db_profil"] = self.db_profil
+        if self.db_pragmas:
+            data["db_pragmas"] = self.db_pragmas
+        if self.db_requetes_lentes_ms is not None:
+            data["db_requetes_lentes_ms"] = self.db_requetes_lentes_ms
+        if self.ui_blocage_ms is not None:
+            data["ui_blocage_ms"] = self.ui_blocage_ms
         try:
             with self.settings_file.open("w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
@@ -217,116 +324,135 @@ class Application:
     # PAGES ----------------------------------------------------
 
     def _build_pages(self):
+        """
+        Seule la page d'accueil est construite au démarrage : les autres le
+        sont à leur premier affichage (show_*), par _page().
+        """
         self.container = ctk.CTkFrame(self.root, fg_color="#e6ecff")
         self.container.pack(fill="both", expand=True)
 
         # Accueil
         self.page_accueil = ctk.CTkFrame(self.container, fg_color="#e6ecff")
+        self._build_page_accueil()
 
-        # Dépôt : page séparée
-        self.page_depot = DepotPage(self.container, self)
-
-        # Historique téléphones / clients : page séparée
-        self.page_historique = HistoriquePage(self.container, self)
-
-        # CAISSES : page avec en-tête + page CaisseHistorique à l'intérieur
-        self.page_caisses = ctk.CTkFrame(self.container, fg_color="white")
         self.page_caisse_histo = None  # créé dans _build_page_caisses
+        self._pages = {"accueil": self.page_accueil}
+        self._generations_pages = {}   # page -> génération de ses tables à la dernière lecture
+
+    def _page(self, nom):
+        """Retourne la page nom (self.page_<nom>), construite au premier appel."""
+        page = self._pages.get(nom)
+        if page is None:
+            page = self._creer_page(nom)
+            setattr(self, f"page_{nom}", page)
+            self._pages[nom] = page
+        return page
+
+    def _page_construite(self, nom):
+        return nom in self._pages
+
+    def _creer_page(self, nom):
+        # Pages séparées : module importé seulement quand on en a besoin
+        if nom == "depot":
+            from .pages.depot import DepotPage
+            return DepotPage(self.container, self)
+        if nom == "historique":
+            from .pages.historique import HistoriquePage
+            return HistoriquePage(self.container, self)
+        if nom == "occasion":
+            from .pages.occasion import OccasionPage
+            return OccasionPage(self.container, self)
+
+        # Pages gérées directement dans Application (caisses, paramètres,
+        # réception, créances, produits, vente) : _build_page_<nom>
+        page = ctk.CTkFrame(self.container, fg_color="white")
+        setattr(self, f"page_{nom}", page)
+        getattr(self, f"_build_page_{nom}")()
+        return page
+
+    def _afficher_page(self, nom):
+        page = self._page(nom)
+        self._forget_all_pages()
+        page.pack(fill="both", expand=True)
+        return page
 
-        # Paramètres : page gérée ici
-        self.page_parametres = ctk.CTkFrame(self.container, fg_color="white")
-
-        # Autres pages gérées directement dans Application
-        self.page_reception = ctk.CTkFrame(self.container, fg_color="white")
-        self.page_creances = ctk.CTkFrame(self.container, fg_color="white")
-        self.page_produits = ctk.CTkFrame(self.container, fg_color="white")
-        self.page_vente = ctk.CTkFrame(self.container, fg_color="white")
-
-        # NOUVELLE PAGE : achats de téléphones d'occasion
-        self.page_occasion = OccasionPage(self.container, self)
+    def _donnees_a_jour(self, nom):
+        """
+        True si la page nom affiche déjà la génération courante de ses
+        tables (rien à relire). Sinon, note cette génération : la page va
+        relire ses données, une écriture pendant la lecture la rendra
+        périmée au prochain affichage.
+        """
+        generation = self.db.generation(*TABLES_PAGES[nom])
+        if self._generations_pages.get(nom) == generation:
+            return True
+        self._generations_pages[nom] = generation
+        return False
 
-        self._build_page_accueil()
-        self._build_page_parametres()
-        self._build_page_reception()
-        self._build_page_creances()
-        self._build_page_caisses()
-        self._build_page_produits()
-        self._build_page_vente()
+    def page_a_relire(self, nom):
+        """La lecture de la page nom a échoué : elle sera relue au prochain affichage."""
+        self._generations_pages.pop(nom, None)
 
     def _forget_all_pages(self):
-        for p in [
-            self.page_accueil,
-            self.page_depot,
-            self.page_historique,
-            self.page_caisses,
-            self.page_parametres,
-            self.page_reception,
-            self.page_creances,
-            self.page_produits,
-            self.page_vente,
-            self.page_occasion,
-        ]:
+        for p in self._pages.values():
             p.pack_forget()
 
     def show_accueil(self):
-        self._forget_all_pages()
-        self.page_accueil.pack(fill="both", expand=True)
+        self._afficher_page("accueil")
 
     def show_depot(self):
-        self._forget_all_pages()
-        self.page_depot.pack(fill="both", expand=True)
-        self.page_depot.depot_charger_tickets()
+        page = self._afficher_page("depot")
+        if not self._donnees_a_jour("depot"):
+            page.depot_charger_tickets()
 
     def show_historique(self):
-        self._forget_all_pages()
-        self.page_historique.pack(fill="both", expand=True)
-        self.page_historique.charger_historique()
+        page = self._afficher_page("historique")
+        if not self._donnees_a_jour("historique"):
+            page.charger_historique()
 
     def show_caisse_historique(self):
         self.show_caisses()
 
     def show_parametres(self):
-        self._forget_all_pages()
-        self.page_parametres.pack(fill="both", expand=True)
+        self._afficher_page("parametres")
         self._param_charger_ui()
 
     def show_reception(self):
-        self._forget_all_pages()
-        self.page_reception.pack(fill="both", expand=True)
+        self._afficher_page("reception")
         self.reception_reset_form()
         self.reception_charger_caisses()
-        self.reception_charger_tickets()
+        if not self._donnees_a_jour("reception"):
+            self.reception_charger_tickets()
 
     def show_creances(self):
-        self._forget_all_pages()
-        self.page_creances.pack(fill="both", expand=True)
-        self.charger_creances()
+        self._afficher_page("creances")
+        if not self._donnees_a_jour("creances"):
+            self.charger_creances()
 
     def show_caisses(self):
-        self._forget_all_pages()
-        self.page_caisses.pack(fill="both", expand=True)
-        if self.page_caisse_histo is not None:
+        self._afficher_page("caisses")
+        if self.page_caisse_histo is not None and not self._donnees_a_jour("caisses"):
             if hasattr(self.page_caisse_histo, "charger_caisses"):
                 self.page_caisse_histo.charger_caisses()
             if hasattr(self.page_caisse_histo, "charger_historique"):
                 self.page_caisse_histo.charger_historique()
 
     def show_produits(self):
-        self._forget_all_pages()
-        self.page_produits.pack(fill="both", expand=True)
-        self.charger_produits()
+        self._afficher_page("produits")
+        if not self._donnees_a_jour("produits"):
+            self.charger_produits()
 
     def show_vente(self):
-        self._forget_all_pages()
-        self.page_vente.pack(fill="both", expand=True)
-        self.vente_actualiser_produits()
+        self._afficher_page("vente")
+        if not self._donnees_a_jour("vente"):
+            self.vente_actualiser_produits()
         self.vente_actualiser_caisses()
         self.vente_mettre_a_jour_affichage()
 
     def show_occasion(self):
-        self._forget_all_pages()
-        self.page_occasion.pack(fill="both", expand=True)
-        self.page_occasion.charger_achats()
+        page = self._afficher_page("occasion")
+        if not self._donnees_a_jour("occasion"):
+            page.charger_achats()
 
     # ACCUEIL --------------------------------------------------
 
@@ -641,7 +767,7 @@ class Application:
         ).grid(row=0, column=0, padx=5, pady=(5, 2), sticky="w")
 
         cols = ("id", "client", "tel", "tel_col", "date", "statut")
-        self.reception_tickets_tree = ttk.Treeview(left, columns=cols, show="headings", height=12)
+        self.reception_tickets_tree = TreeviewVirtuel(left, columns=cols, show="headings", height=12)
         self.reception_tickets_tree.heading("id", text="ID")
         self.reception_tickets_tree.heading("client", text="Client")
         self.reception_tickets_tree.heading("tel", text="Téléphone client")
@@ -802,29 +928,53 @@ class Application:
         self.rec_montant_restant_label.configure(text="0.00 DA")
 
     def reception_charger_tickets(self):
-        """Charge la liste des tickets 'En cours'."""
+        """
+        Charge la liste des tickets 'En cours', par pages de TAILLE_PAGE
+        (les plus récents d'abord) : la suite est lue en faisant défiler la liste.
+        """
         try:
-            rows = self.db.get_tickets(statut="En cours")
+            rows, suivant = self.db.get_tickets(statut="En cours", limite=TAILLE_PAGE)
         except Exception as e:
+            self.page_a_relire("reception")
             messagebox.showerror("Réception", f"Erreur lecture tickets : {e}", parent=self.root)
             return
 
-        self.reception_tickets_tree.delete(*self.reception_tickets_tree.get_children())
         self.reception_tickets_map = {}
+        # seules les lignes modifiées sont touchées (sélection et défilement gardés)
+        synchroniser_tree(self.reception_tickets_tree, self._reception_lignes(rows))
+        self._reception_suite(suivant)
 
+    def _reception_page_suivante(self, apres):
+        """Ajoute à la liste la page de tickets qui suit le curseur apres."""
+        try:
+            rows, suivant = self.db.get_tickets(statut="En cours", limite=TAILLE_PAGE, apres=apres)
+        except Exception as e:
+            messagebox.showerror("Réception", f"Erreur lecture tickets : {e}", parent=self.root)
+            return
+        for tid, valeurs in self._reception_lignes(rows):
+            if not self.reception_tickets_tree.exists(tid):
+                self.reception_tickets_tree.insert("", "end", iid=tid, values=valeurs)
+        self._reception_suite(suivant)
+
+    def _reception_suite(self, suivant):
+        # page suivante lue quand on arrive en bas de la liste
+        self.reception_tickets_tree.definir_chargement_suite(
+            (lambda: self._reception_page_suivante(suivant)) if suivant else None
+        )
+
+    def _reception_lignes(self, rows):
+        """Lignes (iid, valeurs) du Treeview, tickets notés dans reception_tickets_map."""
+        lignes = []
         for row in rows:
             tid = row["id"]
             client = row["client_nom"] or ""
             tel = row["client_tel"] or ""
             pc = (row["pc_marque"] or "") + ((" " + (row["pc_modele"] or "")) if row["pc_modele"] else "")
-            date_depot = row["date_depot"] or ""
+            date_depot = formater_date(row["date_depot"])
             statut = row["statut"] or ""
             self.reception_tickets_map[tid] = row
-            self.reception_tickets_tree.insert(
-                "",
-                "end",
-                values=(tid, client, tel, pc, date_depot, statut)
-            )
+            lignes.append((tid, (tid, client, tel, pc, date_depot, statut)))
+        return lignes
 
     def reception_charger_caisses(self):
         """Charge la liste des caisses dans le menu déroulant de la page Réception."""
@@ -895,7 +1045,7 @@ class Application:
         self.rec_pc_entry.insert(0, pc_txt)
 
         self.rec_date_depot_entry.delete(0, "end")
-        self.rec_date_depot_entry.insert(0, row["date_depot"] or "")
+        self.rec_date_depot_entry.insert(0, formater_date(row["date_depot"]))
 
         self.rec_diag_text.delete("1.0", "end")
         self.rec_diag_text.insert("1.0", row["diagnostic_initial"] or "")
@@ -1026,7 +1176,8 @@ class Application:
 
         self.reception_charger_tickets()
         self.reception_reset_form()
-        self.charger_creances()
+        if self._page_construite("creances"):
+            self.charger_creances()
 
     def reception_supprimer_ticket(self):
         """Marque le ticket sélectionné comme 'Annulé' (disparaît de Réception, reste en historique)."""
@@ -1048,11 +1199,11 @@ class Application:
             return
 
         try:
-            self.db.cursor.execute(
-                "UPDATE tickets_reparation SET statut = ? WHERE id = ?",
-                ("Annulé", self.reception_ticket_id)
-            )
-            self.db.conn.commit()
+            with self.db.transaction("tickets_reparation") as cur:
+                cur.execute(
+                    "UPDATE tickets_reparation SET statut = ? WHERE id = ?",
+                    ("Annulé", self.reception_ticket_id)
+                )
         except Exception as e:
             messagebox.showerror(
                 "Réception",
@@ -1106,7 +1257,7 @@ class Application:
         ).grid(row=0, column=0, padx=5, pady=(5, 2), sticky="w")
 
         cols = ("id", "client", "tel", "total", "paye", "reste", "date")
-        self.creances_tree = ttk.Treeview(left, columns=cols, show="headings", height=12)
+        self.creances_tree = TreeviewVirtuel(left, columns=cols, show="headings", height=12)
         self.creances_tree.heading("id", text="ID")
         self.creances_tree.heading("client", text="Client")
         self.creances_tree.heading("tel", text="Téléphone / Appareil")
@@ -1222,30 +1373,26 @@ class Application:
         self.creances_rows = {}                 # id -> row
 
     def charger_creances(self):
-        """Charge toutes les créances / dettes."""
+        """
+        Charge les créances / dettes par pages de TAILLE_PAGE (les plus
+        récentes d'abord) : la suite est lue en faisant défiler la liste.
+        """
         try:
-            rows = self.db.get_creances()
+            rows, suivant = self.db.get_creances(limite=TAILLE_PAGE)
         except Exception as e:
+            self.page_a_relire("creances")
             messagebox.showerror("Créances", f"Erreur lecture créances : {e}", parent=self.root)
             return
 
-        self.creances_tree.delete(*self.creances_tree.get_children())
         self.creances_rows = {}
+        # seules les lignes modifiées sont touchées (sélection et défilement gardés)
+        synchroniser_tree(self.creances_tree, self._creances_lignes(rows))
+        self._creances_suite(suivant)
 
-        for row in rows:
-            cid = row["id"]
-            client = row["client_nom"] or ""
-            pc = row["pc_marque"] or ""
-            total = float(row["montant_total"] or 0)
-            paye = float(row["montant_paye"] or 0)
-            reste = float(row["montant_restant"] or 0)
-            date = row["date_retrait"] or ""
-            self.creances_rows[cid] = row
-            self.creances_tree.insert(
-                "",
-                "end",
-                values=(cid, client, pc, f"{total:.2f}", f"{paye:.2f}", f"{reste:.2f}", date)
-            )
+        if self.creances_selected_id in self.creances_rows:
+            # créance toujours sélectionnée : détail relu (ex. après un paiement)
+            self.creances_on_select()
+            return
 
         self.creances_selected_id = None
         self.cre_client_label.configure(text="")
@@ -1256,6 +1403,39 @@ class Application:
         self.cre_reste_label.configure(text="0.00 DA")
         self.cre_paiement_entry.delete(0, "end")
 
+    def _creances_page_suivante(self, apres):
+        """Ajoute à la liste la page de créances qui suit le curseur apres."""
+        try:
+            rows, suivant = self.db.get_creances(limite=TAILLE_PAGE, apres=apres)
+        except Exception as e:
+            messagebox.showerror("Créances", f"Erreur lecture créances : {e}", parent=self.root)
+            return
+        for cid, valeurs in self._creances_lignes(rows):
+            if not self.creances_tree.exists(cid):
+                self.creances_tree.insert("", "end", iid=cid, values=valeurs)
+        self._creances_suite(suivant)
+
+    def _creances_suite(self, suivant):
+        # page suivante lue quand on arrive en bas de la liste
+        self.creances_tree.definir_chargement_suite(
+            (lambda: self._creances_page_suivante(suivant)) if suivant else None
+        )
+
+    def _creances_lignes(self, rows):
+        """Lignes (iid, valeurs) du Treeview, créances notées dans creances_rows."""
+        lignes = []
+        for row in rows:
+            cid = row["id"]
+            client = row["client_nom"] or ""
+            pc = row["pc_marque"] or ""
+            total = float(row["montant_total"] or 0)
+            paye = float(row["montant_paye"] or 0)
+            reste = float(row["montant_restant"] or 0)
+            date = formater_date(row["date_retrait"])
+            self.creances_rows[cid] = row
+            lignes.append((cid, (cid, client, pc, f"{total:.2f}", f"{paye:.2f}", f"{reste:.2f}", date)))
+        return lignes
+
     def creances_on_select(self):
         sel = self.creances_tree.selection()
         if not sel:
@@ -1423,6 +1603,7 @@ class Application:
         content = ctk.CTkFrame(self.page_caisses, fg_color="#e3f2fd")
         content.pack(fill="both", expand=True, padx=20, pady=(0, 10))
 
+        from .pages.caisses_historique import CaisseHistoriquePage
         self.page_caisse_histo = CaisseHistoriquePage(content, self)
         self.page_caisse_histo.pack(fill="both", expand=True)
 
@@ -1468,7 +1649,17 @@ class Application:
         self.prod_search_var = tk.StringVar()
         self.prod_search_entry = ctk.CTkEntry(search_frame, textvariable=self.prod_search_var, width=220)
         self.prod_search_entry.grid(row=0, column=1, padx=5, pady=3, sticky="ew")
-        self.prod_search_entry.bind("<Return>", lambda e: self.charger_produits())
+        # recherche au fil de la frappe, Entrée pour lancer tout de suite
+        self.recherche_produits = RechercheLive(
+            self.prod_search_entry,
+            self.prod_search_var,
+            self._chercher_produits,
+            self._afficher_produits,
+            champs=champs_produit,
+            executeur=self.executeur_db,
+            cle="produits",
+            on_erreur=self._erreur_produits,
+        )
 
         ctk.CTkLabel(search_frame, text="Filtre :", text_color="#000000").grid(
             row=0, column=2, padx=5, pady=3, sticky="e"
@@ -1505,7 +1696,7 @@ class Application:
         ).grid(row=0, column=0, padx=5, pady=(5, 2), sticky="w")
 
         cols = ("id", "nom", "ref", "cat", "pv", "qte", "actif")
-        self.produits_tree = ttk.Treeview(left, columns=cols, show="headings", height=12)
+        self.produits_tree = TreeviewVirtuel(left, columns=cols, show="headings", height=12)
         self.produits_tree.heading("id", text="ID")
         self.produits_tree.heading("nom", text="Nom")
         self.produits_tree.heading("ref", text="Référence")
@@ -1689,39 +1880,85 @@ class Application:
         self.produits_rows = {}
 
     def charger_produits(self):
-        """Charge la liste des produits selon le filtre et la recherche."""
-        terme = (self.prod_search_var.get() or "").strip() if hasattr(self, "prod_search_var") else ""
+        """
+        Relit la liste des produits selon le filtre et la recherche.
+        Pendant la frappe, RechercheLive appelle _chercher_produits (ou filtre
+        en mémoire le dernier résultat complet). Les requêtes tournent sur le
+        thread de la base, par pages de TAILLE_PAGE produits : la suite est
+        lue en faisant défiler la liste.
+        """
+        self.recherche_produits.rafraichir()
+
+    def _chercher_produits(self, terme):
+        """Première page pour terme : retourne la lecture à soumettre à l'exécuteur."""
         filt = self.prod_filter_var.get() if hasattr(self, "prod_filter_var") else "Actifs"
-        uniquement_actifs = (filt == "Actifs")
+        self._produits_filtre = (terme, filt == "Actifs")
 
-        try:
+        self.produits_tree.definir_chargement_suite(None)
+        if not self.produits_tree.get_children():
+            afficher_chargement(self.produits_tree)
+        return self._lire_page_produits(None)
+
+    def _lire_page_produits(self, apres):
+        """Lecture de la page de produits qui suit le curseur apres (None = début)."""
+        terme, uniquement_actifs = self._produits_filtre
+
+        def lire(db):
             if terme:
-                rows = self.db.rechercher_produits(terme, uniquement_actifs=uniquement_actifs)
-            else:
-                rows = self.db.get_produits(uniquement_actifs=uniquement_actifs)
-        except Exception as e:
-            messagebox.showerror("Produits", f"Erreur lecture produits : {e}", parent=self.root)
-            return
+                return db.rechercher_produits(terme, uniquement_actifs=uniquement_actifs,
+                                              limite=TAILLE_PAGE, apres=apres)
+            return db.get_produits(uniquement_actifs=uniquement_actifs,
+                                   limite=TAILLE_PAGE, apres=apres)
+
+        return lire
+
+    def _charger_page_produits(self, apres):
+        """Ajoute à la liste la page qui suit le curseur apres."""
+        self.executeur_db.soumettre(
+            self._lire_page_produits(apres),
+            self._ajouter_page_produits,
+            on_erreur=self._erreur_produits,
+            cle="produits",
+        )
+
+    def _erreur_produits(self, e):
+        self.page_a_relire("produits")
+        masquer_chargement(self.produits_tree)
+        messagebox.showerror("Produits", f"Erreur lecture produits : {e}", parent=self.root)
+
+    def _ligne_produit(self, row):
+        pid = row["id"]
+        self.produits_rows[pid] = row
+        pv = float(row["prix_vente"] or 0)
+        qte = int(row["quantite"] or 0)
+        actif = "Oui" if int(row["actif"] or 0) == 1 else "Non"
+        return pid, (pid, row["nom"] or "", row["reference"] or "", row["categorie"] or "",
+                     f"{pv:.2f}", qte, actif)
+
+    def _afficher_produits(self, page):
+        """Première page d'une recherche : la liste n'est modifiée que là où elle change."""
+        rows, suivant = page
+        masquer_chargement(self.produits_tree)
 
-        self.produits_tree.delete(*self.produits_tree.get_children())
         self.produits_rows = {}
+        synchroniser_tree(self.produits_tree, [self._ligne_produit(row) for row in rows])
+        if self.prod_selected_id not in self.produits_rows:
+            self.prod_selected_id = None
+        self._suite_produits(suivant)
 
+    def _ajouter_page_produits(self, page):
+        rows, suivant = page
         for row in rows:
-            pid = row["id"]
-            nom = row["nom"] or ""
-            ref = row["reference"] or ""
-            cat = row["categorie"] or ""
-            pv = float(row["prix_vente"] or 0)
-            qte = int(row["quantite"] or 0)
-            actif = "Oui" if int(row["actif"] or 0) == 1 else "Non"
-            self.produits_rows[pid] = row
-            self.produits_tree.insert(
-                "",
-                "end",
-                values=(pid, nom, ref, cat, f"{pv:.2f}", qte, actif)
-            )
+            pid, valeurs = self._ligne_produit(row)
+            if not self.produits_tree.exists(pid):
+                self.produits_tree.insert("", "end", iid=pid, values=valeurs)
+        self._suite_produits(suivant)
 
-        self.prod_selected_id = None
+    def _suite_produits(self, suivant):
+        # page suivante lue quand on arrive en bas de la liste
+        self.produits_tree.definir_chargement_suite(
+            (lambda: self._charger_page_produits(suivant)) if suivant else None
+        )
 
     def produits_on_select(self):
         sel = self.produits_tree.selection()
@@ -1922,6 +2159,7 @@ class Application:
         if not self.demander_admin():
             return
 
+        from .dialogs import AchatDialog
         dlg = AchatDialog(self.root, self.db, store_name=self.store_name, store_tel=self.store_tel)
         if dlg.result:
             # Le stock ayant été mis à jour, on recharge la liste des produits.
@@ -1932,6 +2170,7 @@ class Application:
         Ouvre la fenêtre de facture / bon de vente détaillé (VenteDialog)
         à partir des produits en stock.
         """
+        from .dialogs import VenteDialog
         dlg = VenteDialog(
             self.root,
             self.db,
@@ -2004,7 +2243,16 @@ class Application:
         self.vente_recherche_var = tk.StringVar()
         self.vente_recherche_entry = ctk.CTkEntry(search_frame, textvariable=self.vente_recherche_var, width=200)
         self.vente_recherche_entry.grid(row=0, column=1, padx=5, pady=3, sticky="ew")
-        self.vente_recherche_entry.bind("<Return>", lambda e: self.vente_actualiser_produits())
+        self.recherche_vente = RechercheLive(
+            self.vente_recherche_entry,
+            self.vente_recherche_var,
+            self._vente_chercher_produits,
+            self._vente_afficher_produits,
+            champs=champs_produit,
+            executeur=self.executeur_db,
+            cle="vente_produits",
+            on_erreur=self._vente_erreur_produits,
+        )
 
         ctk.CTkButton(
             search_frame,
@@ -2232,27 +2480,29 @@ class Application:
     # LOGIQUE VENTE AU COMPTOIR --------------------------------
 
     def vente_actualiser_produits(self):
-        terme = (self.vente_recherche_var.get() or "").strip()
-        try:
+        """Relit les produits proposés à la vente (recherche courante comprise)."""
+        self.recherche_vente.rafraichir()
+
+    def _vente_chercher_produits(self, terme):
+        def lire(db):
             if terme:
-                rows = self.db.rechercher_produits(terme, uniquement_actifs=True)
-            else:
-                rows = self.db.get_produits(uniquement_actifs=True)
-        except Exception as e:
-            messagebox.showerror("Vente", f"Erreur lecture produits : {e}", parent=self.root)
-            return
+                return db.rechercher_produits(terme, uniquement_actifs=True)
+            return db.get_produits(uniquement_actifs=True)
+
+        return lire
 
-        self.vente_produits_tree.delete(*self.vente_produits_tree.get_children())
+    def _vente_erreur_produits(self, e):
+        self.page_a_relire("vente")
+        messagebox.showerror("Vente", f"Erreur lecture produits : {e}", parent=self.root)
+
+    def _vente_afficher_produits(self, rows):
+        lignes = []
         for p in rows:
             pid = p["id"]
-            nom = p["nom"] or ""
             pv = float(p["prix_vente"] or 0)
             qte = int(p["quantite"] or 0)
-            self.vente_produits_tree.insert(
-                "",
-                "end",
-                values=(pid, nom, f"{pv:.2f}", qte)
-            )
+            lignes.append((pid, (pid, p["nom"] or "", f"{pv:.2f}", qte)))
+        synchroniser_tree(self.vente_produits_tree, lignes)
 
     def vente_actualiser_caisses(self):
         try:
@@ -2369,6 +2619,7 @@ class Application:
         self.vente_mettre_a_jour_affichage()
 
     def vente_ajouter_produit_manuel(self):
+        from .dialogs import ManualProductDialog
         dlg = ManualProductDialog(self.root)
         if not dlg.result:
             return
@@ -2453,14 +2704,16 @@ class Application:
 
         # Crédit client si paiement partiel
         if reste > 0.01:
+            from .dialogs import CreditClientDialog
             dlg = CreditClientDialog(self.root, self.db, reste_du=reste)
             if not dlg.result:
                 messagebox.showinfo("Vente", "Vente annulée (client pour crédit non sélectionné).", parent=self.root)
                 return
             client_nom = dlg.result
 
+        # Vente + stock + mouvement de caisse + créance éventuelle : une seule transaction
         try:
-            vente_id = self.db.enregistrer_vente_comptoir(
+            vente_id, reste = self.db.encaisser_vente(
                 caisse_id=self.caisse_selectionnee_id,
                 items=self.vente_panier,
                 mode_paiement=mode,
@@ -2472,34 +2725,6 @@ class Application:
             messagebox.showerror("Vente", f"Erreur enregistrement vente : {e}", parent=self.root)
             return
 
-        # Mouvement de caisse (ENTREE)
-        if mp > 0:
-            try:
-                self.db.ajouter_mouvement_caisse(
-                    caisse_id=self.caisse_selectionnee_id,
-                    type_mvt="ENTREE",
-                    montant=mp,
-                    description=f"Vente comptoir N°{vente_id}"
-                )
-            except Exception as e:
-                messagebox.showerror("Vente", f"Vente OK mais erreur mouvement caisse : {e}", parent=self.root)
-
-        # Créance si paiement partiel
-        if reste > 0.01:
-            try:
-                self.db.ajouter_creance(
-                    client_nom=client_nom or "Client inconnu",
-                    pc_marque="",
-                    description=f"Vente comptoir N°{vente_id}",
-                    montant_total=total,
-                    montant_paye=mp,
-                    montant_restant=reste,
-                    date_retrait=datetime.now().strftime("%d/%m/%Y"),
-                    ticket_id=None
-                )
-            except Exception as e:
-                messagebox.showerror("Vente", f"Vente OK mais erreur enregistrement créance : {e}", parent=self.root)
-
         messagebox.showinfo("Vente", f"Vente enregistrée (N° {vente_id}).", parent=self.root)
         self.vente_vider_ticket()
         self.vente_actualiser_produits()
@@ -2508,4 +2733,9 @@ class Application:
 
     def run(self):
         self.root.mainloop()
+        if self.surveillance is not None:
+            self.surveillance.arreter()
+        self.executeur_db.fermer()
         self.db.close()
+        if self.journal_requetes is not None:
+            print(self.journal_requetes.terminer())
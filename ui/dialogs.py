@@ -8,6 +8,15 @@ import subprocess
 import customtkinter as ctk
 
 from database import Database
+from .recherche_live import (
+    RechercheLive, champs_produit, cle_recherche, correspond_contient, normaliser,
+)
+from .synchro_tree import synchroniser_tree
+
+
+def _champs_client(row):
+    """Champs d'un client couverts par la recherche : nom, prénom, téléphone."""
+    return row[1], row[2], row[3]
 
 
 class CreditClientDialog(ctk.CTkToplevel):
@@ -114,7 +123,16 @@ class CreditClientDialog(ctk.CTkToplevel):
         self.search_var = tk.StringVar()
         self.search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var, width=200)
         self.search_entry.grid(row=0, column=1, padx=(0, 4), pady=4, sticky="ew")
-        self.search_entry.bind("<Return>", lambda e: self._charger_clients())
+        self.recherche = RechercheLive(
+            self.search_entry,
+            self.search_var,
+            self._chercher_clients,
+            self._afficher_clients,
+            champs=_champs_client,
+            correspond=correspond_contient,
+            on_erreur=lambda e: messagebox.showerror(
+                "Erreur", f"Impossible de charger les clients : {e}", parent=self),
+        )
 
         btn_search = ctk.CTkButton(
             search_frame,
@@ -166,22 +184,22 @@ class CreditClientDialog(ctk.CTkToplevel):
         ).pack(side="right", padx=(4, 10), pady=4)
 
     def _charger_clients(self):
-        search = (self.search_var.get() or "").strip().lower()
-        try:
-            rows = self.db.get_clients()
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible de charger les clients : {e}", parent=self)
-            return
+        self.recherche.rafraichir()
 
-        self.tree.delete(*self.tree.get_children())
+    def _chercher_clients(self, terme):
+        rows = self.db.get_clients()
+        search = normaliser(terme)
+        if not search:
+            return rows
+        return [row for row in rows if correspond_contient(search, cle_recherche(*_champs_client(row)))]
+
+    def _afficher_clients(self, rows):
+        lignes = []
         for row in rows:
             cid, nom, prenom, tel, email, adr = row
             full_nom = (nom or "") + ((" " + prenom) if prenom else "")
-            if search:
-                txt = (full_nom + " " + (tel or "")).lower()
-                if search not in txt:
-                    continue
-            self.tree.insert("", "end", values=(cid, full_nom, tel or ""))
+            lignes.append((cid, (cid, full_nom, tel or "")))
+        synchroniser_tree(self.tree, lignes)
 
     def _create_new_client(self):
         nom = (self.new_nom.get() or "").strip()
@@ -657,7 +675,15 @@ class AchatDialog(ctk.CTkToplevel):
         self.achat_search_var = tk.StringVar()
         self.achat_search_entry = ctk.CTkEntry(search_frame, textvariable=self.achat_search_var, width=200)
         self.achat_search_entry.grid(row=0, column=1, padx=5, pady=3, sticky="ew")
-        self.achat_search_entry.bind("<Return>", lambda e: self._charger_produits())
+        self.recherche = RechercheLive(
+            self.achat_search_entry,
+            self.achat_search_var,
+            self._chercher_produits,
+            self._afficher_produits,
+            champs=champs_produit,
+            on_erreur=lambda e: messagebox.showerror(
+                "Achats", f"Erreur lecture produits : {e}", parent=self),
+        )
 
         ctk.CTkButton(
             search_frame,
@@ -680,6 +706,17 @@ class AchatDialog(ctk.CTkToplevel):
             command=self._nouveau_produit
         ).grid(row=0, column=3, padx=5, pady=3)
 
+        # Réassort proposé d'après le rythme de vente
+        ctk.CTkButton(
+            search_frame,
+            text="Réassort proposé",
+            width=120,
+            fg_color="#FB8C00",
+            hover_color="#EF6C00",
+            text_color="white",
+            command=self._ajouter_reassort
+        ).grid(row=0, column=4, padx=5, pady=3)
+
         prod_frame = ctk.CTkFrame(left, fg_color="#FFFFFF", corner_radius=8)
         prod_frame.grid(row=1, column=0, sticky="nsew")
         cols = ("id", "nom", "code", "stock", "pa", "pv")
@@ -861,6 +898,53 @@ class AchatDialog(ctk.CTkToplevel):
         self._rafraichir_lignes()
         self._maj_total()
 
+    def _ajouter_reassort(self):
+        """
+        Ajoute à la facture les quantités proposées par la prévision de
+        réassort (Database.prevision_reassort), aux prix actuels du produit.
+        Les produits déjà présents dans la facture ne sont pas repris.
+        """
+        try:
+            propositions = self.db.prevision_reassort()
+        except Exception as e:
+            messagebox.showerror("Achats", f"Erreur prévision de réassort : {e}", parent=self)
+            return
+
+        deja = {l["produit_id"] for l in self.lignes}
+        ajoutes = [p for p in propositions if p["id"] not in deja]
+        if not ajoutes:
+            messagebox.showinfo("Achats", "Aucun produit à réapprovisionner.", parent=self)
+            return
+
+        for p in ajoutes:
+            self.lignes.append({
+                "produit_id": p["id"],
+                "nom": p["nom"],
+                "quantite": p["a_commander"],
+                "prix_achat": p["prix_achat"],
+                "prix_vente": p["prix_vente"],
+                "sous_total": p["prix_achat"] * p["a_commander"]
+            })
+        self._rafraichir_lignes()
+        self._maj_total()
+
+        details = []
+        for p in ajoutes[:15]:
+            if p["couverture"] is None:
+                etat = "sous le seuil d'alerte"
+            else:
+                etat = f"{p['couverture']:.0f} j de stock"
+            details.append(f"- {p['nom']} : {p['a_commander']} (stock {p['quantite']}, {etat})")
+        if len(ajoutes) > 15:
+            details.append(f"... et {len(ajoutes) - 15} autre(s)")
+        messagebox.showinfo(
+            "Achats",
+            f"{len(ajoutes)} produit(s) ajouté(s) à la facture :\n\n"
+            + "\n".join(details)
+            + "\n\nSupprimez les lignes inutiles avant de valider.",
+            parent=self
+        )
+
     def _charger_caisses(self):
         try:
             caisses = self.db.get_caisses()
@@ -892,31 +976,26 @@ class AchatDialog(ctk.CTkToplevel):
             self.caisse_selectionnee_id = self.caisses_map.get(choice)
 
     def _charger_produits(self):
-        terme = (self.achat_search_var.get() or "").strip()
-        try:
-            if terme:
-                rows = self.db.rechercher_produits(terme, uniquement_actifs=False)
-            else:
-                rows = self.db.get_produits(uniquement_actifs=False)
-        except Exception as e:
-            messagebox.showerror("Achats", f"Erreur lecture produits : {e}", parent=self)
-            return
+        self.recherche.rafraichir()
 
-        self.achat_produits_tree.delete(*self.achat_produits_tree.get_children())
+    def _chercher_produits(self, terme):
+        if terme:
+            return self.db.rechercher_produits(terme, uniquement_actifs=False)
+        return self.db.get_produits(uniquement_actifs=False)
+
+    def _afficher_produits(self, rows):
+        lignes = []
         for p in rows:
             pid, code, ref, nom, cat, desc, pa, pv, qte, seuil, actif = p
-            self.achat_produits_tree.insert(
-                "",
-                "end",
-                values=(
-                    pid,
-                    nom or "",
-                    code or "",
-                    int(qte or 0),
-                    f"{float(pa or 0):.2f}",
-                    f"{float(pv or 0):.2f}",
-                )
-            )
+            lignes.append((pid, (
+                pid,
+                nom or "",
+                code or "",
+                int(qte or 0),
+                f"{float(pa or 0):.2f}",
+                f"{float(pv or 0):.2f}",
+            )))
+        synchroniser_tree(self.achat_produits_tree, lignes)
 
     def _get_produit_selectionne(self):
         sel = self.achat_produits_tree.selection()
@@ -1263,7 +1342,15 @@ class VenteDialog(ctk.CTkToplevel):
         self.vente_search_var = tk.StringVar()
         self.vente_search_entry = ctk.CTkEntry(search_frame, textvariable=self.vente_search_var, width=200)
         self.vente_search_entry.grid(row=0, column=1, padx=5, pady=3, sticky="ew")
-        self.vente_search_entry.bind("<Return>", lambda e: self._charger_produits())
+        self.recherche = RechercheLive(
+            self.vente_search_entry,
+            self.vente_search_var,
+            self._chercher_produits,
+            self._afficher_produits,
+            champs=champs_produit,
+            on_erreur=lambda e: messagebox.showerror(
+                "Vente", f"Erreur lecture produits : {e}", parent=self),
+        )
 
         ctk.CTkButton(
             search_frame,
@@ -1482,30 +1569,25 @@ class VenteDialog(ctk.CTkToplevel):
             self.caisse_selectionnee_id = self.caisses_map.get(choice)
 
     def _charger_produits(self):
-        terme = (self.vente_search_var.get() or "").strip()
-        try:
-            if terme:
-                rows = self.db.rechercher_produits(terme, uniquement_actifs=True)
-            else:
-                rows = self.db.get_produits(uniquement_actifs=True)
-        except Exception as e:
-            messagebox.showerror("Vente", f"Erreur lecture produits : {e}", parent=self)
-            return
+        self.recherche.rafraichir()
+
+    def _chercher_produits(self, terme):
+        if terme:
+            return self.db.rechercher_produits(terme, uniquement_actifs=True)
+        return self.db.get_produits(uniquement_actifs=True)
 
-        self.vente_produits_tree.delete(*self.vente_produits_tree.get_children())
+    def _afficher_produits(self, rows):
+        lignes = []
         for p in rows:
             pid, code, ref, nom, cat, desc, pa, pv, qte, seuil, actif = p
-            self.vente_produits_tree.insert(
-                "",
-                "end",
-                values=(
-                    pid,
-                    nom or "",
-                    code or "",
-                    int(qte or 0),
-                    f"{float(pv or 0):.2f}",
-                )
-            )
+            lignes.append((pid, (
+                pid,
+                nom or "",
+                code or "",
+                int(qte or 0),
+                f"{float(pv or 0):.2f}",
+            )))
+        synchroniser_tree(self.vente_produits_tree, lignes)
 
     def _get_produit_selectionne(self):
         sel = self.vente_produits_tree.selection()
@@ -1655,50 +1737,25 @@ class VenteDialog(ctk.CTkToplevel):
             for l in self.lignes
         ]
 
+        # Descriptions : "{vente_id}" est remplacé par le numéro de la vente
+        desc_num = (self.vente_num_entry.get() or "").strip() or "Vente N°{vente_id}"
+
+        # Vente + stock + mouvement de caisse + créance éventuelle : une seule transaction
         try:
-            vente_id = self.db.enregistrer_vente_comptoir(
+            vente_id, reste = self.db.encaisser_vente(
                 caisse_id=self.caisse_selectionnee_id,
                 items=items,
                 mode_paiement=mode,
                 montant_paye=mp,
                 monnaie_rendue=monnaie,
-                client_nom=client_nom
+                client_nom=client_nom,
+                description_mouvement=f"{desc_num} - {client_nom or 'Client'}",
+                description_creance=desc_num
             )
         except Exception as e:
             messagebox.showerror("Vente", f"Erreur enregistrement vente : {e}", parent=self)
             return
 
-        # Mouvement de caisse (entrée)
-        if mp > 0:
-            desc_num = (self.vente_num_entry.get() or "").strip() or f"Vente N°{vente_id}"
-            desc = f"{desc_num} - {client_nom or 'Client'}"
-            try:
-                self.db.ajouter_mouvement_caisse(
-                    caisse_id=self.caisse_selectionnee_id,
-                    type_mvt="ENTREE",
-                    montant=mp,
-                    description=desc
-                )
-            except Exception as e:
-                messagebox.showerror("Vente", f"Vente OK mais erreur mouvement caisse : {e}", parent=self)
-
-        # Créance si paiement partiel
-        if reste > 0.01:
-            try:
-                desc = (self.vente_num_entry.get() or "").strip() or f"Vente N°{vente_id}"
-                self.db.ajouter_creance(
-                    client_nom=client_nom or "Client inconnu",
-                    pc_marque="",
-                    description=desc,
-                    montant_total=total,
-                    montant_paye=mp,
-                    montant_restant=reste,
-                    date_retrait=datetime.now().strftime("%d/%m/%Y"),
-                    ticket_id=None
-                )
-            except Exception as e:
-                messagebox.showerror("Vente", f"Vente OK mais erreur enregistrement créance : {e}", parent=self)
-
         messagebox.showinfo("Vente", f"Vente enregistrée (N° {vente_id}).", parent=self)
 
         # Impression du bon de vente
@@ -0,0 +1,32 @@
+# ui/formatage.py
+from datetime import datetime
+
+# Les dates sont stockées en ISO dans la base ("2025-12-01" ou
+# "2025-12-01 14:30:00") ; elles sont affichées au format français.
+_FORMATS_ISO = (
+    ("%Y-%m-%d %H:%M:%S", True),
+    ("%Y-%m-%d %H:%M", True),
+    ("%Y-%m-%d", False),
+)
+
+
+def formater_date(valeur, avec_heure=True):
+    """
+    Convertit une date ISO de la base pour l'affichage :
+      "2025-12-01 14:30:00" -> "01/12/2025 14:30"
+      "2025-12-01"          -> "01/12/2025"
+    avec_heure=False n'affiche que la date.
+    Une valeur vide ou non reconnue est retournée telle quelle ("" si None).
+    """
+    if not valeur:
+        return ""
+    texte = str(valeur).strip()
+    for fmt, a_une_heure in _FORMATS_ISO:
+        try:
+            dt = datetime.strptime(texte, fmt)
+        except ValueError:
+            continue
+        if a_une_heure and avec_heure:
+            return dt.strftime("%d/%m/%Y %H:%M")
+        return dt.strftime("%d/%m/%Y")
+    return texte
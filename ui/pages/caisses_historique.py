@@ -1,8 +1,15 @@
+import os
+import tempfile
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 
 import customtkinter as ctk
 
+from database import TAILLE_PAGE
+from ..formatage import formater_date
+from ..taches_db import afficher_chargement, masquer_chargement
+from ..treeview_virtuel import TreeviewVirtuel
+
 
 class CaisseHistoriquePage(ctk.CTkFrame):
     """
@@ -12,8 +19,11 @@ class CaisseHistoriquePage(ctk.CTkFrame):
     - À droite : liste des mouvements de la caisse sélectionnée (stylé)
     - Boutons pour ajouter un mouvement manuel (ENTRÉE / SORTIE) en mode admin
       + supprimer un mouvement sélectionné (admin).
+    - Clôture de la journée (admin) et rapport Z imprimable.
     """
 
+    TICKET_WIDTH = 32  # largeur du rapport Z en caractères (imprimante thermique 58mm)
+
     def __init__(self, parent, app):
         super().__init__(parent, fg_color="#dbeafe")  # fond bleu très clair
         self.app = app          # instance de Application
@@ -170,6 +180,32 @@ class CaisseHistoriquePage(ctk.CTkFrame):
         )
         self.solde_label.grid(row=1, column=0, sticky="w", padx=10, pady=(0, 8))
 
+        # Clôture de journée / rapport Z
+        cloture_frame = ctk.CTkFrame(header, fg_color="#0D47A1", corner_radius=0)
+        cloture_frame.grid(row=0, column=1, rowspan=2, sticky="e", padx=10, pady=6)
+
+        ctk.CTkButton(
+            cloture_frame,
+            text="Clôturer la journée",
+            fg_color="#6A1B9A",
+            hover_color="#4A148C",
+            text_color="white",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            command=self.cloturer_journee,
+            width=160
+        ).pack(side="left", padx=5)
+
+        ctk.CTkButton(
+            cloture_frame,
+            text="Rapport Z",
+            fg_color="#00796b",
+            hover_color="#004d40",
+            text_color="white",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            command=self.afficher_dernier_rapport_z,
+            width=110
+        ).pack(side="left", padx=5)
+
         # Cadre principal des mouvements
         mov_frame = ctk.CTkFrame(right, fg_color="#FFF7ED", corner_radius=10)
         mov_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(5, 5))
@@ -178,7 +214,7 @@ class CaisseHistoriquePage(ctk.CTkFrame):
 
         # Ajout de l'ID pour pouvoir supprimer un mouvement précis
         cols_mov = ("id", "date", "type", "montant", "desc")
-        self.mouv_tree = ttk.Treeview(
+        self.mouv_tree = TreeviewVirtuel(
             mov_frame,
             columns=cols_mov,
             show="headings",
@@ -261,24 +297,27 @@ class CaisseHistoriquePage(ctk.CTkFrame):
         self.charger_historique()
 
     def charger_caisses(self):
-        """Charge la liste des caisses avec leur solde."""
-        try:
-            caisses = self.db.get_caisses()
-        except Exception as e:
-            messagebox.showerror("Caisses", f"Erreur lecture caisses : {e}", parent=self)
-            return
+        """Charge la liste des caisses avec leur solde (sur le thread de la base)."""
+        afficher_chargement(self.caisses_tree)
+        self.app.executeur_db.soumettre(
+            lambda db: [tuple(row) for row in db.get_soldes_caisses()],
+            self._afficher_caisses,
+            on_erreur=self._erreur_caisses,
+            cle="caisses",
+        )
 
+    def _erreur_caisses(self, e):
+        self.app.page_a_relire("caisses")
+        masquer_chargement(self.caisses_tree)
+        messagebox.showerror("Caisses", f"Erreur lecture caisses : {e}", parent=self)
+
+    def _afficher_caisses(self, caisses):
+        masquer_chargement(self.caisses_tree)
         self.caisses_tree.delete(*self.caisses_tree.get_children())
         self.caisses_rows = {}
         self.selected_caisse_id = None
 
-        for row in caisses:
-            cid, nom, desc = row
-            try:
-                solde = self.db.get_solde_caisse(cid)
-            except Exception:
-                solde = 0.0
-
+        for cid, nom, desc, solde in caisses:
             self.caisses_rows[cid] = {
                 "id": cid,
                 "nom": nom,
@@ -334,21 +373,41 @@ class CaisseHistoriquePage(ctk.CTkFrame):
         self.charger_historique()
 
     def charger_historique(self):
-        """Charge les mouvements de la caisse sélectionnée."""
+        """
+        Charge les mouvements de la caisse sélectionnée (sur le thread de la base),
+        par pages de TAILLE_PAGE : la suite est lue en faisant défiler la liste.
+        """
+        self.mouv_tree.definir_chargement_suite(None)
         self.mouv_tree.delete(*self.mouv_tree.get_children())
         self.mouv_rows = {}
         if not self.selected_caisse_id:
+            self.app.executeur_db.annuler("caisse_mouvements")
             return
 
-        try:
-            rows = self.db.get_mouvements_caisse(self.selected_caisse_id)
-        except Exception as e:
-            messagebox.showerror("Caisses", f"Erreur lecture mouvements : {e}", parent=self)
-            return
+        afficher_chargement(self.mouv_tree)
+        self._charger_page_mouvements(self.selected_caisse_id, None)
+
+    def _charger_page_mouvements(self, caisse_id, apres):
+        """Lit la page de mouvements qui suit le curseur apres (None = plus récents)."""
+        self.app.executeur_db.soumettre(
+            lambda db: db.get_mouvements_caisse(caisse_id, limite=TAILLE_PAGE, apres=apres),
+            lambda page: self._afficher_mouvements(caisse_id, page),
+            on_erreur=self._erreur_mouvements,
+            cle="caisse_mouvements",
+        )
+
+    def _erreur_mouvements(self, e):
+        self.app.page_a_relire("caisses")
+        masquer_chargement(self.mouv_tree)
+        messagebox.showerror("Caisses", f"Erreur lecture mouvements : {e}", parent=self)
+
+    def _afficher_mouvements(self, caisse_id, page):
+        rows, suivant = page
+        masquer_chargement(self.mouv_tree)
 
         for row in rows:
             mid = row["id"]
-            date_mvt = row["date_mouvement"] or ""
+            date_mvt = formater_date(row["date_mouvement"])
             typ = row["type"] or ""
             montant = float(row["montant"] or 0)
             desc = row["description"] or ""
@@ -360,6 +419,11 @@ class CaisseHistoriquePage(ctk.CTkFrame):
                 values=(mid, date_mvt, typ, f"{montant:.2f}", desc)
             )
 
+        # page suivante lue quand on arrive en bas de la liste
+        self.mouv_tree.definir_chargement_suite(
+            (lambda: self._charger_page_mouvements(caisse_id, suivant)) if suivant else None
+        )
+
     # ----------------------------------------------------------
     # Ajout de mouvements manuels (admin)
     # ----------------------------------------------------------
@@ -478,3 +542,143 @@ class CaisseHistoriquePage(ctk.CTkFrame):
 
         messagebox.showinfo("Caisses", "Mouvement supprimé.", parent=self)
         self._refresh_all()
+
+    # ----------------------------------------------------------
+    # Clôture de journée / rapport Z
+    # ----------------------------------------------------------
+
+    def cloturer_journee(self):
+        """
+        Clôture la journée en cours pour toutes les caisses (admin requis)
+        puis affiche le rapport Z.
+        """
+        if not self.app.demander_admin():
+            return
+
+        if not messagebox.askyesno(
+            "Caisses",
+            "Clôturer la journée pour toutes les caisses ?\n\n"
+            "Un rapport Z sera établi pour chaque caisse.",
+            parent=self
+        ):
+            return
+
+        try:
+            clotures = self.db.cloturer_journee()
+        except Exception as e:
+            messagebox.showerror("Caisses", f"Erreur lors de la clôture : {e}", parent=self)
+            return
+
+        if not clotures:
+            messagebox.showinfo("Caisses", "La journée est déjà clôturée.", parent=self)
+            return
+
+        self.afficher_rapport_z(clotures)
+
+    def afficher_dernier_rapport_z(self):
+        """Réaffiche le rapport Z de la dernière clôture de la caisse sélectionnée."""
+        if not self.selected_caisse_id:
+            messagebox.showwarning("Caisses", "Sélectionnez une caisse d'abord.", parent=self)
+            return
+        try:
+            cloture = self.db.get_derniere_cloture(self.selected_caisse_id)
+        except Exception as e:
+            messagebox.showerror("Caisses", f"Erreur lecture clôture : {e}", parent=self)
+            return
+        if not cloture:
+            messagebox.showinfo("Caisses", "Aucune clôture pour cette caisse.", parent=self)
+            return
+        self.afficher_rapport_z([cloture])
+
+    def _ligne_montant(self, libelle: str, montant: float):
+        """Libellé à gauche, montant aligné à droite sur TICKET_WIDTH caractères."""
+        valeur = f"{montant:.2f}"
+        return libelle.ljust(self.TICKET_WIDTH - len(valeur)) + valeur
+
+    def _build_rapport_z(self, clotures):
+        """Construit le texte du rapport Z (une section par caisse, largeur fixe)."""
+        W = self.TICKET_WIDTH
+        store_name = (getattr(self.app, "store_name", "MAGASIN") or "").upper()
+
+        lignes = [store_name.center(W), "RAPPORT Z".center(W)]
+        for cl in clotures:
+            debut = formater_date(cl["date_debut"]) or "origine"
+            lignes.append("=" * W)
+            lignes.append(f"Caisse : {cl['caisse_nom']}")
+            lignes.append(f"Clôture N°{cl['id']} du {formater_date(cl['date_cloture'])}")
+            if cl["date_debut"] != cl["date_cloture"]:
+                lignes.append(f"Période : {debut} -> {formater_date(cl['date_cloture'])}")
+            lignes.append(f"Le {formater_date(cl['date_heure'])}")
+            lignes.append("-" * W)
+            lignes.append(self._ligne_montant("Solde ouverture", cl["solde_ouverture"]))
+            lignes.append(self._ligne_montant("Entrées", cl["total_entrees"]))
+            lignes.append(self._ligne_montant("Sorties", cl["total_sorties"]))
+            lignes.append("-" * W)
+            lignes.append(self._ligne_montant("SOLDE CLÔTURE", cl["solde_cloture"]))
+            lignes.append(f"Mouvements : {cl['nb_mouvements']}")
+            lignes.append(f"Ventes     : {cl['nb_ventes']}")
+        lignes.append("=" * W)
+        lignes.extend(["", "", ""])
+        return "\n".join(lignes)
+
+    def afficher_rapport_z(self, clotures):
+        """Aperçu du rapport Z avec bouton d'impression."""
+        contenu = self._build_rapport_z(clotures)
+
+        win = ctk.CTkToplevel(self)
+        win.title("Rapport Z")
+        win.geometry("400x540")
+        win.grab_set()  # fenêtre modale
+
+        txt = ctk.CTkTextbox(
+            win,
+            width=360,
+            height=440,
+            font=ctk.CTkFont(family="Consolas", size=12)  # police monospace
+        )
+        txt.pack(padx=10, pady=(10, 5), fill="both", expand=True)
+        txt.insert("1.0", contenu)
+        txt.configure(state="disabled")
+
+        btn_frame = ctk.CTkFrame(win, fg_color="white")
+        btn_frame.pack(padx=10, pady=(5, 10), fill="x")
+
+        ctk.CTkButton(
+            btn_frame,
+            text="Imprimer",
+            fg_color="#00796b",
+            hover_color="#004d40",
+            text_color="white",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            command=lambda: self.imprimer_rapport_z(contenu)
+        ).pack(side="left", padx=5)
+
+        ctk.CTkButton(
+            btn_frame,
+            text="Fermer",
+            fg_color="#9E9E9E",
+            hover_color="#616161",
+            text_color="white",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            command=win.destroy
+        ).pack(side="right", padx=5)
+
+    def imprimer_rapport_z(self, contenu: str):
+        """Envoie le rapport Z à l'imprimante par défaut (Windows) ou l'enregistre."""
+        try:
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode="w", encoding="utf-8")
+            tmp.write(contenu)
+            tmp_path = tmp.name
+            tmp.close()
+
+            if os.name == "nt":
+                os.startfile(tmp_path, "print")
+                messagebox.showinfo("Impression", "Rapport Z envoyé à l'imprimante par défaut.", parent=self)
+            else:
+                messagebox.showinfo(
+                    "Impression",
+                    f"Rapport Z sauvegardé :\n{tmp_path}",
+                    parent=self
+                )
+        except Exception as e:
+            messagebox.showerror("Impression", f"Erreur lors de l'impression : {e}", parent=self)
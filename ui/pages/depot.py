@@ -6,6 +6,11 @@ from datetime import datetime
 
 import customtkinter as ctk
 
+from database import TAILLE_PAGE
+from ..formatage import formater_date
+from ..taches_db import afficher_chargement, masquer_chargement
+from ..treeview_virtuel import TreeviewVirtuel
+
 
 class DepotPage(ctk.CTkFrame):
     """
@@ -306,7 +311,7 @@ class DepotPage(ctk.CTkFrame):
         tickets_frame.grid_columnconfigure(0, weight=1)
 
         cols = ("id", "client", "tel", "pc", "date", "statut")
-        self.depot_tickets_tree = ttk.Treeview(
+        self.depot_tickets_tree = TreeviewVirtuel(
             tickets_frame,
             columns=cols,
             show="headings",
@@ -403,35 +408,60 @@ class DepotPage(ctk.CTkFrame):
     # ----------------------------------------------------------
 
     def depot_charger_tickets(self):
-        """Charge la liste des tickets selon le filtre (En cours / Tous)."""
+        """
+        Charge la liste des tickets selon le filtre (En cours / Tous).
+        La requête tourne sur le thread de la base, par pages de TAILLE_PAGE
+        tickets (les plus récents d'abord) : la suite est lue en faisant
+        défiler la liste.
+        """
         filtre = self.depot_filtre_var.get() if hasattr(self, "depot_filtre_var") else "En cours"
+        statut = "En cours" if filtre == "En cours" else None
+
+        self.depot_tickets_tree.definir_chargement_suite(None)
+        afficher_chargement(self.depot_tickets_tree)
+        self._depot_charger_page(statut, None)
+
+    def _depot_charger_page(self, statut, apres):
+        """Lit la page de tickets qui suit le curseur apres (None = plus récents)."""
+        self.app.executeur_db.soumettre(
+            lambda db: db.get_tickets(statut=statut, limite=TAILLE_PAGE, apres=apres),
+            lambda page: self._depot_afficher_tickets(statut, apres, page),
+            on_erreur=self._depot_erreur_tickets,
+            cle="depot_tickets",
+        )
 
-        try:
-            if filtre == "En cours":
-                rows = self.db.get_tickets(statut="En cours")
-            else:
-                rows = self.db.get_tickets(statut=None)
-        except Exception as e:
-            messagebox.showerror("Dépôt", f"Erreur lecture tickets : {e}", parent=self)
-            return
+    def _depot_erreur_tickets(self, e):
+        self.app.page_a_relire("depot")
+        masquer_chargement(self.depot_tickets_tree)
+        messagebox.showerror("Dépôt", f"Erreur lecture tickets : {e}", parent=self)
 
-        self.depot_tickets_tree.delete(*self.depot_tickets_tree.get_children())
-        self.tickets_rows = {}
+    def _depot_afficher_tickets(self, statut, apres, page):
+        rows, suivant = page
+        masquer_chargement(self.depot_tickets_tree)
+        if apres is None:
+            # première page : la liste repart de zéro
+            self.depot_tickets_tree.delete(*self.depot_tickets_tree.get_children())
+            self.tickets_rows = {}
 
         for row in rows:
             tid = row["id"]
             client = row["client_nom"] or ""
             tel = row["client_tel"] or ""
             pc = (row["pc_marque"] or "") + ((" " + (row["pc_modele"] or "")) if row["pc_modele"] else "")
-            date_depot = row["date_depot"] or ""
-            statut = row["statut"] or ""
+            date_depot = formater_date(row["date_depot"])
+            statut_ticket = row["statut"] or ""
             self.tickets_rows[tid] = row
             self.depot_tickets_tree.insert(
                 "",
                 "end",
-                values=(tid, client, tel, pc, date_depot, statut)
+                values=(tid, client, tel, pc, date_depot, statut_ticket)
             )
 
+        # page suivante lue quand on arrive en bas de la liste
+        self.depot_tickets_tree.definir_chargement_suite(
+            (lambda: self._depot_charger_page(statut, suivant)) if suivant else None
+        )
+
     def depot_on_select(self):
         """
         Quand on clique sur un ticket dans la liste,
@@ -474,7 +504,7 @@ class DepotPage(ctk.CTkFrame):
         self.dep_batterie_var.set(bool(row["avec_batterie"]))
 
         self.dep_date_entry.delete(0, "end")
-        self.dep_date_entry.insert(0, row["date_depot"] or "")
+        self.dep_date_entry.insert(0, formater_date(row["date_depot"]))
 
         self.dep_diag_text.delete("1.0", "end")
         self.dep_diag_text.insert("1.0", row["diagnostic_initial"] or "")
@@ -523,7 +553,7 @@ class DepotPage(ctk.CTkFrame):
         # Info ticket
         lignes.append(self._center("TICKET DEPOT", W))
         lignes.append(self._center(f"N° {tid}", W))
-        date_dep = row["date_depot"] or ""
+        date_dep = formater_date(row["date_depot"])
         lignes.append(self._center(f"Date: {date_dep}"[:W], W))
         lignes.append(self._line())
 
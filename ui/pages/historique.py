@@ -1,10 +1,19 @@
 # ui/pages/historique.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 
 import customtkinter as ctk
 
+from ..formatage import formater_date
+from ..recherche_live import RechercheLive, cle_recherche, correspond_debut, normaliser
+from ..synchro_tree import synchroniser_tree
+from ..taches_db import afficher_chargement, masquer_chargement
+from ..treeview_virtuel import TreeviewVirtuel
+
+
+def _champs_recherche(element):
+    return (element.get("client_nom"),)
+
 
 class HistoriquePage(ctk.CTkFrame):
     """
@@ -111,8 +120,15 @@ class HistoriquePage(ctk.CTkFrame):
         )
         self.search_entry.pack(side="left", padx=(0, 4))
 
-        # Mise à jour automatique à chaque frappe
-        self.search_entry.bind("<KeyRelease>", self._on_search_change)
+        # Mise à jour automatique pendant la frappe (filtre en mémoire)
+        self.recherche = RechercheLive(
+            self.search_entry,
+            self.search_var,
+            self._chercher,
+            self._on_search_change,
+            champs=_champs_recherche,
+            correspond=correspond_debut,
+        )
 
         ctk.CTkButton(
             search_frame,
@@ -144,7 +160,7 @@ class HistoriquePage(ctk.CTkFrame):
         # --- fin barre de recherche ---
 
         cols = ("id", "date_dep", "date_ret", "client", "tel", "pc", "montant")
-        self.tree = ttk.Treeview(
+        self.tree = TreeviewVirtuel(
             left,
             columns=cols,
             show="headings",
@@ -262,48 +278,66 @@ class HistoriquePage(ctk.CTkFrame):
         Charge tous les tickets de réparation (quel que soit le statut),
         sauf ceux marqués 'Supprimé'.
         Ainsi, tous les dépôts / réceptions sont visibles.
+        La requête tourne sur le thread de la base.
         """
         self._reset_detail()
         self.histo_type_var.set("Réparations")
 
-        try:
-            cur = self.db.cursor
-            cur.execute(
-                "SELECT * FROM tickets_reparation "
-                "ORDER BY date_depot DESC, id DESC"
-            )
-            rows = cur.fetchall()
-        except Exception as e:
-            messagebox.showerror("Historique", f"Erreur lecture tickets : {e}")
-            return
+        def lire(db):
+            with db.lecture() as cur:
+                cur.execute(
+                    "SELECT * FROM tickets_reparation "
+                    "ORDER BY date_depot DESC, id DESC"
+                )
+                return cur.fetchall()
+
+        afficher_chargement(self.tree)
+        self.app.executeur_db.soumettre(
+            lire,
+            self._afficher_tickets,
+            on_erreur=lambda e: self._erreur_chargement(f"Erreur lecture tickets : {e}"),
+            cle="historique",
+        )
 
-        tickets = [dict(r) for r in rows]
-        filtres = [
-            t for t in tickets
-            if (t.get("statut") or "").lower() != "supprimé"
-        ]
+    def _afficher_tickets(self, rows):
+        masquer_chargement(self.tree)
 
-        self.all_items = filtres
+        tickets = []
+        for r in rows:
+            t = dict(r)
+            if (t.get("statut") or "").lower() == "supprimé":
+                continue
+            t["date_depot"] = formater_date(t.get("date_depot"))
+            t["date_retrait"] = formater_date(t.get("date_retrait"))
+            tickets.append(t)
+        filtres = tickets
 
-        if hasattr(self, "search_var"):
-            self.search_var.set("")
+        self.all_items = filtres
 
-        self._remplir_tree(self.all_items)
+        self._reset_search()
 
     def charger_historique_occasions(self):
         """Charge tous les achats d'occasion comme éléments d'historique."""
         self._reset_detail()
         self.histo_type_var.set("Occasions")
 
-        try:
-            cur = self.db.cursor
-            cur.execute(
-                "SELECT * FROM occasion_achats ORDER BY date_achat DESC, id DESC"
-            )
-            rows = cur.fetchall()
-        except Exception as e:
-            messagebox.showerror("Historique", f"Erreur lecture achats d'occasion : {e}")
-            return
+        def lire(db):
+            with db.lecture() as cur:
+                cur.execute(
+                    "SELECT * FROM occasion_achats ORDER BY date_achat DESC, id DESC"
+                )
+                return cur.fetchall()
+
+        afficher_chargement(self.tree)
+        self.app.executeur_db.soumettre(
+            lire,
+            self._afficher_occasions,
+            on_erreur=lambda e: self._erreur_chargement(f"Erreur lecture achats d'occasion : {e}"),
+            cle="historique",
+        )
+
+    def _afficher_occasions(self, rows):
+        masquer_chargement(self.tree)
 
         tickets = []
         for r in rows:
@@ -314,7 +348,7 @@ class HistoriquePage(ctk.CTkFrame):
             client_tel = r["vendeur_tel"] or ""
             pc_marque = r["tel_marque"] or ""
             pc_modele = f"{r['tel_nom'] or ''} IMEI:{r['tel_imei'] or ''}".strip()
-            date_dep = r["date_achat"] or ""
+            date_dep = formater_date(r["date_achat"])
             date_ret = ""
             mt = 0.0
 
@@ -333,21 +367,28 @@ class HistoriquePage(ctk.CTkFrame):
 
         self.all_items = tickets
 
-        if hasattr(self, "search_var"):
-            self.search_var.set("")
-
-        self._remplir_tree(self.all_items)
+        self._reset_search()
 
     def charger_historique_ventes(self):
-        """Charge toutes les ventes au comptoir comme éléments d'historique."""
+        """
+        Charge toutes les ventes au comptoir comme éléments d'historique.
+        Pas de pages ici : la recherche (RechercheLive) filtre en mémoire
+        sur l'ensemble des éléments chargés.
+        """
         self._reset_detail()
         self.histo_type_var.set("Ventes")
 
-        try:
-            ventes = self.db.get_ventes()
-        except Exception as e:
-            messagebox.showerror("Historique", f"Erreur lecture ventes : {e}")
-            return
+        # Ventes + nombre d'articles de chacune : une seule requête groupée
+        afficher_chargement(self.tree)
+        self.app.executeur_db.soumettre(
+            lambda db: db.get_ventes_resume(),
+            self._afficher_ventes,
+            on_erreur=lambda e: self._erreur_chargement(f"Erreur lecture ventes : {e}"),
+            cle="historique",
+        )
+
+    def _afficher_ventes(self, ventes):
+        masquer_chargement(self.tree)
 
         tickets = []
         for v in ventes:
@@ -357,24 +398,13 @@ class HistoriquePage(ctk.CTkFrame):
             mt_total = float(v["montant_total"] or 0)
             mp = float(v["montant_paye"] or 0)
             mr = 0.0
-
-            # On peut aussi compter le nombre d'articles pour un résumé
-            try:
-                details = self.db.get_details_vente(vid)
-                nb_articles = sum(float(d["quantite"] or 0) for d in details)
-            except Exception:
-                nb_articles = 0
+            nb_articles = float(v["quantite_totale"] or 0)
 
             pc_marque = "Vente comptoir"
             pc_modele = f"{nb_articles:.0f} article(s)" if nb_articles > 0 else ""
 
             # Transformer "YYYY-MM-DD HH:MM:SS" en "dd/mm/YYYY HH:MM"
-            date_aff = date_heure
-            try:
-                dt = datetime.strptime(date_heure, "%Y-%m-%d %H:%M:%S")
-                date_aff = dt.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                pass
+            date_aff = formater_date(date_heure)
 
             tickets.append({
                 "id": vid,
@@ -391,16 +421,16 @@ class HistoriquePage(ctk.CTkFrame):
 
         self.all_items = tickets
 
-        if hasattr(self, "search_var"):
-            self.search_var.set("")
+        self._reset_search()
 
-        self._remplir_tree(self.all_items)
+    def _erreur_chargement(self, message):
+        self.app.page_a_relire("historique")
+        masquer_chargement(self.tree)
+        messagebox.showerror("Historique", message)
 
     def _remplir_tree(self, tickets):
-        """Remplit le Treeview avec la liste d'éléments donnée."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
+        """Met le Treeview à jour avec la liste d'éléments donnée (par différence)."""
+        lignes = []
         for t in tickets:
             tid = t["id"]
             client_nom = t.get("client_nom", "")
@@ -410,19 +440,16 @@ class HistoriquePage(ctk.CTkFrame):
             date_ret = t.get("date_retrait", "")
             mt = t.get("montant_total", 0)
 
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    tid,
-                    date_dep or "",
-                    date_ret or "",
-                    client_nom or "",
-                    client_tel or "",
-                    pc,
-                    f"{float(mt or 0):.2f}",
-                )
-            )
+            lignes.append((tid, (
+                tid,
+                date_dep or "",
+                date_ret or "",
+                client_nom or "",
+                client_tel or "",
+                pc,
+                f"{float(mt or 0):.2f}",
+            )))
+        synchroniser_tree(self.tree, lignes)
 
     def _on_type_change(self, choice):
         """Quand on change le type (Réparations / Occasions / Ventes)."""
@@ -433,25 +460,24 @@ class HistoriquePage(ctk.CTkFrame):
         else:
             self.charger_historique()
 
-    def _on_search_change(self, event=None):
-        """Filtre la liste en fonction du début du nom du client / vendeur."""
-        terme = (self.search_var.get() or "").strip().lower()
-
-        if not terme:
-            filtres = self.all_items
-        else:
-            filtres = [
-                t for t in self.all_items
-                if (t.get("client_nom") or "").lower().startswith(terme)
-            ]
+    def _chercher(self, terme):
+        """Éléments dont le nom du client / vendeur commence par terme."""
+        terme = normaliser(terme)
+        return [t for t in self.all_items
+                if correspond_debut(terme, cle_recherche(*_champs_recherche(t)))]
 
+    def _on_search_change(self, filtres):
+        """Affiche les éléments retenus par la recherche (RechercheLive)."""
         self._remplir_tree(filtres)
-        self._reset_detail()
+        # le détail ne reste que si l'élément sélectionné est encore affiché
+        if not self.tree.selection():
+            self._reset_detail()
 
     def _reset_search(self):
         """Réinitialise la recherche et affiche toute la liste courante."""
         if hasattr(self, "search_var"):
             self.search_var.set("")
+            self.recherche.reinitialiser(self.all_items)
         self._remplir_tree(self.all_items)
         self._reset_detail()
 
@@ -498,8 +524,8 @@ class HistoriquePage(ctk.CTkFrame):
             client_nom = t["client_nom"] or ""
             client_tel = t["client_tel"] or ""
             pc = f"{t['pc_marque'] or ''} {t['pc_modele'] or ''}".strip()
-            date_dep = t["date_depot"] or ""
-            date_ret = t["date_retrait"] or ""
+            date_dep = formater_date(t["date_depot"])
+            date_ret = formater_date(t["date_retrait"])
             mt = float(t["montant_total"] or 0)
             mp = float(t["montant_paye"] or 0)
             mr = float(t["montant_restant"] or 0)
@@ -525,9 +551,9 @@ class HistoriquePage(ctk.CTkFrame):
         # Mode Occasions
         elif type_actuel == "Occasions":
             try:
-                cur = self.db.cursor
-                cur.execute("SELECT * FROM occasion_achats WHERE id = ?", (tid,))
-                r = cur.fetchone()
+                with self.db.lecture() as cur:
+                    cur.execute("SELECT * FROM occasion_achats WHERE id = ?", (tid,))
+                    r = cur.fetchone()
             except Exception as e:
                 messagebox.showerror("Historique", f"Erreur lecture achat d'occasion : {e}")
                 return
@@ -542,7 +568,7 @@ class HistoriquePage(ctk.CTkFrame):
             )
             client_tel = r["vendeur_tel"] or ""
             pc = f"{r['tel_marque'] or ''} {r['tel_nom'] or ''} IMEI:{r['tel_imei'] or ''}".strip()
-            date_dep = r["date_achat"] or ""
+            date_dep = formater_date(r["date_achat"])
             date_ret = ""
             mt = 0.0
             mp = 0.0
@@ -573,9 +599,9 @@ class HistoriquePage(ctk.CTkFrame):
         # Mode Ventes
         else:
             try:
-                cur = self.db.cursor
-                cur.execute("SELECT * FROM ventes WHERE id = ?", (tid,))
-                v = cur.fetchone()
+                with self.db.lecture() as cur:
+                    cur.execute("SELECT * FROM ventes WHERE id = ?", (tid,))
+                    v = cur.fetchone()
             except Exception as e:
                 messagebox.showerror("Historique", f"Erreur lecture vente : {e}")
                 return
@@ -593,12 +619,7 @@ class HistoriquePage(ctk.CTkFrame):
             mr = 0.0
 
             # Conversion date
-            date_dep = date_heure
-            try:
-                dt = datetime.strptime(date_heure, "%Y-%m-%d %H:%M:%S")
-                date_dep = dt.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                pass
+            date_dep = formater_date(date_heure)
 
             # Détails de la vente
             try:
@@ -658,12 +679,11 @@ class HistoriquePage(ctk.CTkFrame):
             ):
                 return
             try:
-                cur = self.db.cursor
-                cur.execute(
-                    "UPDATE tickets_reparation SET statut = ? WHERE id = ?",
-                    ("Supprimé", self.current_ticket_id)
-                )
-                self.db.conn.commit()
+                with self.db.transaction("tickets_reparation") as cur:
+                    cur.execute(
+                        "UPDATE tickets_reparation SET statut = ? WHERE id = ?",
+                        ("Supprimé", self.current_ticket_id)
+                    )
             except Exception as e:
                 messagebox.showerror("Historique", f"Erreur lors de la suppression : {e}")
                 return
@@ -678,9 +698,8 @@ class HistoriquePage(ctk.CTkFrame):
             ):
                 return
             try:
-                cur = self.db.cursor
-                cur.execute("DELETE FROM occasion_achats WHERE id = ?", (self.current_ticket_id,))
-                self.db.conn.commit()
+                with self.db.transaction("occasion_achats") as cur:
+                    cur.execute("DELETE FROM occasion_achats WHERE id = ?", (self.current_ticket_id,))
             except Exception as e:
                 messagebox.showerror("Historique", f"Erreur lors de la suppression : {e}")
                 return
@@ -723,8 +742,8 @@ class HistoriquePage(ctk.CTkFrame):
             client_tel = t["client_tel"] or ""
             pc = f"{t['pc_marque'] or ''} {t['pc_modele'] or ''}".strip()
             serie = t["pc_num_serie"] or ""
-            date_dep = t["date_depot"] or ""
-            date_ret = t["date_retrait"] or ""
+            date_dep = formater_date(t["date_depot"])
+            date_ret = formater_date(t["date_retrait"])
             mt = float(t["montant_total"] or 0)
             mp = float(t["montant_paye"] or 0)
             mr = float(t["montant_restant"] or 0)
@@ -762,9 +781,9 @@ class HistoriquePage(ctk.CTkFrame):
         # Mode Occasions : fiche d'achat
         elif type_actuel == "Occasions":
             try:
-                cur = self.db.cursor
-                cur.execute("SELECT * FROM occasion_achats WHERE id = ?", (self.current_ticket_id,))
-                r = cur.fetchone()
+                with self.db.lecture() as cur:
+                    cur.execute("SELECT * FROM occasion_achats WHERE id = ?", (self.current_ticket_id,))
+                    r = cur.fetchone()
             except Exception as e:
                 messagebox.showerror("Facture", f"Erreur lecture achat d'occasion : {e}")
                 return
@@ -779,7 +798,7 @@ class HistoriquePage(ctk.CTkFrame):
             vendeur_adr = r["vendeur_adresse"] or ""
             tel = f"{r['tel_marque'] or ''} {r['tel_nom'] or ''}".strip()
             imei = r["tel_imei"] or ""
-            date_achat = r["date_achat"] or ""
+            date_achat = formater_date(r["date_achat"])
             piece_type = r["vendeur_piece_type"] or ""
             piece_num = r["vendeur_piece_num"] or ""
             piece_lieu = r["vendeur_piece_lieu"] or ""
@@ -811,9 +830,9 @@ class HistoriquePage(ctk.CTkFrame):
         # Mode Ventes : facture de vente
         else:
             try:
-                cur = self.db.cursor
-                cur.execute("SELECT * FROM ventes WHERE id = ?", (self.current_ticket_id,))
-                v = cur.fetchone()
+                with self.db.lecture() as cur:
+                    cur.execute("SELECT * FROM ventes WHERE id = ?", (self.current_ticket_id,))
+                    v = cur.fetchone()
             except Exception as e:
                 messagebox.showerror("Facture", f"Erreur lecture vente : {e}")
                 return
@@ -830,12 +849,7 @@ class HistoriquePage(ctk.CTkFrame):
             mr = 0.0
 
             # Conversion date
-            date_aff = date_heure
-            try:
-                dt = datetime.strptime(date_heure, "%Y-%m-%d %H:%M:%S")
-                date_aff = dt.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                pass
+            date_aff = formater_date(date_heure)
 
             # Détails
             try:
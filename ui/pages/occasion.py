@@ -5,6 +5,9 @@ from datetime import datetime
 
 import customtkinter as ctk
 
+from database import date_vers_iso
+from ..formatage import formater_date
+
 
 class OccasionPage(ctk.CTkFrame):
     """
@@ -23,44 +26,10 @@ class OccasionPage(ctk.CTkFrame):
         self.selected_id = None
         self.rows_by_id = {}
 
-        self._ensure_table()
         self._configure_styles()
         self._build_ui()
         self.charger_achats()
 
-    # ---------------------------------------------------------
-    # TABLE SQL
-    # ---------------------------------------------------------
-
-    def _ensure_table(self):
-        """
-        Crée la table des achats d'occasion si elle n'existe pas.
-        """
-        try:
-            cur = self.db.cursor
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS occasion_achats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tel_nom TEXT,
-                    tel_marque TEXT,
-                    tel_imei TEXT,
-                    date_achat TEXT,
-                    vendeur_nom TEXT,
-                    vendeur_prenom TEXT,
-                    vendeur_piece_type TEXT,
-                    vendeur_piece_num TEXT,
-                    vendeur_piece_lieu TEXT,
-                    vendeur_piece_date TEXT,
-                    vendeur_tel TEXT,
-                    vendeur_adresse TEXT
-                )
-                """
-            )
-            self.db.conn.commit()
-        except Exception as e:
-            messagebox.showerror("Occasion", f"Erreur création table occasion_achats : {e}", parent=self)
-
     # ---------------------------------------------------------
     # STYLES
     # ---------------------------------------------------------
@@ -391,26 +360,25 @@ class OccasionPage(ctk.CTkFrame):
             date_achat = datetime.now().strftime("%d/%m/%Y")
 
         try:
-            cur = self.db.cursor
-            cur.execute(
-                """
-                INSERT INTO occasion_achats (
-                    tel_nom, tel_marque, tel_imei, date_achat,
-                    vendeur_nom, vendeur_prenom,
-                    vendeur_piece_type, vendeur_piece_num,
-                    vendeur_piece_lieu, vendeur_piece_date,
-                    vendeur_tel, vendeur_adresse
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    tel_nom, tel_marque, tel_imei, date_achat,
-                    v_nom, v_prenom,
-                    piece_type, piece_num,
-                    piece_lieu, piece_date,
-                    v_tel, v_adresse
+            with self.db.transaction("occasion_achats") as cur:
+                cur.execute(
+                    """
+                    INSERT INTO occasion_achats (
+                        tel_nom, tel_marque, tel_imei, date_achat,
+                        vendeur_nom, vendeur_prenom,
+                        vendeur_piece_type, vendeur_piece_num,
+                        vendeur_piece_lieu, vendeur_piece_date,
+                        vendeur_tel, vendeur_adresse
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        tel_nom, tel_marque, tel_imei, date_vers_iso(date_achat),
+                        v_nom, v_prenom,
+                        piece_type, piece_num,
+                        piece_lieu, piece_date,
+                        v_tel, v_adresse
+                    )
                 )
-            )
-            self.db.conn.commit()
         except Exception as e:
             messagebox.showerror("Occasion", f"Erreur enregistrement achat : {e}", parent=self)
             return
@@ -423,12 +391,13 @@ class OccasionPage(ctk.CTkFrame):
         """Charge tous les achats d'occasion."""
         self.rows_by_id = {}
         try:
-            cur = self.db.cursor
-            cur.execute(
-                "SELECT * FROM occasion_achats ORDER BY id DESC"
-            )
-            rows = cur.fetchall()
+            with self.db.lecture() as cur:
+                cur.execute(
+                    "SELECT * FROM occasion_achats ORDER BY id DESC"
+                )
+                rows = cur.fetchall()
         except Exception as e:
+            self.app.page_a_relire("occasion")
             messagebox.showerror("Occasion", f"Erreur lecture achats : {e}", parent=self)
             return
 
@@ -441,7 +410,7 @@ class OccasionPage(ctk.CTkFrame):
             tel_nom = r["tel_nom"] or ""
             marque = r["tel_marque"] or ""
             imei = r["tel_imei"] or ""
-            date_achat = r["date_achat"] or ""
+            date_achat = formater_date(r["date_achat"])
             vendeur_nom = (r["vendeur_nom"] or "") + (
                 " " + (r["vendeur_prenom"] or "") if r["vendeur_prenom"] else ""
             )
@@ -484,7 +453,7 @@ class OccasionPage(ctk.CTkFrame):
         self.tel_imei_entry.insert(0, row["tel_imei"] or "")
 
         self.date_achat_entry.delete(0, "end")
-        self.date_achat_entry.insert(0, row["date_achat"] or "")
+        self.date_achat_entry.insert(0, formater_date(row["date_achat"]))
 
         self.v_nom_entry.delete(0, "end")
         self.v_nom_entry.insert(0, row["vendeur_nom"] or "")
@@ -0,0 +1,184 @@
+# ui/recherche_live.py
+import re
+import unicodedata
+
+# Attente après la dernière frappe avant de lancer la recherche
+DELAI_RECHERCHE_MS = 250
+
+
+def normaliser(texte):
+    """
+    Forme de comparaison d'un texte : minuscules, sans accents, la
+    ponctuation réduite à des espaces (comme le découpage de l'index
+    plein texte des produits).
+    """
+    texte = unicodedata.normalize("NFKD", str(texte or ""))
+    texte = "".join(c for c in texte if not unicodedata.combining(c)).casefold()
+    return " ".join(re.findall(r"\w+", texte))
+
+
+def cle_recherche(*champs):
+    """Texte normalisé des champs d'une ligne, précédé d'un espace (début de mot)."""
+    return " " + normaliser(" ".join(str(c) for c in champs if c))
+
+
+def champs_produit(ligne):
+    """Champs d'un produit couverts par la recherche (ceux de l'index plein texte)."""
+    return ligne["nom"], ligne["reference"], ligne["code_barres"], ligne["categorie"]
+
+
+# Règles de correspondance : terme normalisé contre cle_recherche(...)
+
+def correspond_mots(terme, cle):
+    """Chaque mot du terme commence un mot des champs (règle de rechercher_produits)."""
+    return all(f" {mot}" in cle for mot in terme.split())
+
+
+def correspond_contient(terme, cle):
+    """Le terme apparaît n'importe où dans les champs."""
+    return terme in cle
+
+
+def correspond_debut(terme, cle):
+    """Les champs commencent par le terme."""
+    return cle.startswith(f" {terme}")
+
+
+class RechercheLive:
+    """
+    Recherche au fil de la frappe sur un champ de saisie.
+
+    - La recherche part DELAI_RECHERCHE_MS après la dernière frappe
+      (Entrée la lance tout de suite) ; un terme inchangé ne relance rien.
+    - chercher(terme) est appelé sur le thread Tk. Sans exécuteur, il
+      retourne le résultat ; avec un exécuteur, il retourne fonction(db),
+      soumise sous la clé `cle` : une recherche plus récente rend la
+      précédente obsolète.
+    - Un résultat est une liste de lignes, ou (lignes, suivant) pour les
+      lectures par pages. Un résultat complet (suivant None) sert de base :
+      tant que le terme ne fait que s'allonger, les lignes sont filtrées en
+      mémoire avec `correspond` sur les textes donnés par champs(ligne),
+      sans nouvelle requête. Un filtrage vide relance une requête (la base
+      peut avoir d'autres règles, ex. le repli LIKE des produits).
+    - afficher(resultat) reçoit toujours la même forme que chercher.
+    """
+
+    def __init__(self, champ, variable, chercher, afficher, champs=None,
+                 correspond=correspond_mots, executeur=None, cle=None,
+                 on_erreur=None, delai_ms=DELAI_RECHERCHE_MS):
+        self.champ = champ
+        self.variable = variable
+        self.chercher = chercher
+        self.afficher = afficher
+        self.champs = champs
+        self.correspond = correspond
+        self.executeur = executeur
+        self.cle = cle
+        self.on_erreur = on_erreur
+        self.delai_ms = delai_ms
+
+        self._attente = None      # identifiant after du lancement différé
+        self._demande = None      # terme normalisé affiché ou en cours de lecture
+        self._base = None         # (terme normalisé, lignes, clés ou None)
+        self._pagine = False      # chercher retourne (lignes, suivant)
+
+        champ.bind("<KeyRelease>", self._on_frappe, add="+")
+        champ.bind("<Return>", lambda e: self.lancer(), add="+")
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+
+    def lancer(self):
+        """Applique tout de suite le terme saisi."""
+        self._annuler_attente()
+        terme = (self.variable.get() or "").strip()
+        normalise = normaliser(terme)
+        if normalise == self._demande:
+            return
+        self._demande = normalise
+
+        lignes = self._filtrer(normalise)
+        if lignes:
+            if self.executeur is not None:
+                self.executeur.annuler(self.cle)
+            self.afficher((lignes, None) if self._pagine else lignes)
+            return
+        self._interroger(terme, normalise)
+
+    def rafraichir(self):
+        """Relit le terme courant (données modifiées, autre filtre...)."""
+        self._annuler_attente()
+        self._base = None
+        terme = (self.variable.get() or "").strip()
+        self._demande = normaliser(terme)
+        self._interroger(terme, self._demande)
+
+    def reinitialiser(self, lignes=None):
+        """
+        À appeler quand la page a rempli la liste elle-même : le terme
+        courant est considéré comme affiché, avec lignes pour base.
+        """
+        self._annuler_attente()
+        self._demande = normaliser(self.variable.get())
+        self._base = None if lignes is None else (self._demande, lignes, None)
+
+    # ----------------------------------------------------------
+    # Interne
+    # ----------------------------------------------------------
+
+    def _on_frappe(self, event=None):
+        self._annuler_attente()
+        self._attente = self.champ.after(self.delai_ms, self.lancer)
+
+    def _annuler_attente(self):
+        if self._attente is not None:
+            try:
+                self.champ.after_cancel(self._attente)
+            except Exception:
+                pass
+            self._attente = None
+
+    def _filtrer(self, normalise):
+        """Lignes de la base qui correspondent au terme, None si la base ne sert pas."""
+        if self._base is None or self.champs is None:
+            return None
+        terme_base, lignes, cles = self._base
+        if not normalise.startswith(terme_base):
+            return None
+        if normalise == terme_base:
+            return lignes
+        if cles is None:
+            # calculées au premier filtrage seulement
+            cles = [cle_recherche(*self.champs(ligne)) for ligne in lignes]
+            self._base = (terme_base, lignes, cles)
+        return [ligne for ligne, cle in zip(lignes, cles) if self.correspond(normalise, cle)]
+
+    def _interroger(self, terme, normalise):
+        try:
+            resultat = self.chercher(terme)
+        except Exception as e:
+            self._erreur(e)
+            return
+        if self.executeur is None:
+            self._recevoir(normalise, resultat)
+        else:
+            self.executeur.soumettre(
+                resultat,
+                lambda r: self._recevoir(normalise, r),
+                on_erreur=self._erreur,
+                cle=self.cle,
+            )
+
+    def _recevoir(self, normalise, resultat):
+        self._pagine = isinstance(resultat, tuple)
+        lignes, suivant = resultat if self._pagine else (resultat, None)
+        self._base = (normalise, list(lignes), None) if suivant is None else None
+        self.afficher(resultat)
+
+    def _erreur(self, e):
+        # le même terme pourra être relancé
+        self._demande = None
+        if self.on_erreur is None:
+            raise e
+        self.on_erreur(e)
@@ -0,0 +1,215 @@
+# ui/surveillance_boucle.py
+import linecache
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Variable d'environnement : seuil (ms) d'un blocage, 0 pour désactiver
+ENV_SEUIL_BLOCAGE = "RED_BLOCAGE_MS"
+SEUIL_BLOCAGE_DEFAUT_MS = 500
+
+# Intervalle du battement posé sur la boucle Tk
+PERIODE_BATTEMENT_MS = 100
+
+# Piles échantillonnées par blocage : au seuil, puis à 2x, 4x, 8x, 16x le seuil
+NB_ECHANTILLONS = 5
+
+TAILLE_MAX_RAPPORT = 1_000_000  # octets par fichier
+NB_RAPPORTS = 3                 # anciens fichiers conservés (.1, .2, .3)
+
+# Dossier du projet : ses fonctions sont les gestionnaires cherchés dans la pile
+_RACINE_PROJET = str(Path(__file__).resolve().parents[1])
+
+
+def seuil_blocage(reglage=None):
+    """
+    Seuil (ms) de la surveillance des blocages, None si elle est désactivée.
+    reglage : valeur de settings.json ("ui_blocage_ms", None = défaut) ;
+    RED_BLOCAGE_MS l'emporte. 0, false ou off (booléen ou texte, casse
+    ignorée) désactivent la surveillance ; true donne le seuil par défaut.
+    """
+    valeur = os.environ.get(ENV_SEUIL_BLOCAGE, reglage)
+    if valeur is None or valeur == "" or valeur is True:
+        return SEUIL_BLOCAGE_DEFAUT_MS
+    if valeur is False or (isinstance(valeur, str) and valeur.strip().lower() in ("false", "off")):
+        return None
+    try:
+        valeur = float(valeur)
+    except (TypeError, ValueError):
+        return SEUIL_BLOCAGE_DEFAUT_MS
+    return valeur if valeur > 0 else None
+
+
+class SurveillanceBoucle:
+    """
+    Détecte les blocages de la boucle Tk ("l'application a gelé").
+
+    - Un battement root.after toutes les PERIODE_BATTEMENT_MS : son retard
+      sur l'heure prévue est le temps pendant lequel Tk n'a rien traité.
+    - Un thread de surveillance regarde si le battement attendu est en
+      retard de plus du seuil ; si oui, il relève la pile du thread Tk
+      (sys._current_frames) pendant le blocage.
+    - Au battement suivant, le blocage est écrit dans le rapport (fichier
+      tournant) : durée, gestionnaire en cours (show_*, commande de bouton,
+      callback : la première fonction du projet appelée par Tk) et piles.
+
+    À créer et démarrer sur le thread Tk, une fois mainloop lancée (sinon
+    le temps de démarrage compte comme un blocage).
+    """
+
+    def __init__(self, root, fichier=None, seuil_ms=SEUIL_BLOCAGE_DEFAUT_MS,
+                 periode_ms=PERIODE_BATTEMENT_MS):
+        self.root = root
+        self.fichier = fichier
+        self.seuil = seuil_ms / 1000
+        self.periode = periode_ms / 1000
+        self.blocages = []        # (durée en s, gestionnaire) de chaque blocage
+
+        self._thread_tk = threading.get_ident()
+        self._verrou = threading.Lock()
+        self._attendu = None      # instant prévu du prochain battement
+        self._echantillons = []   # (retard en s, pile) du blocage en cours
+        self._apres = None        # identifiant root.after du battement
+        self._arret = threading.Event()
+        self._thread = None
+
+        # Logger propre au rapport (pas de propagation vers la racine)
+        self._log = logging.Logger("red.blocages", logging.INFO)
+        if fichier is None:
+            self._gestionnaire = logging.StreamHandler()
+        else:
+            self._gestionnaire = logging.handlers.RotatingFileHandler(
+                fichier, maxBytes=TAILLE_MAX_RAPPORT, backupCount=NB_RAPPORTS,
+                encoding="utf-8", delay=True,
+            )
+        self._gestionnaire.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self._log.addHandler(self._gestionnaire)
+
+    # ----------------------------------------------------------
+    # THREAD TK
+    # ----------------------------------------------------------
+
+    def demarrer(self):
+        if self._thread is not None:
+            return
+        self._planifier()
+        self._thread = threading.Thread(target=self._surveiller,
+                                        name="surveillance-boucle", daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        """Arrête la surveillance et ferme le rapport (appelé à la sortie de l'application)."""
+        self._arret.set()
+        if self._apres is not None:
+            try:
+                self.root.after_cancel(self._apres)
+            except Exception:
+                pass
+            self._apres = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self.blocages:
+            pire, gestionnaire = max(self.blocages)
+            self._log.info("Fin de session : %d blocage(s), le plus long %.0f ms (%s)",
+                           len(self.blocages), pire * 1000, gestionnaire)
+        self._gestionnaire.close()
+
+    def _planifier(self):
+        with self._verrou:
+            self._attendu = time.perf_counter() + self.periode
+        self._apres = self.root.after(int(self.periode * 1000), self._battement)
+
+    def _battement(self):
+        retard = time.perf_counter() - self._attendu
+        with self._verrou:
+            echantillons, self._echantillons = self._echantillons, []
+            self._attendu = None
+        if retard >= self.seuil:
+            self._signaler(retard, echantillons)
+        if not self._arret.is_set():
+            self._planifier()
+
+    def _signaler(self, retard, echantillons):
+        gestionnaire = (_gestionnaire(echantillons[0][1]) if echantillons else None) or "?"
+        self.blocages.append((retard, gestionnaire))
+
+        lignes = [f"Blocage de {retard * 1000:.0f} ms du thread Tk "
+                  f"(seuil {self.seuil * 1000:.0f} ms) pendant {gestionnaire}"]
+        if not echantillons:
+            lignes.append("  pile non relevée (blocage plus court que l'intervalle de surveillance)")
+        precedente = None
+        for ecart, pile in echantillons:
+            if pile == precedente:
+                lignes.append(f"  pile à +{ecart * 1000:.0f} ms : identique")
+                continue
+            lignes.append(f"  pile à +{ecart * 1000:.0f} ms :")
+            lignes.extend(_formater_pile(pile))
+            precedente = pile
+        self._log.warning("\n".join(lignes))
+
+    # ----------------------------------------------------------
+    # THREAD DE SURVEILLANCE
+    # ----------------------------------------------------------
+
+    def _surveiller(self):
+        intervalle = min(self.periode, self.seuil) / 2
+        while not self._arret.wait(intervalle):
+            with self._verrou:
+                if self._attendu is None:
+                    continue
+                retard = time.perf_counter() - self._attendu
+                n = len(self._echantillons)
+            if n >= NB_ECHANTILLONS or retard < self.seuil * 2 ** n:
+                continue
+            cadre = sys._current_frames().get(self._thread_tk)
+            if cadre is None:
+                continue
+            pile = _relever_pile(cadre)
+            with self._verrou:
+                # le battement a pu arriver entre-temps : pile d'un autre moment
+                if self._attendu is not None:
+                    self._echantillons.append((retard, pile))
+
+
+def _relever_pile(cadre):
+    """(fichier, ligne, fonction) du plus externe au plus interne."""
+    pile = []
+    while cadre is not None:
+        code = cadre.f_code
+        pile.append((code.co_filename, cadre.f_lineno, getattr(code, "co_qualname", code.co_name)))
+        cadre = cadre.f_back
+    pile.reverse()
+    return pile
+
+
+def _du_projet(fichier):
+    return fichier.startswith(_RACINE_PROJET)
+
+
+def _gestionnaire(pile):
+    """
+    Première fonction du projet appelée depuis Tk (mainloop -> callback) :
+    show_*, commande de bouton, callback after...
+    """
+    passe_par_tk = False
+    for fichier, _ligne, fonction in pile:
+        if not _du_projet(fichier):
+            passe_par_tk = True
+        elif passe_par_tk:
+            return fonction
+    return None
+
+
+def _formater_pile(pile):
+    lignes = []
+    for fichier, ligne, fonction in pile:
+        nom = os.path.relpath(fichier, _RACINE_PROJET) if _du_projet(fichier) else fichier
+        lignes.append(f"    {nom}:{ligne} {fonction}")
+        source = linecache.getline(fichier, ligne).strip()
+        if source:
+            lignes.append(f"        {source}")
+    return lignes
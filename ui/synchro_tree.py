@@ -0,0 +1,97 @@
+# ui/synchro_tree.py
+
+
+def synchroniser_tree(tree, lignes):
+    """
+    Met un Treeview à plat dans l'état décrit par `lignes` en ne touchant
+    qu'aux différences, au lieu de tout supprimer puis tout réinsérer :
+      - les lignes absentes de `lignes` sont supprimées,
+      - les lignes nouvelles sont insérées à leur place,
+      - les lignes existantes ne sont réécrites que si leurs valeurs changent,
+      - l'ordre n'est corrigé (tree.move) que s'il diffère.
+    La sélection (lignes encore présentes) et la position de défilement
+    (première ligne visible) sont conservées.
+
+    lignes : liste ordonnée de (iid, valeurs) ou (iid, valeurs, tags),
+    l'iid identifiant la ligne d'un appel à l'autre (en général l'id en base).
+    Fonctionne avec ttk.Treeview et TreeviewVirtuel.
+    Retourne le nombre de lignes supprimées, insérées, modifiées ou déplacées.
+
+    Les (valeurs, tags) écrits sont mémorisés sur le tree (tree._synchro_lignes) :
+    les comparaisons se font sur ces copies Python, sans relire chaque ligne
+    dans Tk. Une ligne insérée par ailleurs (page suivante, etc.) n'y figure
+    pas et est relue une fois.
+    L'ordre final est calculé une fois : un TreeviewVirtuel le reçoit en un
+    seul appel (remplacer_lignes) ; un ttk.Treeview reçoit les nouvelles
+    lignes en fin de liste puis, si l'ordre diffère, un move par ligne.
+    """
+    voulus = [str(ligne[0]) for ligne in lignes]
+    garder = set(voulus)
+
+    actuels = tree.get_children()
+    selection = tree.selection()
+    haut = _premiere_visible(tree, actuels)
+
+    retirer = [iid for iid in actuels if iid not in garder]
+    # ordre après suppressions, nouvelles lignes ajoutées en fin
+    ordre = [iid for iid in actuels if iid in garder]
+    existants = set(ordre)
+    bloc = getattr(tree, "remplacer_lignes", None)
+
+    anciens = getattr(tree, "_synchro_lignes", None) or {}
+    memo = {}
+    modifiees, nouvelles, final = [], [], []
+    for ligne in lignes:
+        iid, valeurs = str(ligne[0]), tuple(ligne[1])
+        tags = tuple(ligne[2]) if len(ligne) > 2 else ()
+        # Tk peut rendre "12" pour 12 : comparer les textes
+        etat = (tuple(map(str, valeurs)), tags)
+        memo[iid] = etat
+        final.append((iid, valeurs, tags))
+        if iid in existants:
+            avant = anciens.get(iid)
+            if avant is None:
+                avant = (tuple(map(str, tree.item(iid, "values"))), tuple(tree.item(iid, "tags")))
+            if avant != etat:
+                modifiees.append((iid, valeurs, tags))
+        else:
+            nouvelles.append((iid, valeurs, tags))
+            ordre.append(iid)
+    tree._synchro_lignes = memo
+
+    deplacees = sum(1 for a, b in zip(ordre, voulus) if a != b)
+    changements = len(retirer) + len(modifiees) + len(nouvelles) + deplacees
+
+    if changements and bloc is not None:
+        bloc(final)
+    elif changements:
+        if retirer:
+            tree.delete(*retirer)
+        for iid, valeurs, tags in modifiees:
+            tree.item(iid, values=valeurs, tags=tags)
+        for iid, valeurs, tags in nouvelles:
+            tree.insert("", "end", iid=iid, values=valeurs, tags=tags)
+        if deplacees:
+            # les lignes avant le premier écart sont déjà à leur place
+            debut = next(k for k, (a, b) in enumerate(zip(ordre, voulus)) if a != b)
+            for index in range(debut, len(voulus)):
+                tree.move(voulus[index], "", index)
+
+    if not changements:
+        return 0
+
+    restants = tuple(iid for iid in selection if iid in garder)
+    if tuple(tree.selection()) != restants:
+        tree.selection_set(restants)
+    if haut in garder:
+        # la même ligne reste en haut, même si des lignes ont disparu au-dessus
+        tree.yview("moveto", voulus.index(haut) / len(voulus))
+    return changements
+
+
+def _premiere_visible(tree, enfants):
+    """iid de la première ligne visible, None si la liste est en haut."""
+    debut = float(tree.yview()[0])
+    if not enfants or debut <= 0:
+        return None
+    return enfants[min(len(enfants) - 1, round(debut * len(enfants)))]
@@ -0,0 +1,158 @@
+# ui/taches_db.py
+import itertools
+import queue
+import sys
+import threading
+
+from database import Database
+
+
+class ExecuteurDB:
+    """
+    Exécute les requêtes de lecture sur un thread dédié, pour que la
+    fenêtre Tk ne gèle pas pendant le chargement des grandes tables.
+    Le thread partage la Database de l'application : ses lectures passent
+    par les connexions de lecture (Database.lecture), sans attendre les
+    écritures du thread Tk.
+
+    Utilisation :
+        executeur.soumettre(
+            lambda db: db.get_tickets(),   # exécuté sur le thread de la base
+            self._afficher_tickets,        # appelé sur le thread Tk avec le résultat
+            on_erreur=self._erreur,        # appelé sur le thread Tk avec l'exception
+            cle="depot_tickets",
+        )
+
+    Les résultats reviennent au thread Tk par root.after (sondage de la file
+    des résultats uniquement tant qu'une tâche est en cours).
+    Avec une clé, seule la dernière tâche soumise est livrée : un
+    rechargement lancé pendant un autre rend le précédent obsolète.
+    """
+
+    DELAI_SONDAGE_MS = 15
+
+    def __init__(self, root, db: Database):
+        self.root = root
+        self._taches = queue.Queue()
+        self._resultats = queue.Queue()
+        self._numeros = itertools.count(1)
+        self._derniere = {}      # clé -> numéro de la dernière tâche soumise
+        self._en_cours = 0       # tâches soumises dont le résultat n'est pas livré
+        self._sondage = None     # identifiant root.after du prochain sondage
+
+        self._thread = threading.Thread(
+            target=self._boucle,
+            args=(db,),
+            name="executeur-db",
+            daemon=True,
+        )
+        self._thread.start()
+
+    # ----------------------------------------------------------
+    # THREAD TK
+    # ----------------------------------------------------------
+
+    def soumettre(self, fonction, on_succes, on_erreur=None, cle=None):
+        """
+        Planifie fonction(db) sur le thread de la base.
+        Retourne le numéro de la tâche.
+        """
+        numero = next(self._numeros)
+        if cle is not None:
+            self._derniere[cle] = numero
+        self._en_cours += 1
+        self._taches.put((numero, cle, fonction, on_succes, on_erreur))
+        self._planifier_sondage()
+        return numero
+
+    def annuler(self, cle):
+        """Rend obsolète la tâche en cours pour cette clé (son résultat ne sera pas livré)."""
+        if cle in self._derniere:
+            self._derniere[cle] = next(self._numeros)
+
+    def fermer(self):
+        """Arrête le thread (appelé à la sortie de l'application, avant db.close())."""
+        self._taches.put(None)
+        self._thread.join(timeout=2)
+        if self._sondage is not None:
+            try:
+                self.root.after_cancel(self._sondage)
+            except Exception:
+                pass
+            self._sondage = None
+
+    def _obsolete(self, numero, cle):
+        return cle is not None and self._derniere.get(cle) != numero
+
+    def _planifier_sondage(self):
+        if self._en_cours > 0 and self._sondage is None:
+            self._sondage = self.root.after(self.DELAI_SONDAGE_MS, self._livrer_resultats)
+
+    def _livrer_resultats(self):
+        """Appelle les callbacks des tâches terminées (sur le thread Tk)."""
+        self._sondage = None
+        while True:
+            try:
+                numero, cle, callback, valeur = self._resultats.get_nowait()
+            except queue.Empty:
+                break
+            self._en_cours -= 1
+            if callback is None or self._obsolete(numero, cle):
+                continue
+            try:
+                callback(valeur)
+            except Exception:
+                # même comportement qu'une erreur dans un callback Tk classique
+                self.root.report_callback_exception(*sys.exc_info())
+        self._planifier_sondage()
+
+    # ----------------------------------------------------------
+    # THREAD DE LA BASE
+    # ----------------------------------------------------------
+
+    def _boucle(self, db):
+        while True:
+            tache = self._taches.get()
+            if tache is None:
+                break
+            numero, cle, fonction, on_succes, on_erreur = tache
+
+            # tâche déjà remplacée par une plus récente : inutile de l'exécuter
+            if self._obsolete(numero, cle):
+                self._resultats.put((numero, cle, None, None))
+                continue
+
+            try:
+                self._resultats.put((numero, cle, on_succes, fonction(db)))
+            except Exception as e:
+                self._resultats.put((numero, cle, on_erreur, e))
+
+
+# ----------------------------------------------------------
+# INDICATEUR DE CHARGEMENT SUR UN TREEVIEW
+# ----------------------------------------------------------
+
+def afficher_chargement(tree, texte="Chargement..."):
+    """Vide le Treeview et affiche une ligne "Chargement..." (curseur d'attente)."""
+    tree.delete(*tree.get_children())
+    colonnes = tree["columns"]
+    valeurs = [""] * len(colonnes)
+    if valeurs:
+        # 2e colonne si elle existe (la 1re est souvent un N° étroit)
+        valeurs[1 if len(valeurs) > 1 else 0] = texte
+    tree.tag_configure("chargement", foreground="#757575")
+    tree.insert("", "end", values=valeurs, tags=("chargement",))
+    try:
+        tree.configure(cursor="watch")
+    except Exception:
+        pass
+
+
+def masquer_chargement(tree):
+    """Retire la ligne "Chargement..." et rétablit le curseur."""
+    for item in tree.tag_has("chargement"):
+        tree.delete(item)
+    try:
+        tree.configure(cursor="")
+    except Exception:
+        pass
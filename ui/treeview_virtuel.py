@@ -0,0 +1,438 @@
+# ui/treeview_virtuel.py
+import tkinter as tk
+from tkinter import ttk
+
+
+class TreeviewVirtuel(ttk.Treeview):
+    """
+    Treeview "virtuel" : remplace ttk.Treeview pour les longues listes.
+
+    Toutes les lignes sont gardées dans une liste Python (valeurs, tags, iid)
+    et seules celles visibles à l'écran existent dans le widget Tk : le
+    défilement ne fait que réécrire les valeurs de ces quelques lignes.
+    Insérer 50 000 lignes ne crée donc pas 50 000 éléments Tk.
+
+    S'utilise comme un ttk.Treeview à plat (show="headings") : insert,
+    delete, get_children, item, selection, selection_set, see, yview,
+    bind("<<TreeviewSelect>>"), tag_has, identify_row... travaillent sur les
+    lignes "logiques". La scrollbar se branche de la même façon :
+        vsb = ttk.Scrollbar(parent, command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+
+    Chargement progressif : definir_chargement_suite(fonction) appelle
+    fonction() quand l'utilisateur approche de la fin des lignes chargées ;
+    elle doit insérer la page suivante (ou appeler definir_chargement_suite(None)
+    s'il n'y a plus rien à charger). Vider la liste arrête le chargement.
+    """
+
+    HAUTEUR_LIGNE_DEFAUT = 20
+
+    def __init__(self, master=None, **kw):
+        self._yscroll = kw.pop("yscrollcommand", None)
+        super().__init__(master, **kw)
+
+        # Stockage de toutes les lignes
+        self._valeurs = []     # tuple de valeurs de chaque ligne
+        self._tags = []        # tuple de tags de chaque ligne
+        self._iids = []        # iid logique de chaque ligne
+        self._position = {}    # iid logique -> index dans les listes
+        self._compteur = 0     # pour générer les iid logiques
+
+        # Fenêtre affichée
+        self._debut = 0                        # index de la 1re ligne affichée
+        self._nb_visibles = int(kw.get("height") or 10)
+        self._physiques = []                   # iid des lignes Tk réellement créées
+        self._rendu_prevu = None
+
+        # Sélection logique et callbacks <<TreeviewSelect>> de l'appelant
+        self._selection = []
+        self._callbacks_selection = []
+
+        # Chargement progressif
+        self._charger_suite = None
+        self._suite_demandee = False
+
+        super().bind("<<TreeviewSelect>>", self._on_selection_physique, add="+")
+        super().bind("<Configure>", self._on_configure, add="+")
+        super().bind("<MouseWheel>", self._on_molette, add="+")
+        super().bind("<Button-4>", lambda e: self._defiler(-3), add="+")
+        super().bind("<Button-5>", lambda e: self._defiler(3), add="+")
+        for touche, pas in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"),
+                            ("<Next>", "page"), ("<Home>", "debut"), ("<End>", "fin")):
+            super().bind(touche, lambda e, p=pas: self._on_touche(p), add="+")
+
+    # ----------------------------------------------------------
+    # API Treeview (lignes logiques)
+    # ----------------------------------------------------------
+
+    def insert(self, parent, index, iid=None, **kw):
+        """Ajoute une ligne (parent ignoré : liste à plat). Retourne son iid."""
+        if iid is None:
+            self._compteur += 1
+            iid = f"L{self._compteur}"
+        iid = str(iid)
+        valeurs = tuple(kw.get("values") or ())
+        tags = kw.get("tags") or ()
+        tags = (tags,) if isinstance(tags, str) else tuple(tags)
+
+        if index == "end" or index is None or int(index) >= len(self._iids):
+            self._position[iid] = len(self._iids)
+            self._iids.append(iid)
+            self._valeurs.append(valeurs)
+            self._tags.append(tags)
+        else:
+            i = max(0, int(index))
+            self._iids.insert(i, iid)
+            self._valeurs.insert(i, valeurs)
+            self._tags.insert(i, tags)
+            self._reindexer(i)
+
+        self._suite_demandee = False
+        self._planifier_rendu()
+        return iid
+
+    def delete(self, *items):
+        items = [self._logique(i) for i in items]
+        if not items:
+            return
+        if len(items) >= len(self._iids) and set(items) >= set(self._iids):
+            self._valeurs, self._tags, self._iids = [], [], []
+            self._position = {}
+            self._debut = 0
+            # liste vidée : le chargement progressif précédent est terminé
+            self._charger_suite = None
+        else:
+            a_supprimer = set(items)
+            for iid in a_supprimer:
+                self._position.pop(iid, None)
+            premier = min((k for k, i in enumerate(self._iids) if i in a_supprimer), default=len(self._iids))
+            garder = [k for k, i in enumerate(self._iids) if i not in a_supprimer]
+            self._valeurs = [self._valeurs[k] for k in garder]
+            self._tags = [self._tags[k] for k in garder]
+            self._iids = [self._iids[k] for k in garder]
+            self._reindexer(premier)
+        self._selection = [i for i in self._selection if i in self._position]
+        self._planifier_rendu()
+
+    def move(self, item, parent, index):
+        """Déplace une ligne à la position index (parent ignoré : liste à plat)."""
+        iid = self._logique(item)
+        i = self._position[iid]
+        cible = max(0, min(int(index), len(self._iids) - 1))
+        if cible == i:
+            return
+        valeurs, tags = self._valeurs.pop(i), self._tags.pop(i)
+        self._iids.pop(i)
+        self._iids.insert(cible, iid)
+        self._valeurs.insert(cible, valeurs)
+        self._tags.insert(cible, tags)
+        self._reindexer(min(i, cible), max(i, cible) + 1)
+        self._planifier_rendu()
+
+    def remplacer_lignes(self, lignes):
+        """
+        Remplace toutes les lignes d'un coup par lignes = [(iid, valeurs, tags), ...]
+        (ordre final), avec une seule réindexation. La sélection garde les
+        lignes encore présentes ; le chargement progressif n'est pas arrêté.
+        """
+        self._iids = [str(ligne[0]) for ligne in lignes]
+        self._valeurs = [tuple(ligne[1]) for ligne in lignes]
+        self._tags = [(ligne[2],) if isinstance(ligne[2], str) else tuple(ligne[2]) for ligne in lignes]
+        self._position = {}
+        self._reindexer()
+        self._selection = [i for i in self._selection if i in self._position]
+        self._suite_demandee = False
+        self._planifier_rendu()
+
+    def get_children(self, item=None):
+        return tuple(self._iids) if not item else ()
+
+    def exists(self, item):
+        return self._logique(item) in self._position
+
+    def index(self, item):
+        return self._position[self._logique(item)]
+
+    def item(self, item, option=None, **kw):
+        iid = self._logique(item)
+        i = self._position[iid]
+        if "values" in kw:
+            self._valeurs[i] = tuple(kw["values"] or ())
+        if "tags" in kw:
+            tags = kw["tags"] or ()
+            self._tags[i] = (tags,) if isinstance(tags, str) else tuple(tags)
+        if kw:
+            self._planifier_rendu()
+            return None
+        infos = {
+            "text": "",
+            "image": "",
+            "values": list(self._valeurs[i]),
+            "open": 0,
+            "tags": list(self._tags[i]),
+        }
+        return infos[option] if option else infos
+
+    def set(self, item, column=None, value=None):
+        iid = self._logique(item)
+        i = self._position[iid]
+        colonnes = list(self["columns"])
+        valeurs = list(self._valeurs[i]) + [""] * (len(colonnes) - len(self._valeurs[i]))
+        if column is None:
+            return dict(zip(colonnes, valeurs))
+        k = colonnes.index(column) if column in colonnes else int(str(column).lstrip("#")) - 1
+        if value is None:
+            return valeurs[k]
+        valeurs[k] = value
+        self.item(iid, values=valeurs)
+
+    def tag_has(self, tagname, item=None):
+        if item is not None:
+            return tagname in self._tags[self._position[self._logique(item)]]
+        return tuple(i for i, t in zip(self._iids, self._tags) if tagname in t)
+
+    def selection(self):
+        return tuple(self._selection)
+
+    def selection_set(self, *items):
+        self._changer_selection(self._items(items))
+
+    def selection_add(self, *items):
+        nouveaux = [i for i in self._items(items) if i not in self._selection]
+        self._changer_selection(self._selection + nouveaux)
+
+    def selection_remove(self, *items):
+        retirer = set(self._items(items))
+        self._changer_selection([i for i in self._selection if i not in retirer])
+
+    def focus(self, item=None):
+        if item is None:
+            return self._selection[0] if self._selection else ""
+        self.see(item)
+        return None
+
+    def see(self, item):
+        i = self._position.get(self._logique(item))
+        if i is None:
+            return
+        if i < self._debut:
+            self._debut = i
+        elif i >= self._debut + self._nb_visibles:
+            self._debut = i - self._nb_visibles + 1
+        self._planifier_rendu()
+
+    def identify_row(self, y):
+        return self._logique(super().identify_row(y))
+
+    def yview(self, *args):
+        """Même protocole que Treeview.yview (utilisé par la scrollbar)."""
+        total = len(self._iids)
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._debut = round(float(args[1]) * total)
+        elif args[0] == "scroll":
+            n = int(args[1])
+            if len(args) > 2 and args[2].startswith("page"):
+                n *= max(1, self._nb_visibles - 1)
+            self._debut += n
+        self._rendre()
+        return None
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict):
+            kw = {**cnf, **kw}
+            cnf = None
+        if "yscrollcommand" in kw:
+            self._yscroll = kw.pop("yscrollcommand")
+            self._planifier_rendu()
+        if cnf is None and not kw:
+            return super().configure()
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def __setitem__(self, key, value):
+        self.configure(**{key: value})
+
+    def bind(self, sequence=None, func=None, add=None):
+        if sequence == "<<TreeviewSelect>>":
+            if func is None:
+                return None
+            if not add:
+                self._callbacks_selection = []
+            self._callbacks_selection.append(func)
+            return f"selection{len(self._callbacks_selection)}"
+        return super().bind(sequence, func, add)
+
+    # ----------------------------------------------------------
+    # Chargement progressif
+    # ----------------------------------------------------------
+
+    def definir_chargement_suite(self, fonction):
+        """
+        fonction() sera appelée quand l'affichage approche de la fin des lignes
+        chargées (une fois, jusqu'à la prochaine insertion). None pour arrêter.
+        """
+        self._charger_suite = fonction
+        self._suite_demandee = False
+        self._planifier_rendu()
+
+    # ----------------------------------------------------------
+    # Interne
+    # ----------------------------------------------------------
+
+    def _reindexer(self, debut=0, fin=None):
+        """Recalcule _position pour les lignes debut..fin (exclu) seulement."""
+        position = self._position
+        for k in range(debut, len(self._iids) if fin is None else fin):
+            position[self._iids[k]] = k
+
+    def _items(self, items):
+        # selection_set(a, b) ou selection_set((a, b)) comme ttk
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        return [self._logique(i) for i in items if self._logique(i) in self._position]
+
+    def _logique(self, iid):
+        """Traduit l'iid d'une ligne Tk affichée en iid logique."""
+        iid = str(iid)
+        if iid.startswith("__v"):
+            k = self._physiques.index(iid) if iid in self._physiques else -1
+            if 0 <= k and self._debut + k < len(self._iids):
+                return self._iids[self._debut + k]
+            return ""
+        return iid
+
+    def _fractions(self):
+        total = len(self._iids)
+        if total == 0:
+            return 0.0, 1.0
+        fin = min(total, self._debut + self._nb_visibles)
+        return self._debut / total, fin / total
+
+    def _planifier_rendu(self):
+        if self._rendu_prevu is None:
+            self._rendu_prevu = self.after_idle(self._rendre)
+
+    def _rendre(self):
+        """Réécrit les lignes Tk visibles à partir de la liste."""
+        if self._rendu_prevu is not None:
+            try:
+                self.after_cancel(self._rendu_prevu)
+            except Exception:
+                pass
+            self._rendu_prevu = None
+
+        total = len(self._iids)
+        n = min(self._nb_visibles, total)
+        self._debut = max(0, min(self._debut, total - n))
+
+        # Ajuster le nombre de lignes Tk
+        while len(self._physiques) < n:
+            iid = f"__v{len(self._physiques)}"
+            super().insert("", "end", iid=iid)
+            self._physiques.append(iid)
+        while len(self._physiques) > n:
+            super().delete(self._physiques.pop())
+
+        selection = set(self._selection)
+        selection_tk = []
+        for k, phys in enumerate(self._physiques):
+            i = self._debut + k
+            super().item(phys, values=self._valeurs[i], tags=self._tags[i])
+            if self._iids[i] in selection:
+                selection_tk.append(phys)
+
+        if set(super().selection()) != set(selection_tk):
+            super().selection_set(selection_tk)
+
+        if self._yscroll:
+            self._yscroll(*self._fractions())
+
+        # Fin des lignes chargées en vue : demander la page suivante
+        if (self._charger_suite and not self._suite_demandee
+                and self._debut + 2 * self._nb_visibles >= total):
+            self._suite_demandee = True
+            self.after_idle(self._charger_suite)
+
+    def _defiler(self, n):
+        self._debut += n
+        self._rendre()
+        return "break"
+
+    def _on_molette(self, event):
+        # Windows / macOS : delta multiple de 120 (ou petites valeurs sur macOS)
+        pas = -int(event.delta / 120) * 3 if abs(event.delta) >= 120 else -event.delta
+        return self._defiler(pas or (-1 if event.delta > 0 else 1))
+
+    def _on_touche(self, pas):
+        total = len(self._iids)
+        if not total:
+            return "break"
+        actuel = self._position.get(self._selection[-1], self._debut) if self._selection else self._debut - 1
+        if pas == "debut":
+            cible = 0
+        elif pas == "fin":
+            cible = total - 1
+        elif pas in ("page", "-page"):
+            saut = max(1, self._nb_visibles - 1)
+            cible = actuel + (saut if pas == "page" else -saut)
+        else:
+            cible = actuel + pas
+        cible = max(0, min(total - 1, cible))
+        self.see(self._iids[cible])
+        self._changer_selection([self._iids[cible]])
+        self._rendre()
+        return "break"
+
+    def _on_configure(self, event=None):
+        """Recalcule le nombre de lignes visibles selon la hauteur du widget."""
+        hauteur_ligne = self.HAUTEUR_LIGNE_DEFAUT
+        try:
+            valeur = ttk.Style(self).lookup(self.cget("style") or "Treeview", "rowheight")
+            if valeur:
+                hauteur_ligne = int(valeur)
+        except (tk.TclError, ValueError):
+            pass
+
+        entete = hauteur_ligne + 4
+        if self._physiques:
+            bbox = super().bbox(self._physiques[0])
+            if bbox:
+                entete, hauteur_ligne = bbox[1], bbox[3] or hauteur_ligne
+
+        nb = max(1, (self.winfo_height() - entete) // max(1, hauteur_ligne))
+        if nb != self._nb_visibles:
+            self._nb_visibles = nb
+            self._rendre()
+
+    def _on_selection_physique(self, event):
+        """Clic dans la liste : met à jour la sélection logique."""
+        visibles = {
+            phys: self._iids[self._debut + k]
+            for k, phys in enumerate(self._physiques)
+            if self._debut + k < len(self._iids)
+        }
+        choisis = [visibles[p] for p in super().selection() if p in visibles]
+        # les lignes sélectionnées mais hors de l'écran restent sélectionnées
+        hors_vue = [i for i in self._selection if i not in set(visibles.values())]
+
+        if str(self.cget("selectmode")) == "browse":
+            nouvelle = choisis[:1] or hors_vue[:1]
+        else:
+            nouvelle = hors_vue + choisis
+        if nouvelle != self._selection:
+            self._selection = nouvelle
+            self._notifier_selection(event)
+
+    def _changer_selection(self, nouvelle):
+        if nouvelle != self._selection:
+            self._selection = list(nouvelle)
+            self._planifier_rendu()
+            # comme ttk : <<TreeviewSelect>> est traité après l'appel
+            self.after_idle(self._notifier_selection, None)
+
+    def _notifier_selection(self, event):
+        for callback in list(self._callbacks_selection):
+            callback(event)